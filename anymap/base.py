@@ -7,7 +7,8 @@ state management, and provides common mapping functionality.
 
 import anywidget
 import traitlets
-from typing import Dict, Any, Optional, Callable
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional, Callable
 
 
 class MapWidget(anywidget.AnyWidget):
@@ -36,6 +37,9 @@ class MapWidget(anywidget.AnyWidget):
     # Communication traits
     _js_calls = traitlets.List([]).tag(sync=True)
     _js_events = traitlets.List([]).tag(sync=True)
+    # Minimum interval in milliseconds between events of a type sent from
+    # JavaScript, keyed by event type
+    _event_throttle = traitlets.Dict({}).tag(sync=True)
 
     # Internal state
     _layers = traitlets.Dict({}).tag(sync=True)
@@ -53,6 +57,7 @@ class MapWidget(anywidget.AnyWidget):
         super().__init__(**kwargs)
         self._event_handlers = {}
         self._js_method_counter = 0
+        self._pending_calls = None
 
     def call_js_method(self, method_name: str, *args: Any, **kwargs: Any) -> None:
         """Call a JavaScript method on the map instance.
@@ -70,13 +75,104 @@ class MapWidget(anywidget.AnyWidget):
         }
         self._js_method_counter += 1
 
+        # Defer the sync until the enclosing batch_update() block exits
+        if self._pending_calls is not None:
+            self._pending_calls.append(call_data)
+            return
+
         # Trigger sync by creating new list
         current_calls = list(self._js_calls)
         current_calls.append(call_data)
         self._js_calls = current_calls
 
+    @property
+    def _batching(self) -> bool:
+        """Whether JavaScript calls are currently being collected by batch_update()."""
+        return self._pending_calls is not None
+
+    @contextmanager
+    def batch_update(self) -> Iterator["MapWidget"]:
+        """Collect JavaScript method calls and send them in a single sync.
+
+        Every `call_js_method` issued inside the block is queued and the whole
+        queue is sent to the front end with one `_js_calls` update when the
+        outermost block exits. Trait changes made inside the block are sent
+        in the same comm message. Nested blocks are merged into the outer one.
+        If the block raises, the calls queued so far are still sent along with
+        the trait changes, as they would have been without batching.
+
+        Example:
+            >>> with m.batch_update():
+            ...     for i in range(10):
+            ...         m.add_layer(f"layer-{i}", {"id": f"layer-{i}", "type": "circle"})
+
+        Yields:
+            The map widget itself.
+        """
+        if self._pending_calls is not None:
+            yield self
+            return
+
+        self._pending_calls = []
+        try:
+            with self.hold_sync():
+                try:
+                    yield self
+                finally:
+                    pending = self._pending_calls
+                    if pending:
+                        self._js_calls = list(self._js_calls) + pending
+        finally:
+            self._pending_calls = None
+
+    def _set_trait_item(self, name: str, key: str, value: Any) -> None:
+        """Set an item of a synced dict trait in place and notify the front end.
+
+        This avoids copying the whole dictionary, which reassigning a new dict
+        to the trait would require for traitlets to detect the change.
+
+        Args:
+            name: Name of the dict trait (e.g. "_layers").
+            key: Key of the item to set.
+            value: Value to store under the key.
+        """
+        current = getattr(self, name)
+        current[key] = value
+        self._notify_trait(name, current, current)
+
+    @contextmanager
+    def _mutate_controls(self) -> Iterator[Dict[str, Any]]:
+        """Edit the synced controls dict in place and notify the front end.
+
+        Yields:
+            The `_controls` dictionary itself (not a copy).
+        """
+        controls = self._controls
+        yield controls
+        self._notify_trait("_controls", controls, controls)
+
+    def _pop_trait_item(self, name: str, key: str) -> bool:
+        """Remove an item of a synced dict trait in place and notify the front end.
+
+        Args:
+            name: Name of the dict trait (e.g. "_layers").
+            key: Key of the item to remove.
+
+        Returns:
+            True if the item existed and was removed, False otherwise.
+        """
+        current = getattr(self, name)
+        if key not in current:
+            return False
+        del current[key]
+        self._notify_trait(name, current, current)
+        return True
+
     def on_map_event(
-        self, event_type: str, callback: Callable[[Dict[str, Any]], None]
+        self,
+        event_type: str,
+        callback: Callable[[Dict[str, Any]], None],
+        throttle_ms: Optional[int] = None,
     ) -> None:
         """Register a callback for map events.
 
@@ -84,10 +180,21 @@ class MapWidget(anywidget.AnyWidget):
             event_type: Type of event to listen for (e.g., 'click', 'zoom').
             callback: Function to call when the event occurs. Should accept
                      a dictionary containing event data.
+            throttle_ms: Minimum interval in milliseconds between two events of
+                this type sent from JavaScript. Events arriving in between are
+                dropped, except for the last one, which is sent when the
+                interval has passed. 0 sends every event. If None, the
+                front end default is kept (16 ms for 'mousemove', no
+                throttling otherwise). Applies to all callbacks of the type.
         """
         if event_type not in self._event_handlers:
             self._event_handlers[event_type] = []
         self._event_handlers[event_type].append(callback)
+        if throttle_ms is not None:
+            self._event_throttle = {
+                **self._event_throttle,
+                event_type: max(int(throttle_ms), 0),
+            }
 
     def off_map_event(
         self,
@@ -179,9 +286,7 @@ class MapWidget(anywidget.AnyWidget):
             layer_config: Dictionary containing layer configuration.
         """
         # Store layer in local state for persistence
-        current_layers = dict(self._layers)
-        current_layers[layer_id] = layer_config
-        self._layers = current_layers
+        self._set_trait_item("_layers", layer_id, layer_config)
 
         self.call_js_method("addLayer", layer_config, layer_id)
 
@@ -192,10 +297,7 @@ class MapWidget(anywidget.AnyWidget):
             layer_id: Unique identifier of the layer to remove.
         """
         # Remove from local state
-        current_layers = dict(self._layers)
-        if layer_id in current_layers:
-            del current_layers[layer_id]
-            self._layers = current_layers
+        self._pop_trait_item("_layers", layer_id)
 
         self.call_js_method("removeLayer", layer_id)
 
@@ -207,9 +309,7 @@ class MapWidget(anywidget.AnyWidget):
             source_config: Dictionary containing source configuration.
         """
         # Store source in local state for persistence
-        current_sources = dict(self._sources)
-        current_sources[source_id] = source_config
-        self._sources = current_sources
+        self._set_trait_item("_sources", source_id, source_config)
 
         self.call_js_method("addSource", source_id, source_config)
 
@@ -220,10 +320,7 @@ class MapWidget(anywidget.AnyWidget):
             source_id: Unique identifier of the source to remove.
         """
         # Remove from local state
-        current_sources = dict(self._sources)
-        if source_id in current_sources:
-            del current_sources[source_id]
-            self._sources = current_sources
+        self._pop_trait_item("_sources", source_id)
 
         self.call_js_method("removeSource", source_id)
 
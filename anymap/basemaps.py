@@ -6,6 +6,7 @@ basemaps and filter them based on various criteria.
 
 Functions:
     get_xyz_dict: Get a dictionary of available XYZ tile services.
+    resolve_basemap: Get the tile URL and attribution of a basemap.
 
 Variables:
     available_basemaps: Dictionary of available basemap providers.
@@ -19,8 +20,9 @@ Example:
 """
 
 import collections
+import functools
 import xyzservices
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 
 
 def get_xyz_dict(free_only: bool = True, france: bool = False) -> Dict[str, Any]:
@@ -85,3 +87,34 @@ Example:
     >>> print(url)
     https://tile.openstreetmap.org/{z}/{x}/{y}.png
 """
+
+
+@functools.lru_cache(maxsize=256)
+def resolve_basemap(name: str) -> Tuple[str, str]:
+    """Returns the tile URL and attribution of an available basemap.
+
+    The result is cached, so that adding the same basemap to many maps only
+    builds its URL once.
+
+    Args:
+        name: Name of the basemap in `available_basemaps`
+            (e.g., 'OpenStreetMap.Mapnik').
+
+    Returns:
+        The tile URL template and the attribution of the basemap.
+
+    Raises:
+        ValueError: If the basemap is not available.
+
+    Example:
+        >>> url, attribution = resolve_basemap('OpenStreetMap.Mapnik')
+        >>> url
+        'https://tile.openstreetmap.org/{z}/{x}/{y}.png'
+    """
+    basemap_config = available_basemaps.get(name)
+    if basemap_config is None:
+        raise ValueError(
+            f"Basemap '{name}' not found. "
+            f"Available basemaps: {list(available_basemaps)}"
+        )
+    return basemap_config.build_url(), basemap_config.get("attribution", "")
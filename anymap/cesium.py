@@ -1,24 +1,11 @@
 """Cesium ion implementation of the map widget for 3D globe visualization."""
 
-import pathlib
 import traitlets
 from typing import Dict, List, Any, Optional, Union
 
+from . import utils
 from .base import MapWidget
 
-# Load Cesium-specific js and css
-with open(
-    pathlib.Path(__file__).parent / "static" / "cesium_widget.js", "r", encoding="utf-8"
-) as f:
-    _esm_cesium = f.read()
-
-with open(
-    pathlib.Path(__file__).parent / "static" / "cesium_widget.css",
-    "r",
-    encoding="utf-8",
-) as f:
-    _css_cesium = f.read()
-
 
 class CesiumMap(MapWidget):
     """Cesium ion implementation of the map widget for 3D globe visualization."""
@@ -47,8 +34,8 @@ class CesiumMap(MapWidget):
     should_animate = traitlets.Bool(False).tag(sync=True)
 
     # Define the JavaScript module path
-    _esm = _esm_cesium
-    _css = _css_cesium
+    _esm = utils.BundledAsset("static", "cesium_widget.js")
+    _css = utils.BundledAsset("static", "cesium_widget.css")
 
     def __init__(
         self,
@@ -4,7 +4,8 @@ import pathlib
 import anywidget
 import traitlets
 from typing import Dict, Any, Optional, Union, TYPE_CHECKING
-import json
+
+from . import utils
 
 if TYPE_CHECKING:
     from .base import MapWidget
@@ -700,7 +701,7 @@ class MapCompare(anywidget.AnyWidget):
     ) -> str:
         """Generate the HTML template for map comparison."""
         # Serialize widget state for JavaScript
-        widget_state_json = json.dumps(widget_state, indent=2)
+        widget_state_json = utils.json_dumps(widget_state, indent=True)
 
         # Choose CDN URLs based on backend
         if widget_state["backend"] == "maplibre":
@@ -1,25 +1,11 @@
 """DeckGL implementation of the map widget that extends MapLibre."""
 
-import pathlib
 import traitlets
 from typing import Dict, List, Any, Optional, Union
-import json
 
+from . import utils
 from .maplibre import MapLibreMap
 
-# Load DeckGL-specific js and css
-with open(
-    pathlib.Path(__file__).parent / "static" / "deckgl_widget.js", "r", encoding="utf-8"
-) as f:
-    _esm_deckgl = f.read()
-
-with open(
-    pathlib.Path(__file__).parent / "static" / "deckgl_widget.css",
-    "r",
-    encoding="utf-8",
-) as f:
-    _css_deckgl = f.read()
-
 
 class DeckGLMap(MapLibreMap):
     """DeckGL implementation of the map widget that extends MapLibre."""
@@ -29,8 +15,8 @@ class DeckGLMap(MapLibreMap):
     controller_options = traitlets.Dict({}).tag(sync=True)
 
     # Override the JavaScript module
-    _esm = _esm_deckgl
-    _css = _css_deckgl
+    _esm = utils.BundledAsset("static", "deckgl_widget.js")
+    _css = utils.BundledAsset("static", "deckgl_widget.css")
 
     def __init__(
         self,
@@ -249,156 +235,14 @@ class DeckGLMap(MapLibreMap):
     ) -> str:
         """Generate HTML template for DeckGL."""
         # Serialize map state for JavaScript
-        map_state_json = json.dumps(map_state, indent=2)
-
-        html_template = f"""<!DOCTYPE html>
-<html>
-<head>
-    <title>{title}</title>
-    <meta charset="utf-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <script src="https://unpkg.com/deck.gl@9.1.12/dist.min.js"></script>
-    <script src="https://unpkg.com/maplibre-gl@5.10.0/dist/maplibre-gl.js"></script>
-    <link href="https://unpkg.com/maplibre-gl@5.10.0/dist/maplibre-gl.css" rel="stylesheet">
-    <style>
-        body {{
-            margin: 0;
-            padding: 20px;
-            font-family: Arial, sans-serif;
-        }}
-        #map {{
-            width: {map_state['width']};
-            height: {map_state['height']};
-            border: 1px solid #ccc;
-        }}
-        h1 {{
-            margin-top: 0;
-            color: #333;
-        }}
-    </style>
-</head>
-<body>
-    <h1>{title}</h1>
-    <div id="map"></div>
-
-    <script>
-        // Map state from Python
-        const mapState = {map_state_json};
-
-        // Parse DeckGL layers from configuration
-        function parseDeckGLLayers(layerConfigs) {{
-            // Helper function to convert accessor expressions to functions
-            function parseAccessor(accessor) {{
-                if (typeof accessor === 'string' && accessor.startsWith('@@=')) {{
-                    const expression = accessor.substring(3); // Remove '@@=' prefix
-
-                    try {{
-                        // Handle arrow function expressions directly
-                        if (expression.includes('=>')) {{
-                            // This is already an arrow function, just evaluate it
-                            return eval(`(${{expression}})`);
-                        }}
-                        // Create a function from the expression
-                        // Handle different variable contexts (d = data item, f = feature, etc.)
-                        else if (expression.includes('f.geometry.coordinates')) {{
-                            return new Function('f', `return ${{expression}}`);
-                        }} else if (expression.includes('f.properties')) {{
-                            return new Function('f', `return ${{expression}}`);
-                        }} else if (expression.includes('d.features')) {{
-                            // For dataTransform functions
-                            return new Function('d', `return ${{expression}}`);
-                        }} else if (expression.includes('d.')) {{
-                            return new Function('d', `return ${{expression}}`);
-                        }} else {{
-                            // Default context
-                            return new Function('d', `return ${{expression}}`);
-                        }}
-                    }} catch (error) {{
-                        console.warn('Failed to parse accessor expression:', accessor, error);
-                        return accessor; // Return original if parsing fails
-                    }}
-                }}
-                return accessor;
-            }}
-
-            // Helper function to process layer properties and convert accessors
-            function processLayerProps(props) {{
-                const processed = {{ ...props }};
-
-                // List of properties that should be treated as accessors
-                const accessorProps = [
-                    'getSourcePosition', 'getTargetPosition', 'getPosition',
-                    'getRadius', 'getFillColor', 'getLineColor', 'getWidth',
-                    'getPointRadius', 'dataTransform'
-                ];
-
-                accessorProps.forEach(prop => {{
-                    if (prop in processed) {{
-                        processed[prop] = parseAccessor(processed[prop]);
-                    }}
-                }});
-
-                return processed;
-            }}
-
-            return layerConfigs.map(config => {{
-                const layerType = config["@@type"];
-                const layerProps = processLayerProps({{ ...config }});
-                delete layerProps["@@type"];
-
-                try {{
-                    switch (layerType) {{
-                        case "GeoJsonLayer":
-                            return new deck.GeoJsonLayer(layerProps);
-                        case "ArcLayer":
-                            return new deck.ArcLayer(layerProps);
-                        case "ScatterplotLayer":
-                            return new deck.ScatterplotLayer(layerProps);
-                        default:
-                            console.warn(`Unknown DeckGL layer type: ${{layerType}}`);
-                            return null;
-                    }}
-                }} catch (error) {{
-                    console.error(`Error creating ${{layerType}}:`, error, layerProps);
-                    return null;
-                }}
-            }}).filter(layer => layer !== null);
-        }}
-
-        // Initialize DeckGL with MapLibre
-        const deckgl = new deck.DeckGL({{
-            container: 'map',
-            mapStyle: mapState.style || 'https://basemaps.cartocdn.com/gl/positron-nolabels-gl-style/style.json',
-            initialViewState: {{
-                latitude: mapState.center[0],
-                longitude: mapState.center[1],
-                zoom: mapState.zoom || 2,
-                bearing: mapState.bearing || 0,
-                pitch: mapState.pitch || 0
-            }},
-            controller: true,
-            layers: parseDeckGLLayers(mapState.deckgl_layers || []),
-            onViewStateChange: ({{viewState}}) => {{
-                console.log('View state changed:', viewState);
-            }},
-            onClick: (info) => {{
-                if (info.object) {{
-                    console.log('Clicked object:', info.object);
-                    if (info.object.properties && info.object.properties.name) {{
-                        alert(`${{info.object.properties.name}} (${{info.object.properties.abbrev || 'N/A'}})`);
-                    }}
-                }}
-            }}
-        }});
-
-        // Add navigation controls styling
-        const mapContainer = document.getElementById('map');
-        mapContainer.style.position = 'relative';
-
-        console.log('DeckGL map initialized successfully');
-        console.log('Loaded layers:', mapState.deckgl_layers ? mapState.deckgl_layers.length : 0);
-    </script>
-</body>
-</html>"""
-
-        return html_template
+        map_state_json = utils.json_dumps(map_state, indent=True)
+
+        return utils.render_html_template(
+            "deckgl_template.html",
+            {
+                "title": title,
+                "width": map_state["width"],
+                "height": map_state["height"],
+                "map_state_json": map_state_json,
+            },
+        )
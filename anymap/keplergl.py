@@ -1,33 +1,12 @@
 """KeplerGL implementation of the map widget."""
 
-import pathlib
 import traitlets
 from typing import Dict, List, Any, Optional, Union
 import json
 
+from . import utils
 from .base import MapWidget
 
-# Load KeplerGL-specific js and css
-try:
-    with open(
-        pathlib.Path(__file__).parent / "static" / "keplergl_widget.js",
-        "r",
-        encoding="utf-8",
-    ) as f:
-        _esm_keplergl = f.read()
-except FileNotFoundError:
-    _esm_keplergl = "console.error('KeplerGL widget JS not found');"
-
-try:
-    with open(
-        pathlib.Path(__file__).parent / "static" / "keplergl_widget.css",
-        "r",
-        encoding="utf-8",
-    ) as f:
-        _css_keplergl = f.read()
-except FileNotFoundError:
-    _css_keplergl = "/* KeplerGL widget CSS not found */"
-
 
 class KeplerGLMap(MapWidget):
     """KeplerGL implementation of the map widget."""
@@ -39,8 +18,14 @@ class KeplerGLMap(MapWidget):
     _data = traitlets.Dict({}).tag(sync=True)
 
     # Define the JavaScript module path
-    _esm = _esm_keplergl
-    _css = _css_keplergl
+    _esm = utils.BundledAsset(
+        "static",
+        "keplergl_widget.js",
+        default="console.error('KeplerGL widget JS not found');",
+    )
+    _css = utils.BundledAsset(
+        "static", "keplergl_widget.css", default="/* KeplerGL widget CSS not found */"
+    )
 
     def __init__(
         self,
@@ -256,10 +241,10 @@ class KeplerGLMap(MapWidget):
     ) -> str:
         """Generate HTML template for KeplerGL."""
         # Serialize map state for JavaScript
-        map_state_json = json.dumps(map_state, indent=2)
+        map_state_json = utils.json_dumps(map_state, indent=True)
 
         # Get the current configuration
-        config_json = json.dumps(self.map_config, indent=2)
+        config_json = utils.json_dumps(self.map_config, indent=True)
 
         html_template = f"""<!DOCTYPE html>
 <html>
@@ -1,33 +1,12 @@
 """Leaflet implementation of the map widget."""
 
-import pathlib
 import traitlets
 from typing import Dict, List, Any, Optional, Union
 import json
 
+from . import utils
 from .base import MapWidget
 
-# Load Leaflet-specific js and css
-try:
-    with open(
-        pathlib.Path(__file__).parent / "static" / "leaflet_widget.js",
-        "r",
-        encoding="utf-8",
-    ) as f:
-        _esm_leaflet = f.read()
-except FileNotFoundError:
-    _esm_leaflet = "console.error('Leaflet widget JS not found');"
-
-try:
-    with open(
-        pathlib.Path(__file__).parent / "static" / "leaflet_widget.css",
-        "r",
-        encoding="utf-8",
-    ) as f:
-        _css_leaflet = f.read()
-except FileNotFoundError:
-    _css_leaflet = "/* Leaflet widget CSS not found */"
-
 
 class LeafletMap(MapWidget):
     """Leaflet implementation of the map widget."""
@@ -38,8 +17,14 @@ class LeafletMap(MapWidget):
     map_options = traitlets.Dict(default_value={}).tag(sync=True)
 
     # Define the JavaScript module path
-    _esm = _esm_leaflet
-    _css = _css_leaflet
+    _esm = utils.BundledAsset(
+        "static",
+        "leaflet_widget.js",
+        default="console.error('Leaflet widget JS not found');",
+    )
+    _css = utils.BundledAsset(
+        "static", "leaflet_widget.css", default="/* Leaflet widget CSS not found */"
+    )
 
     def __init__(
         self,
@@ -24,41 +24,30 @@ Example:
     >>> m
 """
 
-import pathlib
 import traitlets
 from typing import Dict, List, Any, Optional, Union
-import json
 
+from . import utils
 from .base import MapWidget
-from .basemaps import available_basemaps
-
-# Load Mapbox-specific js and css
-with open(
-    pathlib.Path(__file__).parent / "static" / "mapbox_widget.js", "r", encoding="utf-8"
-) as f:
-    _esm_mapbox = f.read()
-
-with open(
-    pathlib.Path(__file__).parent / "static" / "mapbox_widget.css",
-    "r",
-    encoding="utf-8",
-) as f:
-    _css_mapbox = f.read()
+from .basemaps import resolve_basemap
 
 
 class MapboxMap(MapWidget):
     """Mapbox GL JS implementation of the map widget."""
 
     # Mapbox-specific traits
-    style = traitlets.Unicode("mapbox://styles/mapbox/streets-v12").tag(sync=True)
+    style = traitlets.Union(
+        [traitlets.Unicode(), traitlets.Dict()],
+        default_value="mapbox://styles/mapbox/streets-v12",
+    ).tag(sync=True)
     bearing = traitlets.Float(0.0).tag(sync=True)
     pitch = traitlets.Float(0.0).tag(sync=True)
     antialias = traitlets.Bool(True).tag(sync=True)
     access_token = traitlets.Unicode("").tag(sync=True)
 
     # Define the JavaScript module path
-    _esm = _esm_mapbox
-    _css = _css_mapbox
+    _esm = utils.BundledAsset("static", "mapbox_widget.js")
+    _css = utils.BundledAsset("static", "mapbox_widget.css")
 
     def __init__(
         self,
@@ -129,10 +118,8 @@ class MapboxMap(MapWidget):
 
     def set_style(self, style: Union[str, Dict[str, Any]]) -> None:
         """Set the map style."""
-        if isinstance(style, str):
-            self.style = style
-        else:
-            self.call_js_method("setStyle", style)
+        # The front end applies the synced trait, whether it is a URL or a dict
+        self.style = style
 
     def set_bearing(self, bearing: float) -> None:
         """Set the map bearing (rotation)."""
@@ -142,6 +129,17 @@ class MapboxMap(MapWidget):
         """Set the map pitch (tilt)."""
         self.pitch = pitch
 
+    def _add_source_and_layer(
+        self,
+        source_id: str,
+        source_config: Dict[str, Any],
+        layer_config: Dict[str, Any],
+    ) -> None:
+        """Add a source and the layer that uses it in a single sync."""
+        with self.batch_update():
+            self.add_source(source_id, source_config)
+            self.add_layer(layer_config["id"], layer_config)
+
     def add_geojson_layer(
         self,
         layer_id: str,
@@ -152,16 +150,14 @@ class MapboxMap(MapWidget):
         """Add a GeoJSON layer to the map."""
         source_id = f"{layer_id}_source"
 
-        # Add source
-        self.add_source(source_id, {"type": "geojson", "data": geojson_data})
-
-        # Add layer
         layer_config = {"id": layer_id, "type": layer_type, "source": source_id}
 
         if paint:
             layer_config["paint"] = paint
 
-        self.add_layer(layer_id, layer_config)
+        self._add_source_and_layer(
+            source_id, {"type": "geojson", "data": geojson_data}, layer_config
+        )
 
     def add_marker(
         self,
@@ -192,12 +188,7 @@ class MapboxMap(MapWidget):
         """Add a raster layer to the map."""
         source_id = f"{layer_id}_source"
 
-        # Add raster source
-        self.add_source(
-            source_id, {"type": "raster", "tiles": [source_url], "tileSize": 256}
-        )
-
-        # Add raster layer
+        # Raster layer and its source
         layer_config = {"id": layer_id, "type": "raster", "source": source_id}
 
         if paint:
@@ -205,7 +196,11 @@ class MapboxMap(MapWidget):
         if layout:
             layer_config["layout"] = layout
 
-        self.add_layer(layer_id, layer_config)
+        self._add_source_and_layer(
+            source_id,
+            {"type": "raster", "tiles": [source_url], "tileSize": 256},
+            layer_config,
+        )
 
     def add_vector_layer(
         self,
@@ -219,10 +214,7 @@ class MapboxMap(MapWidget):
         """Add a vector tile layer to the map."""
         source_id = f"{layer_id}_source"
 
-        # Add vector source
-        self.add_source(source_id, {"type": "vector", "url": source_url})
-
-        # Add vector layer
+        # Vector layer and its source
         layer_config = {
             "id": layer_id,
             "type": layer_type,
@@ -235,7 +227,9 @@ class MapboxMap(MapWidget):
         if layout:
             layer_config["layout"] = layout
 
-        self.add_layer(layer_id, layer_config)
+        self._add_source_and_layer(
+            source_id, {"type": "vector", "url": source_url}, layer_config
+        )
 
     def add_image_layer(
         self,
@@ -247,18 +241,17 @@ class MapboxMap(MapWidget):
         """Add an image layer to the map."""
         source_id = f"{layer_id}_source"
 
-        # Add image source
-        self.add_source(
-            source_id, {"type": "image", "url": image_url, "coordinates": coordinates}
-        )
-
-        # Add raster layer for the image
+        # Raster layer for the image and its image source
         layer_config = {"id": layer_id, "type": "raster", "source": source_id}
 
         if paint:
             layer_config["paint"] = paint
 
-        self.add_layer(layer_id, layer_config)
+        self._add_source_and_layer(
+            source_id,
+            {"type": "image", "url": image_url, "coordinates": coordinates},
+            layer_config,
+        )
 
     def add_control(
         self,
@@ -335,19 +328,8 @@ class MapboxMap(MapWidget):
             basemap: Name of the basemap from xyzservices (e.g., "Esri.WorldImagery")
             layer_id: ID for the basemap layer (default: "basemap")
         """
-        if basemap not in available_basemaps:
-            available_names = list(available_basemaps.keys())
-            raise ValueError(
-                f"Basemap '{basemap}' not found. Available basemaps: {available_names}"
-            )
-
-        basemap_config = available_basemaps[basemap]
-
-        # Convert xyzservices URL template to tile URL
-        tile_url = basemap_config.build_url()
-
-        # Get attribution if available
-        attribution = basemap_config.get("attribution", "")
+        # Tile URL of the xyzservices provider, cached across maps
+        tile_url, _ = resolve_basemap(basemap)
 
         # Add as raster layer
         self.add_tile_layer(
@@ -358,108 +340,20 @@ class MapboxMap(MapWidget):
         self, map_state: Dict[str, Any], title: str, **kwargs
     ) -> str:
         """Generate HTML template for Mapbox GL JS."""
-        # Serialize map state for JavaScript
-        map_state_json = json.dumps(map_state, indent=2)
-
-        html_template = f"""<!DOCTYPE html>
-<html>
-<head>
-    <title>{title}</title>
-    <meta charset="utf-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <script src="https://api.mapbox.com/mapbox-gl-js/v3.13.0/mapbox-gl.js"></script>
-    <link href="https://api.mapbox.com/mapbox-gl-js/v3.13.0/mapbox-gl.css" rel="stylesheet">
-    <style>
-        body {{
-            margin: 0;
-            padding: 20px;
-            font-family: Arial, sans-serif;
-        }}
-        #map {{
-            width: {map_state['width']};
-            height: {map_state['height']};
-            border: 1px solid #ccc;
-        }}
-        h1 {{
-            margin-top: 0;
-            color: #333;
-        }}
-        .access-token-warning {{
-            background-color: #fff3cd;
-            border: 1px solid #ffeaa7;
-            color: #856404;
-            padding: 10px;
-            margin-bottom: 20px;
-            border-radius: 4px;
-        }}
-    </style>
-</head>
-<body>
-    <h1>{title}</h1>
-    {"<div class='access-token-warning'>Warning: This map requires a Mapbox access token. Please add your token to the mapboxgl.accessToken property.</div>" if not map_state.get('access_token') else ""}
-    <div id="map"></div>
-
-    <script>
-        // Map state from Python
-        const mapState = {map_state_json};
-
-        // Set Mapbox access token
-        mapboxgl.accessToken = mapState.access_token || '';
-
-        // Initialize Mapbox map
-        const map = new mapboxgl.Map({{
-            container: 'map',
-            style: mapState.style || 'mapbox://styles/mapbox/streets-v12',
-            center: [mapState.center[1], mapState.center[0]], // Convert [lat, lng] to [lng, lat]
-            zoom: mapState.zoom || 2,
-            bearing: mapState.bearing || 0,
-            pitch: mapState.pitch || 0,
-            antialias: mapState.antialias !== undefined ? mapState.antialias : true
-        }});
-
-        // Restore layers and sources after map loads
-        map.on('load', function() {{
-            // Add sources first
-            const sources = mapState._sources || {{}};
-            Object.entries(sources).forEach(([sourceId, sourceConfig]) => {{
-                try {{
-                    map.addSource(sourceId, sourceConfig);
-                }} catch (error) {{
-                    console.warn(`Failed to add source ${{sourceId}}:`, error);
-                }}
-            }});
-
-            // Then add layers
-            const layers = mapState._layers || {{}};
-            Object.entries(layers).forEach(([layerId, layerConfig]) => {{
-                try {{
-                    map.addLayer(layerConfig);
-                }} catch (error) {{
-                    console.warn(`Failed to add layer ${{layerId}}:`, error);
-                }}
-            }});
-        }});
-
-        // Add navigation controls
-        map.addControl(new mapboxgl.NavigationControl());
-
-        // Add scale control
-        map.addControl(new mapboxgl.ScaleControl());
-
-        // Log map events for debugging
-        map.on('click', function(e) {{
-            console.log('Map clicked at:', e.lngLat);
-        }});
-
-        map.on('load', function() {{
-            console.log('Map loaded successfully');
-        }});
-
-        map.on('error', function(e) {{
-            console.error('Map error:', e);
-        }});
-    </script>
-</body>
-</html>"""
-
-        return html_template
+        access_token_warning = ""
+        if not map_state.get("access_token"):
+            access_token_warning = (
+                "<div class='access-token-warning'>Warning: This map requires a "
+                "Mapbox access token. Please add your token to the "
+                "mapboxgl.accessToken property.</div>"
+            )
+
+        values = {
+            "title": str(title),
+            "width": str(map_state["width"]),
+            "height": str(map_state["height"]),
+            "access_token_warning": access_token_warning,
+            # Serialize map state for JavaScript
+            "map_state_json": utils.json_dumps(map_state, indent=True),
+        }
+        return utils.render_html_template("mapbox_template.html", values)
@@ -16,43 +16,161 @@ Example:
     >>> m
 """
 
-import json
+import asyncio
+import functools
+import hashlib
+import importlib.util
+import math
 import os
-import pathlib
-import requests
 import sys
 import uuid
-from typing import Any, Dict, List, Optional, Sequence, Tuple, Union, Callable
+from contextlib import contextmanager
+from types import MappingProxyType
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TYPE_CHECKING,
+    Union,
+)
 
 import ipywidgets as widgets
 import traitlets
 from IPython.display import display
 
 from .base import MapWidget
+from .basemaps import available_basemaps, resolve_basemap
+from . import utils
 
-try:
+# geopandas and the ipyvuetify-based widgets are slow to import, so they are
+# imported by the methods that need them
+HAS_GEOPANDAS = importlib.util.find_spec("geopandas") is not None
+if TYPE_CHECKING:
     import geopandas as gpd
 
-    HAS_GEOPANDAS = True
-except ImportError:
-    HAS_GEOPANDAS = False
-from .maplibre_widgets import Container, LayerManagerWidget
-from . import utils
 
-# Load MapLibre-specific js and css
-with open(
-    pathlib.Path(__file__).parent / "static" / "maplibre_widget.js",
-    "r",
-    encoding="utf-8",
-) as f:
-    _esm_maplibre = f.read()
+@functools.lru_cache(maxsize=32)
+def _fetch_style(url: str) -> Dict[str, Any]:
+    """Fetch and parse a style JSON document, memoized by URL.
+
+    Failed requests raise an error and are therefore not memoized.
+    Callers must not mutate the returned dictionary; copy it first.
+    """
+    response = utils.get_http_session().get(url, timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+
+@functools.lru_cache(maxsize=64)
+def _control_key(control_type: str, position: str) -> str:
+    """Return the canonical, interned ``_controls`` key for a control."""
+    return sys.intern(f"{control_type}_{position}")
+
+
+def _coalesce_geojson_sources(
+    sources: Dict[str, Dict[str, Any]],
+    layers: Dict[str, Dict[str, Any]],
+    exclude: Iterable[str] = (),
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """Merge inline GeoJSON sources that share the same source options.
+
+    Each source costs MapLibre its own GeoJSON-to-tiles worker pass, so
+    sources that only differ by their data are combined into the first one of
+    their group. Features are tagged with a ``__src`` property holding their
+    original source ID, and the dependent layers are filtered on it. Clustered
+    sources and sources used by layers that have their own filter are left
+    unchanged.
+
+    Args:
+        sources: Source configs by source ID.
+        layers: Layer configs by layer ID.
+        exclude: Source IDs that must not be merged.
+
+    Returns:
+        The new source and layer configs. The inputs are not modified.
+    """
+    users: Dict[str, List[str]] = {}
+    for layer_id, layer in layers.items():
+        source_id = layer.get("source")
+        if isinstance(source_id, str):
+            users.setdefault(source_id, []).append(layer_id)
+
+    excluded = frozenset(exclude)
+    groups: Dict[str, List[str]] = {}
+    for source_id, config in sources.items():
+        data = config.get("data")
+        if (
+            source_id in excluded
+            or source_id not in users
+            or config.get("type") != "geojson"
+            or config.get("cluster")
+            or not isinstance(data, dict)
+            or data.get("type") != "FeatureCollection"
+            or any("filter" in layers[layer_id] for layer_id in users[source_id])
+        ):
+            continue
+        key = repr(sorted((k, v) for k, v in config.items() if k != "data"))
+        groups.setdefault(key, []).append(source_id)
+
+    sources = dict(sources)
+    layers = dict(layers)
+    for source_ids in groups.values():
+        if len(source_ids) < 2:
+            continue
+        merged_id = source_ids[0]
+        features = []
+        for source_id in source_ids:
+            for feature in sources[source_id]["data"].get("features") or []:
+                properties = {**(feature.get("properties") or {}), "__src": source_id}
+                features.append({**feature, "properties": properties})
+            if source_id != merged_id:
+                del sources[source_id]
+            for layer_id in users[source_id]:
+                layer = layers[layer_id]
+                layers[layer_id] = {
+                    **layer,
+                    "source": merged_id,
+                    "filter": ["==", ["get", "__src"], source_id],
+                    "metadata": {
+                        **(layer.get("metadata") or {}),
+                        "anymap:source": source_id,
+                    },
+                }
+        sources[merged_id] = {
+            **sources[merged_id],
+            "data": {"type": "FeatureCollection", "features": features},
+        }
 
-with open(
-    pathlib.Path(__file__).parent / "static" / "maplibre_widget.css",
-    "r",
-    encoding="utf-8",
-) as f:
-    _css_maplibre = f.read()
+    return sources, layers
+
+
+# Default PMTiles layers as (suffix/source-layer, layer type, paint) templates
+_PMTILES_BUILDINGS_LAYER = (
+    "buildings",
+    "fill",
+    MappingProxyType({"fill-color": "gray", "fill-opacity": 0.7}),
+)
+_PMTILES_DEFAULT_LAYERS = (
+    (
+        "landuse",
+        "fill",
+        MappingProxyType({"fill-color": "steelblue", "fill-opacity": 0.5}),
+    ),
+    ("roads", "line", MappingProxyType({"line-color": "black", "line-width": 1})),
+    _PMTILES_BUILDINGS_LAYER,
+    (
+        "water",
+        "fill",
+        MappingProxyType({"fill-color": "lightblue", "fill-opacity": 0.8}),
+    ),
+)
 
 
 class MapLibreMap(MapWidget):
@@ -95,6 +213,7 @@ class MapLibreMap(MapWidget):
     _terra_draw_data = traitlets.Dict().tag(sync=True)
     _terra_draw_enabled = traitlets.Bool(False).tag(sync=True)
     _layer_dict = traitlets.Dict().tag(sync=True)
+    _geoarrow_data = traitlets.Dict().tag(sync=True)
     clicked = traitlets.Dict().tag(sync=True)
     _deckgl_layers = traitlets.Dict().tag(sync=True)
     flatgeobuf_layers = traitlets.Dict({}).tag(sync=True)
@@ -104,8 +223,18 @@ class MapLibreMap(MapWidget):
     geoman_status = traitlets.Dict({}).tag(sync=True)
 
     # Define the JavaScript module path
-    _esm = _esm_maplibre
-    _css = _css_maplibre
+    _esm = utils.BundledAsset("static", "maplibre_widget.js")
+    _css = utils.BundledAsset("static", "maplibre_widget.css")
+
+    _DEFAULT_CONTROLS = MappingProxyType(
+        {
+            "navigation": "top-right",
+            "fullscreen": "top-right",
+            "scale": "bottom-left",
+            "globe": "top-right",
+            "layers": "top-right",
+        }
+    )
 
     def __init__(
         self,
@@ -116,13 +245,7 @@ class MapLibreMap(MapWidget):
         height: str = "680px",
         bearing: float = 0.0,
         pitch: float = 0.0,
-        controls: Dict[str, str] = {
-            "navigation": "top-right",
-            "fullscreen": "top-right",
-            "scale": "bottom-left",
-            "globe": "top-right",
-            "layers": "top-right",
-        },
+        controls: Optional[Dict[str, str]] = None,
         projection: str = "mercator",
         add_sidebar: bool = False,
         sidebar_visible: bool = False,
@@ -141,7 +264,8 @@ class MapLibreMap(MapWidget):
             height: Widget height as CSS string (e.g., "680px", "50vh").
             bearing: Map bearing (rotation) in degrees (0-360).
             pitch: Map pitch (tilt) in degrees (0-60).
-            controls: Dictionary of control names and their positions. Default is {
+            controls: Dictionary of control names and their positions. Default is
+                None, which adds `_DEFAULT_CONTROLS`: {
                 "navigation": "top-right",
                 "fullscreen": "top-right",
                 "scale": "bottom-left",
@@ -174,7 +298,6 @@ class MapLibreMap(MapWidget):
             **kwargs,
         )
 
-        self.layer_dict = {}
         self.layer_dict["Background"] = {
             "layer": {
                 "id": "Background",
@@ -186,8 +309,24 @@ class MapLibreMap(MapWidget):
             "color": None,
         }
 
-        # Initialize the _layer_dict trait with the layer_dict content
-        self._layer_dict = dict(self.layer_dict)
+        # Notify the front end of the initial layer_dict content
+        self._sync_layer_dict()
+        self._layer_controls_dirty = False
+        self._layer_controls_scheduled = False
+        self._has_layer_control = False
+        # Callbacks waiting for draw data requested from the front end
+        self._draw_data_callbacks: List[Callable[[Dict[str, Any]], None]] = []
+        self._terra_draw_data_callbacks: List[Callable[[Dict[str, Any]], None]] = []
+        self._layer_manager_dirty = False
+        # Serialized JSON of each exported source config, reused by later
+        # HTML exports. It holds a copy of the JSON of every current source,
+        # so its size grows with the total source data; entries are dropped
+        # when their source is removed
+        self._source_json_cache: Dict[
+            str, Tuple[Dict[str, Any], Optional[int], str, bytes]
+        ] = {}
+        # URLs of the GeoJSON data served from the kernel, by source id
+        self._served_geojson: Dict[str, str] = {}
 
         # Initialize current state attributes
         self._current_center = center
@@ -200,9 +339,9 @@ class MapLibreMap(MapWidget):
         self.on_map_event("moveend", self._update_current_state)
 
         self._style = style
-        self.style_dict = {}
-        for layer in self.get_style_layers():
-            self.style_dict[layer["id"]] = layer
+        self._style_cache = None
+        self._style_layer_ids_sorted = None
+        self._style_dict_cache = None
         self.source_dict = {}
 
         if projection.lower() == "globe":
@@ -220,8 +359,17 @@ class MapLibreMap(MapWidget):
                 }
             )
 
+        if controls is None:
+            controls = self._DEFAULT_CONTROLS
+
         self.controls = {}
+        # Consecutive built-in controls are sent in one addControls call;
+        # the others are added in order in between to keep their placement
+        pending_controls: List[Tuple[str, str]] = []
         for control, position in controls.items():
+            if control in ("layers", "geoman", "export"):
+                self._add_controls(pending_controls)
+                pending_controls = []
             if control == "layers":
                 self.add_layer_control(position)
             elif control == "geoman":
@@ -231,8 +379,9 @@ class MapLibreMap(MapWidget):
                 self.add_export_control(position=position)
                 self.controls[control] = position
             else:
-                self.add_control(control, position)
+                pending_controls.append((control, position))
                 self.controls[control] = position
+        self._add_controls(pending_controls)
 
         if sidebar_args is None:
             sidebar_args = {}
@@ -271,18 +420,51 @@ class MapLibreMap(MapWidget):
         """
         Get the style of the map.
 
+        The parsed style is cached on the instance and only re-fetched after
+        the style is changed with `set_style`.
+
         Returns:
             Dict: The style of the map.
         """
+        if self._style_cache is not None:
+            return self._style_cache
         if isinstance(self._style, str):
-            response = requests.get(self._style, timeout=10)
-            style = response.json()
+            # Copy the shared cached document since style layers are edited in place
+            style = utils.copy_json(_fetch_style(self._style))
         elif isinstance(self._style, dict):
             style = self._style
         else:
             style = {}
+        self._style_cache = style
         return style
 
+    @property
+    def layer_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Layers added to the map keyed by layer ID.
+
+        This is the dictionary of the synced `_layer_dict` trait itself, not a
+        copy. After changing it in place, call `_sync_layer_dict` to notify
+        the front end.
+        """
+        return self._layer_dict
+
+    @layer_dict.setter
+    def layer_dict(self, value: Dict[str, Dict[str, Any]]) -> None:
+        self._layer_dict = dict(value)
+
+    @property
+    def style_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Layers of the current map style keyed by layer ID.
+
+        The dictionary is built from the style on first access rather than
+        when the map is created, and is reset by `set_style`.
+        """
+        if self._style_dict_cache is None:
+            self._style_dict_cache = {
+                layer["id"]: layer for layer in self.get_style_layers()
+            }
+        return self._style_dict_cache
+
     def get_style_layers(self, return_ids=False, sorted=True) -> List[str]:
         """
         Get the names of the basemap layers.
@@ -290,6 +472,8 @@ class MapLibreMap(MapWidget):
         Returns:
             List[str]: The names of the basemap layers.
         """
+        if return_ids and sorted and self._style_layer_ids_sorted is not None:
+            return list(self._style_layer_ids_sorted)
         style = self.get_style()
         if "layers" in style:
             layers = style["layers"]
@@ -297,6 +481,7 @@ class MapLibreMap(MapWidget):
                 ids = [layer["id"] for layer in layers]
                 if sorted:
                     ids.sort()
+                    self._style_layer_ids_sorted = tuple(ids)
 
                 return ids
             else:
@@ -365,6 +550,8 @@ class MapLibreMap(MapWidget):
         Returns:
             None
         """
+        from .maplibre_widgets import Container
+
         return Container(
             self,
             sidebar_visible=sidebar_visible,
@@ -398,6 +585,7 @@ class MapLibreMap(MapWidget):
         Returns:
             Container: The created container widget with the map and sidebar.
         """
+        from .maplibre_widgets import Container, LayerManagerWidget
 
         if sidebar_visible is None:
             sidebar_visible = self.sidebar_args.get("sidebar_visible", False)
@@ -988,6 +1176,8 @@ class MapLibreMap(MapWidget):
         if self.container is not None:
             container = self.container
         else:
+            from .maplibre_widgets import Container, LayerManagerWidget
+
             sidebar_visible = self.sidebar_args.get("sidebar_visible", False)
             min_width = self.sidebar_args.get("min_width", 360)
             max_width = self.sidebar_args.get("max_width", 360)
@@ -1024,6 +1214,8 @@ class MapLibreMap(MapWidget):
         **kwargs: Any,
     ) -> None:
         if self.layer_manager is None:
+            from .maplibre_widgets import LayerManagerWidget
+
             self.layer_manager = LayerManagerWidget(
                 self,
                 expanded=expanded,
@@ -1160,9 +1352,7 @@ class MapLibreMap(MapWidget):
             layer_config["metadata"] = metadata
 
         # Track the layer locally so the layer manager can interact with it.
-        current_layers = dict(self._layers)
-        current_layers[layer_id] = layer_config
-        self._layers = current_layers
+        self._set_trait_item("_layers", layer_id, layer_config)
 
         display_name = name or layer_id
         self.layer_dict[layer_id] = {
@@ -1415,13 +1605,15 @@ class MapLibreMap(MapWidget):
 
         control_key = f"widget_panel_{control_id}"
 
-        current_controls = dict(self._controls)
-        current_controls[control_key] = {
-            "type": "widget_panel",
-            "position": position,
-            "options": control_options,
-        }
-        self._controls = current_controls
+        self._set_trait_item(
+            "_controls",
+            control_key,
+            {
+                "type": "widget_panel",
+                "position": position,
+                "options": control_options,
+            },
+        )
 
         self._widget_control_widgets[control_id] = widget
         self.call_js_method("addControl", "widget_panel", control_options)
@@ -1433,9 +1625,8 @@ class MapLibreMap(MapWidget):
         if not control_id:
             raise ValueError("control_id is required")
 
-        current_controls = dict(self._controls)
         target_key = None
-        for key, config in current_controls.items():
+        for key, config in self._controls.items():
             if (
                 config.get("type") == "widget_panel"
                 and config.get("options", {}).get("control_id") == control_id
@@ -1444,8 +1635,7 @@ class MapLibreMap(MapWidget):
                 break
 
         if target_key:
-            current_controls.pop(target_key)
-            self._controls = current_controls
+            self._pop_trait_item("_controls", target_key)
 
         if control_id in self._widget_control_widgets:
             del self._widget_control_widgets[control_id]
@@ -1493,10 +1683,12 @@ class MapLibreMap(MapWidget):
         Args:
             style: Map style as URL string or style object dictionary.
         """
-        if isinstance(style, str):
-            self.style = style
-        else:
-            self.call_js_method("setStyle", style)
+        self._style = style
+        self._style_cache = None
+        self._style_layer_ids_sorted = None
+        self._style_dict_cache = None
+        # The front end applies the synced trait, whether it is a URL or a dict
+        self.style = style
 
     def set_bearing(self, bearing: float) -> None:
         """Set the map bearing (rotation).
@@ -1523,6 +1715,13 @@ class MapLibreMap(MapWidget):
             value: Value to set for the property.
         """
         self.call_js_method("setLayoutProperty", layer_id, name, value)
+        layer_info = self.layer_dict.get(layer_id)
+        if name == "visibility" and layer_info is not None:
+            # Keep layer_dict in sync, as set_visibility() relies on it
+            visible = value != "none"
+            if layer_info.get("visible") is not visible:
+                layer_info["visible"] = visible
+                self._update_layer_controls()
 
     def set_paint_property(self, layer_id: str, name: str, value: Any) -> None:
         """Set a paint property for a layer.
@@ -1533,10 +1732,108 @@ class MapLibreMap(MapWidget):
             value: Value to set for the property.
         """
         self.call_js_method("setPaintProperty", layer_id, name, value)
+        self._record_paint_opacity(layer_id, {name: value})
+
+    def set_paint_properties(self, layer_id: str, properties: Dict[str, Any]) -> None:
+        """Set several paint properties of a layer in one front end call.
+
+        Args:
+            layer_id: Unique identifier of the layer.
+            properties: Mapping of paint property names to their values.
+        """
+        self.call_js_method("setPaintProperties", layer_id, dict(properties))
+        self._record_paint_opacity(layer_id, properties)
+
+    def _record_paint_opacity(self, layer_id: str, properties: Dict[str, Any]) -> None:
+        """Record an opacity set through paint properties in layer_dict.
+
+        set_opacity() relies on the recorded opacity to skip redundant
+        updates, so an opacity that cannot be represented by a single number
+        (e.g. an expression, or only one of the opacities of a symbol layer)
+        is dropped and the next set_opacity() call is always sent.
+
+        Args:
+            layer_id: Unique identifier of the layer.
+            properties: Mapping of the paint property names set to their values.
+        """
+        layer_info = self.layer_dict.get(layer_id)
+        if layer_info is None or "layer" not in layer_info:
+            return
+        layer_type = layer_info["layer"].get("type")
+        if layer_type == "symbol":
+            names = ("icon-opacity", "text-opacity")
+        else:
+            names = (f"{layer_type}-opacity",)
+        values = [properties[name] for name in names if name in properties]
+        if not values:
+            return
+
+        opacity = values[0]
+        if (
+            len(values) == len(names)
+            and all(value == opacity for value in values)
+            and isinstance(opacity, (int, float))
+        ):
+            if layer_info.get("opacity") == opacity:
+                return
+            layer_info["opacity"] = opacity
+        elif layer_info.pop("opacity", None) is None:
+            return
+        self._update_layer_controls()
 
     def set_visibility(self, layer_id: str, visible: bool) -> None:
         """Set the visibility of a layer.
 
+        Nothing is sent to the front end if the layer already has the
+        requested visibility.
+
+        Args:
+            layer_id: Unique identifier of the layer.
+            visible: Whether the layer should be visible.
+        """
+        layer_info = self.layer_dict.get(layer_id)
+        if layer_info is not None and layer_info.get("visible") is bool(visible):
+            return
+        self._apply_visibility(layer_id, visible)
+
+    def set_visibility_bulk(self, layer_ids: Iterable[str], visible: bool) -> None:
+        """Set the visibility of several layers with a single update.
+
+        Layers that already have the requested visibility are skipped, and
+        the others are changed by one JavaScript call.
+
+        Args:
+            layer_ids: Unique identifiers of the layers.
+            visible: Whether the layers should be visible.
+        """
+        layer_dict = self.layer_dict
+        changed = []
+        for layer_id in layer_ids:
+            layer_info = layer_dict.get(layer_id)
+            if layer_info is None or layer_info.get("visible") is not bool(visible):
+                changed.append(layer_id)
+        if not changed:
+            return
+
+        with self.batch_update():
+            map_layer_ids = []
+            for layer_id in changed:
+                layer_info = layer_dict.get(layer_id)
+                if layer_id == "Background" or (
+                    layer_info is not None and layer_info.get("type") == "marker-group"
+                ):
+                    self._apply_visibility(layer_id, visible)
+                    continue
+                map_layer_ids.append(layer_id)
+                if layer_info is not None:
+                    layer_info["visible"] = visible
+            if map_layer_ids:
+                self.call_js_method("setLayersVisibility", map_layer_ids, visible)
+                self._update_layer_controls()
+
+    def _apply_visibility(self, layer_id: str, visible: bool) -> None:
+        """Send a layer visibility change and record it in layer_dict.
+
         Args:
             layer_id: Unique identifier of the layer.
             visible: Whether the layer should be visible.
@@ -1556,8 +1853,8 @@ class MapLibreMap(MapWidget):
             visibility = "none"
 
         if layer_id == "Background":
-            for layer in self.get_style_layers():
-                self.set_layout_property(layer["id"], "visibility", visibility)
+            # The front end applies this to every style layer of the basemap
+            self.call_js_method("setBackgroundVisibility", visible)
         else:
             self.set_layout_property(layer_id, "visibility", visibility)
         if layer_id in self.layer_dict:
@@ -1567,50 +1864,62 @@ class MapLibreMap(MapWidget):
     def set_opacity(self, layer_id: str, opacity: float) -> None:
         """Set the opacity of a layer.
 
+        Nothing is sent to the front end if the layer opacity already matches
+        within 1e-4, so that slider jitter does not produce redundant updates.
+
         Args:
             layer_id: Unique identifier of the layer.
             opacity: Opacity value between 0.0 (transparent) and 1.0 (opaque).
         """
-        # Check if this is a marker group
-        if layer_id in self.layer_dict:
-            layer_type = self.layer_dict[layer_id].get("type")
-            if layer_type == "marker-group":
-                self.layer_dict[layer_id]["opacity"] = opacity
-                self.call_js_method("setMarkerGroupOpacity", layer_id, opacity)
-                self._update_layer_controls()
+        layer_info = self.layer_dict.get(layer_id)
+        if layer_info is not None:
+            current = layer_info.get("opacity")
+            if current is not None and math.isclose(current, opacity, abs_tol=1e-4):
                 return
+        self._apply_opacity(layer_id, opacity)
 
-        layer_type = self.get_layer_type(layer_id)
+    def _apply_opacity(self, layer_id: str, opacity: float) -> None:
+        """Send a layer opacity change and record it in layer_dict.
 
+        Args:
+            layer_id: Unique identifier of the layer.
+            opacity: Opacity value between 0.0 (transparent) and 1.0 (opaque).
+        """
         if layer_id == "Background":
-            for layer in self.get_style_layers():
-                layer_type = layer.get("type")
-                if layer_type != "symbol":
-                    self.set_paint_property(
-                        layer["id"], f"{layer_type}-opacity", opacity
-                    )
-                else:
-                    self.set_paint_property(layer["id"], "icon-opacity", opacity)
-                    self.set_paint_property(layer["id"], "text-opacity", opacity)
+            # The front end applies this to every style layer of the basemap
+            self.call_js_method("setBackgroundOpacity", opacity)
+            if layer_id in self.layer_dict:
+                self.layer_dict[layer_id]["opacity"] = opacity
+                self._update_layer_controls()
             return
 
-        if layer_id in self.layer_dict:
-            layer_type = self.layer_dict[layer_id]["layer"]["type"]
-            prop_name = f"{layer_type}-opacity"
-            self.layer_dict[layer_id]["opacity"] = opacity
+        # Resolve the layer type once: user layers first, then style layers,
+        # so that the basemap style is only fetched for basemap layers
+        layer_info = self.layer_dict.get(layer_id)
+        if layer_info is not None:
+            # Check if this is a marker group
+            if layer_info.get("type") == "marker-group":
+                layer_info["opacity"] = opacity
+                self.call_js_method("setMarkerGroupOpacity", layer_id, opacity)
+                self._update_layer_controls()
+                return
+            layer_type = layer_info["layer"]["type"]
+            layer_info["opacity"] = opacity
             self._update_layer_controls()
-        elif layer_id in self.style_dict:
-            layer = self.style_dict[layer_id]
+        elif layer_id in self._layers:
+            layer_type = self._layers[layer_id].get("type")
+        else:
+            layer = self.style_dict.get(layer_id, {})
             layer_type = layer.get("type")
-            prop_name = f"{layer_type}-opacity"
             if "paint" in layer:
-                layer["paint"][prop_name] = opacity
+                layer["paint"][f"{layer_type}-opacity"] = opacity
 
         if layer_type != "symbol":
             self.set_paint_property(layer_id, f"{layer_type}-opacity", opacity)
         else:
-            self.set_paint_property(layer_id, "icon-opacity", opacity)
-            self.set_paint_property(layer_id, "text-opacity", opacity)
+            self.set_paint_properties(
+                layer_id, {"icon-opacity": opacity, "text-opacity": opacity}
+            )
 
     def set_projection(self, projection: Dict[str, Any]) -> None:
         """Set the map projection.
@@ -1666,10 +1975,37 @@ class MapLibreMap(MapWidget):
         Returns:
             Layer type string, or None if layer doesn't exist.
         """
-        if layer_id in self._layers:
-            return self._layers[layer_id]["type"]
-        else:
-            return None
+        layer = self._layers.get(layer_id)
+        return layer.get("type") if layer is not None else None
+
+    @contextmanager
+    def batch_update(self) -> Iterator["MapLibreMap"]:
+        """Collect map updates and send them to the front end at once.
+
+        In addition to queuing JavaScript method calls (see
+        `MapWidget.batch_update`), the layer control and layer manager
+        refresh is requested only once when the outermost block exits.
+
+        Example:
+            >>> with m.batch_update():
+            ...     for name, url in tile_urls.items():
+            ...         m.add_tile_layer(name, url)
+
+        Yields:
+            The map widget itself.
+        """
+        if self._batching:
+            yield self
+            return
+
+        self._layer_controls_dirty = False
+        try:
+            with super().batch_update():
+                yield self
+        finally:
+            if self._layer_controls_dirty:
+                self._layer_controls_dirty = False
+                self._update_layer_controls()
 
     def add_layer(
         self,
@@ -1691,6 +2027,39 @@ class MapLibreMap(MapWidget):
                       If None, layer is added on top.
         """
 
+        layer, layer_id = self._prepare_layer(
+            layer, before_id, layer_id, overwrite, **kwargs
+        )
+
+        with self.batch_update():
+            # Store layer in local state for persistence
+            self._set_trait_item("_layers", layer_id, layer)
+
+            # Call JavaScript method with before_id if provided
+            self.call_js_method("addLayer", layer, before_id)
+
+            self._register_layer(layer_id, layer, opacity, visible)
+
+    def _prepare_layer(
+        self,
+        layer: Dict[str, Any],
+        before_id: Optional[str] = None,
+        layer_id: Optional[str] = None,
+        overwrite: bool = False,
+        **kwargs: Any,
+    ) -> Tuple[Dict[str, Any], str]:
+        """Normalize a layer definition and resolve its layer ID.
+
+        Args:
+            layer: Layer configuration dictionary.
+            before_id: Optional layer ID the layer will be inserted before.
+            layer_id: Optional layer ID. Defaults to a unique name derived
+                from the layer's 'id'.
+            overwrite: Whether an existing layer ID may be reused.
+
+        Returns:
+            The normalized layer configuration and the layer ID.
+        """
         if isinstance(layer, dict):
             if "minzoom" in layer:
                 layer["min-zoom"] = layer.pop("minzoom")
@@ -1698,15 +2067,22 @@ class MapLibreMap(MapWidget):
                 layer["max-zoom"] = layer.pop("maxzoom")
             # MapLibre expects hyphenated keys like 'source-layer', 'text-field', etc.
             # Convert any underscore_keys to hyphen-keys recursively for JS compatibility.
-            layer = utils.replace_underscores_in_keys(layer)
+            # An inline source is passed on by reference: its data is neither
+            # copied nor has its (e.g. feature property) keys renamed.
+            source = layer.get("source")
+            if isinstance(source, dict):
+                layer = utils.replace_underscores_in_keys(
+                    {key: value for key, value in layer.items() if key != "source"}
+                )
+                layer["source"] = source
+            else:
+                layer = utils.replace_underscores_in_keys(layer)
 
         if "name" in kwargs and layer_id is None:
             layer_id = kwargs.pop("name")
 
         if layer_id is None:
-            layer_id = utils.get_unique_name(
-                layer["id"], list(self._layers.keys()), overwrite
-            )
+            layer_id = utils.get_unique_name(layer["id"], self._layers, overwrite)
 
         # Store before_id in layer metadata for restoration when displaying in multiple cells
         if before_id is not None:
@@ -1714,16 +2090,25 @@ class MapLibreMap(MapWidget):
                 layer["metadata"] = {}
             layer["metadata"]["beforeId"] = before_id
 
-        # Store layer in local state for persistence
-        current_layers = dict(self._layers)
-        current_layers[layer_id] = layer
-        self._layers = current_layers
+        return layer, layer_id
 
-        # Call JavaScript method with before_id if provided
-        self.call_js_method("addLayer", layer, before_id)
+    def _register_layer(
+        self,
+        layer_id: str,
+        layer: Dict[str, Any],
+        opacity: Optional[float] = 1.0,
+        visible: Optional[bool] = True,
+    ) -> None:
+        """Track an added layer and apply its initial visibility and opacity.
 
-        self.set_visibility(layer_id, visible)
-        self.set_opacity(layer_id, opacity)
+        Args:
+            layer_id: Unique identifier for the layer.
+            layer: Layer configuration dictionary.
+            opacity: Initial opacity of the layer.
+            visible: Initial visibility of the layer.
+        """
+        # Register the layer first so that set_opacity resolves its type
+        # without building the lazy style_dict
         self.layer_dict[layer_id] = {
             "layer": layer,
             "opacity": opacity,
@@ -1731,15 +2116,78 @@ class MapLibreMap(MapWidget):
             "type": layer["type"],
             # "color": color,
         }
+        # Visible and fully opaque are the MapLibre defaults, so only send
+        # updates that change what the layer definition would render
+        paint = layer.get("paint") or {}
+        layout = layer.get("layout") or {}
+        if not visible or layout.get("visibility") == "none":
+            self._apply_visibility(layer_id, visible)
+        if opacity != 1.0 or any(key.endswith("-opacity") for key in paint):
+            self._apply_opacity(layer_id, opacity)
+
+        # Update layer controls and the layer manager if they exist; this also
+        # syncs the _layer_dict trait, once per batch or event loop tick
+        self._update_layer_controls(refresh_layer_manager=True)
+
+    def _add_layers(
+        self,
+        layers: Sequence[Dict[str, Any]],
+        before_id: Optional[str] = None,
+        opacity: Optional[float] = 1.0,
+        visible: Optional[bool] = True,
+    ) -> None:
+        """Add several layers with a single JavaScript call.
 
-        # Update the _layer_dict trait to trigger JavaScript sync
-        self._layer_dict = dict(self.layer_dict)
+        Args:
+            layers: Layer configuration dictionaries, each with an 'id'.
+            before_id: Optional layer ID to insert the layers before.
+            opacity: Initial opacity of the layers.
+            visible: Initial visibility of the layers.
+        """
+        prepared = [
+            self._prepare_layer(layer, before_id, layer["id"]) for layer in layers
+        ]
 
-        if self.layer_manager is not None:
-            self.layer_manager.refresh()
+        with self.batch_update():
+            for layer, layer_id in prepared:
+                self._set_trait_item("_layers", layer_id, layer)
+            self.call_js_method(
+                "addLayers", [layer for layer, _ in prepared], before_id
+            )
+            for layer, layer_id in prepared:
+                self._register_layer(layer_id, layer, opacity, visible)
 
-        # Update layer controls if they exist
-        self._update_layer_controls()
+    def _add_source_and_layer(
+        self,
+        source_id: str,
+        source_config: Dict[str, Any],
+        layer: Dict[str, Any],
+        before_id: Optional[str] = None,
+        layer_id: Optional[str] = None,
+        opacity: Optional[float] = 1.0,
+        visible: Optional[bool] = True,
+    ) -> None:
+        """Add a source and a layer that uses it with a single JavaScript call.
+
+        Args:
+            source_id: Unique identifier for the data source.
+            source_config: Dictionary containing source configuration.
+            layer: Layer configuration dictionary.
+            before_id: Optional layer ID to insert this layer before.
+            layer_id: Optional unique identifier for the layer.
+            opacity: Initial opacity of the layer.
+            visible: Initial visibility of the layer.
+        """
+        layer, layer_id = self._prepare_layer(layer, before_id, layer_id)
+
+        with self.batch_update():
+            self.source_dict[source_id] = source_config
+            self._set_trait_item("_sources", source_id, source_config)
+            self._set_trait_item("_layers", layer_id, layer)
+            self.call_js_method(
+                "addSourceAndLayer", source_id, source_config, layer, before_id
+            )
+            self._register_layer(layer_id, layer, opacity, visible)
 
     def add_source(self, source_id: str, source_config: Dict[str, Any]) -> None:
         """Add a data source to the map.
@@ -1772,24 +2220,93 @@ class MapLibreMap(MapWidget):
     def add_geojson_layer(
         self,
         layer_id: str,
-        geojson_data: Dict[str, Any],
+        geojson_data: Union[
+            Dict[str, Any], "gpd.GeoDataFrame", str, bytes, "os.PathLike[str]"
+        ],
         layer_type: str = "fill",
         paint: Optional[Dict[str, Any]] = None,
         before_id: Optional[str] = None,
+        serve_threshold: Optional[int] = None,
+        precision: Optional[int] = None,
+        simplify_tolerance: Optional[float] = None,
     ) -> None:
         """Add a GeoJSON layer to the map.
 
         Args:
             layer_id: Unique identifier for the layer.
-            geojson_data: GeoJSON data as a dictionary.
+            geojson_data: GeoJSON data as a dictionary, or a GeoDataFrame/GeoSeries.
+                An already serialized GeoJSON document can also be given as a
+                string, bytes or the path of a local file; it is passed to the
+                browser as is instead of being parsed and serialized again.
+                A string that is not a JSON object is used as the URL of the data.
             layer_type: Type of layer (e.g., 'fill', 'line', 'circle', 'symbol').
             paint: Optional paint properties for styling the layer.
             before_id: Optional layer ID to insert this layer before.
+            serve_threshold: Length in characters of the serialized GeoJSON
+                above which the data is served from a local HTTP server in the
+                kernel (see `utils.serve_geojson`) and the source only
+                references its URL, instead of sending the data through the
+                widget state. Note that maps exported to HTML can only show
+                such layers while the kernel is running, and that the browser
+                must be able to reach the kernel's server (on a remote
+                JupyterHub, install jupyter-server-proxy). Defaults to None,
+                which always sends the data through the widget state.
+            precision: If set, round coordinates to this many decimal places
+                before sending them to the browser. MapLibre renders in single
+                precision, so 6 (about 11 cm) loses no visible detail while
+                shrinking the payload considerably. Defaults to None.
+            simplify_tolerance: If set, simplify line and polygon geometries
+                with the Douglas-Peucker algorithm using this tolerance, in
+                the units of the data's coordinates (e.g., 1e-4 degrees, about
+                10 m). Requires shapely 2. Defaults to None.
+
+        Raises:
+            ValueError: If precision or simplify_tolerance is given for data
+                loaded from a URL, which the browser fetches as is.
         """
         source_id = f"{layer_id}_source"
 
-        # Add source
-        self.add_source(source_id, {"type": "geojson", "data": geojson_data})
+        raw = utils.read_geojson_text(geojson_data)
+        if raw is not None and (
+            precision is not None or simplify_tolerance is not None
+        ):
+            # Processing the coordinates needs the parsed document
+            geojson_data, raw = utils.json_loads(raw), None
+
+        if raw is not None:
+            geojson_data = raw
+        elif utils.is_geopandas_object(geojson_data):
+            geojson_data = utils.gdf_to_geojson(
+                geojson_data,
+                precision=precision,
+                simplify_tolerance=simplify_tolerance,
+            )
+        else:
+            if isinstance(geojson_data, str) and (
+                precision is not None or simplify_tolerance is not None
+            ):
+                raise ValueError(
+                    "precision and simplify_tolerance cannot be applied to "
+                    "GeoJSON loaded from a URL."
+                )
+            if simplify_tolerance is not None:
+                geojson_data = utils.simplify_geojson(geojson_data, simplify_tolerance)
+            if precision is not None:
+                geojson_data = utils.round_geojson_coordinates(geojson_data, precision)
+
+        # Release the data served for a previous source with the same id
+        utils.unserve_geojson(self._served_geojson.pop(source_id, None))
+
+        if serve_threshold is not None and (
+            raw is not None or isinstance(geojson_data, dict)
+        ):
+            # Serialize once; smaller documents are sent as the same text
+            raw = raw if raw is not None else utils.json_dumps(geojson_data)
+            if len(raw) > serve_threshold:
+                geojson_data, raw = utils.serve_geojson(raw), None
+                self._served_geojson[source_id] = geojson_data
+            else:
+                geojson_data = raw
 
         # Add layer
         layer_config = {"id": layer_id, "type": layer_type, "source": source_id}
@@ -1797,7 +2314,114 @@ class MapLibreMap(MapWidget):
         if paint:
             layer_config["paint"] = paint
 
-        self.add_layer(layer=layer_config, before_id=before_id, layer_id=layer_id)
+        source_config = {"type": "geojson", "data": geojson_data}
+        if raw is not None:
+            # The front end parses the JSON text before adding the source
+            source_config["_raw"] = True
+        self._add_source_and_layer(
+            source_id,
+            source_config,
+            layer_config,
+            before_id=before_id,
+            layer_id=layer_id,
+        )
+
+    def add_geoarrow_layer(
+        self,
+        layer_id: str,
+        data: "gpd.GeoDataFrame",
+        layer_type: Optional[str] = None,
+        paint: Optional[Dict[str, Any]] = None,
+        before_id: Optional[str] = None,
+    ) -> None:
+        """Add a GeoDataFrame layer transferred as a GeoArrow IPC buffer.
+
+        The data is serialized to an Arrow IPC stream with a GeoArrow geometry
+        column and sent to the browser as a binary buffer, which is much
+        smaller and faster to produce than a GeoJSON dictionary for large
+        datasets. The browser decodes it into a regular GeoJSON source.
+        GeoDataFrames that cannot be encoded as GeoArrow (e.g., mixed geometry
+        types) fall back to `add_geojson_layer`. Maps exported to HTML do not
+        include GeoArrow data.
+
+        Args:
+            layer_id: Unique identifier for the layer.
+            data: The GeoDataFrame to add.
+            layer_type: Type of layer (e.g., 'fill', 'line', 'circle'). If None,
+                it is inferred from the geometry type. Defaults to None.
+            paint: Optional paint properties for styling the layer.
+            before_id: Optional layer ID to insert this layer before.
+        """
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError(
+                "pyarrow is required for add_geoarrow_layer. "
+                "Please install it with: pip install pyarrow"
+            )
+
+        import geopandas as gpd
+
+        if isinstance(data, gpd.GeoSeries):
+            data = data.to_frame()
+        if data.crs is not None and not data.crs.equals("EPSG:4326"):
+            data = data.to_crs("EPSG:4326")
+
+        geom_types = set(data.geometry.geom_type.dropna())
+        if layer_type is None:
+            if geom_types <= {"Point", "MultiPoint"}:
+                layer_type = "circle"
+            elif geom_types <= {"LineString", "MultiLineString"}:
+                layer_type = "line"
+            else:
+                layer_type = "fill"
+
+        try:
+            table = pa.table(
+                data.to_arrow(geometry_encoding="geoarrow", interleaved=True)
+            )
+        except (ValueError, NotImplementedError, TypeError):
+            self.add_geojson_layer(
+                layer_id, data, layer_type=layer_type, paint=paint, before_id=before_id
+            )
+            return
+
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        buffer = sink.getvalue().to_pybytes()
+
+        source_id = f"{layer_id}_source"
+        layer_config = {"id": layer_id, "type": layer_type, "source": source_id}
+        if paint:
+            layer_config["paint"] = paint
+
+        with self.batch_update():
+            self._set_trait_item("_geoarrow_data", source_id, buffer)
+            self._add_source_and_layer(
+                source_id,
+                {
+                    "type": "geojson",
+                    "data": {"type": "FeatureCollection", "features": []},
+                },
+                layer_config,
+                before_id=before_id,
+                layer_id=layer_id,
+            )
+            self.call_js_method("loadGeoArrowData", source_id)
+
+    def remove_source(self, source_id: str) -> None:
+        """Remove a data source from the map.
+
+        Args:
+            source_id: Unique identifier of the source to remove.
+        """
+        super().remove_source(source_id)
+        self._pop_trait_item("_geoarrow_data", source_id)
+        # Release the JSON kept for HTML exports
+        self._source_json_cache.pop(source_id, None)
+        # Stop serving the data of a source added with `serve_threshold`
+        utils.unserve_geojson(self._served_geojson.pop(source_id, None))
 
     def add_marker(
         self,
@@ -1828,11 +2452,47 @@ class MapLibreMap(MapWidget):
             tooltip_max_width: Maximum width for tooltip (default: "240px").
                 Accepts CSS values like "300px", "20rem", or "none" for no limit.
         """
+        marker_data = self._marker_data(
+            lng,
+            lat,
+            popup=popup,
+            tooltip=tooltip,
+            options=options,
+            scale=scale,
+            popup_max_width=popup_max_width,
+            tooltip_max_width=tooltip_max_width,
+        )
+        self.call_js_method("addMarker", marker_data)
+
+    def add_markers(self, markers: List[Dict[str, Any]]) -> None:
+        """Add several markers to the map with a single front end call.
+
+        Args:
+            markers: Markers to add, each given as a dictionary of the
+                arguments of `add_marker`, e.g.
+                `{"lng": -122.4, "lat": 37.8, "popup": "<b>San Francisco</b>"}`.
+        """
+        marker_data = [self._marker_data(**marker) for marker in markers]
+        if marker_data:
+            self.call_js_method("addMarkers", marker_data)
+
+    @staticmethod
+    def _marker_data(
+        lng: float,
+        lat: float,
+        popup: Optional[str] = None,
+        tooltip: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+        scale: float = 1.0,
+        popup_max_width: str = "240px",
+        tooltip_max_width: str = "240px",
+    ) -> Dict[str, Any]:
+        """Build the front end configuration of a marker; see `add_marker`."""
         marker_options = dict(options) if options else {}
         if "scale" not in marker_options:
             marker_options["scale"] = scale
 
-        marker_data = {
+        return {
             "coordinates": [lng, lat],
             "popup": popup,
             "tooltip": tooltip,
@@ -1840,7 +2500,6 @@ class MapLibreMap(MapWidget):
             "popup_max_width": popup_max_width,
             "tooltip_max_width": tooltip_max_width,
         }
-        self.call_js_method("addMarker", marker_data)
 
     def add_marker_group(
         self,
@@ -1932,6 +2591,7 @@ class MapLibreMap(MapWidget):
         opacity: float = 1.0,
         before_id: Optional[str] = None,
         source_args: Optional[Dict] = None,
+        keep_properties: Optional[Union[List[str], str]] = None,
         **kwargs: Any,
     ) -> None:
         """Add a GeoJSON layer to the map.
@@ -1957,6 +2617,11 @@ class MapLibreMap(MapWidget):
                 should be inserted.
             source_args: Additional keyword arguments that are passed to the
                 GeoJSON source.
+            keep_properties: The feature properties to send to the browser,
+                dropping all others to make the data smaller. If "auto", only
+                the properties used by the paint, filter, layout and promoteId
+                options are kept. If None, all properties are kept, e.g. for
+                popups. Defaults to None.
             **kwargs: Additional keyword arguments that are passed to the layer.
         """
         import geopandas as gpd
@@ -1965,11 +2630,27 @@ class MapLibreMap(MapWidget):
         geom_type = None
         source_args = source_args or {}
 
+        if keep_properties == "auto":
+            keep_properties = utils.get_style_property_names(paint, filter, kwargs)
+            if isinstance(source_args.get("promoteId"), str):
+                keep_properties.add(source_args["promoteId"])
+        elif keep_properties is not None:
+            keep_properties = set(keep_properties)
+
         # Load data from file or URL if necessary
         if isinstance(data, str):
             if os.path.isfile(data) or data.startswith("http"):
                 gdf = gpd.read_file(data)
-                data = gdf.__geo_interface__
+                if keep_properties is not None:
+                    # Select the columns before the features are built
+                    gdf = gdf[
+                        [
+                            column
+                            for column in gdf.columns
+                            if column in keep_properties or column == gdf.geometry.name
+                        ]
+                    ]
+                data = utils.gdf_to_geojson(gdf)
                 if fit_bounds:
                     bounds = gdf.total_bounds  # [minx, miny, maxx, maxy]
             else:
@@ -1980,10 +2661,14 @@ class MapLibreMap(MapWidget):
             if fit_bounds:
                 gdf = gpd.GeoDataFrame.from_features(data)
                 bounds = gdf.total_bounds  # [minx, miny, maxx, maxy]
+            if keep_properties is not None:
+                data = utils.select_geojson_properties(data, keep_properties)
         elif not isinstance(data, dict):
             raise ValueError(
                 "The data must be a URL, file path, or GeoJSON dictionary."
             )
+        elif keep_properties is not None:
+            data = utils.select_geojson_properties(data, keep_properties)
 
         # Generate layer name if not provided
         if name is None:
@@ -2054,6 +2739,118 @@ class MapLibreMap(MapWidget):
             # Convert from [minx, miny, maxx, maxy] to [[west, south], [east, north]]
             self.fit_bounds([[bounds[0], bounds[1]], [bounds[2], bounds[3]]])
 
+    def add_points(
+        self,
+        data: Union[Dict[str, Any], "gpd.GeoDataFrame"],
+        name: str = "Points",
+        cluster: Optional[bool] = None,
+        cluster_radius: int = 40,
+        cluster_max_zoom: int = 14,
+        paint: Optional[Dict[str, Any]] = None,
+        fit_bounds: bool = True,
+        before_id: Optional[str] = None,
+    ) -> None:
+        """Add point data to the map, optionally clustered.
+
+        Clustering is done by MapLibre in its worker, which groups nearby
+        points per zoom level so that dense datasets draw a few cluster
+        circles instead of every point. Clusters are drawn as circles sized
+        and colored by their point count, with the count as a label.
+
+        Args:
+            data: A GeoJSON FeatureCollection of points, or a GeoDataFrame.
+            name: The name of the layer of unclustered points. The cluster
+                layers are named "{name}_clusters" and "{name}_cluster_count".
+                Defaults to "Points".
+            cluster: Whether to cluster the points. If None, points are
+                clustered when there are more than 10,000. Defaults to None.
+            cluster_radius: Radius of each cluster in pixels. Defaults to 40.
+            cluster_max_zoom: Maximum zoom level at which points are
+                clustered. Defaults to 14.
+            paint: Paint properties of the unclustered points. If None, blue
+                circles with a white outline are drawn. Defaults to None.
+            fit_bounds: Whether to fit the map to the points. Defaults to True.
+            before_id: Optional layer ID to insert the layers before.
+        """
+        if utils.is_geopandas_object(data):
+            data = utils.gdf_to_geojson(data)
+        if cluster is None:
+            cluster = len(data.get("features", [])) > 10000
+
+        source_id = f"{name}_source"
+        source_config = {"type": "geojson", "data": data}
+        if cluster:
+            source_config.update(
+                {
+                    "cluster": True,
+                    "clusterRadius": cluster_radius,
+                    "clusterMaxZoom": cluster_max_zoom,
+                }
+            )
+
+        point_layer = {
+            "id": name,
+            "type": "circle",
+            "source": source_id,
+            "paint": paint
+            or {
+                "circle-radius": 5,
+                "circle-color": "#3388ff",
+                "circle-stroke-color": "#ffffff",
+                "circle-stroke-width": 1,
+            },
+        }
+        layers = [point_layer]
+        if cluster:
+            point_layer["filter"] = ["!", ["has", "point_count"]]
+            layers = [
+                {
+                    "id": f"{name}_clusters",
+                    "type": "circle",
+                    "source": source_id,
+                    "filter": ["has", "point_count"],
+                    "paint": {
+                        "circle-color": [
+                            "step",
+                            ["get", "point_count"],
+                            "#51bbd6",
+                            100,
+                            "#f1f075",
+                            750,
+                            "#f28cb1",
+                        ],
+                        "circle-radius": [
+                            "step",
+                            ["get", "point_count"],
+                            20,
+                            100,
+                            30,
+                            750,
+                            40,
+                        ],
+                    },
+                },
+                {
+                    "id": f"{name}_cluster_count",
+                    "type": "symbol",
+                    "source": source_id,
+                    "filter": ["has", "point_count"],
+                    "layout": {
+                        "text-field": ["get", "point_count_abbreviated"],
+                        "text-size": 12,
+                    },
+                },
+                point_layer,
+            ]
+
+        with self.batch_update():
+            self.add_source(source_id, source_config)
+            self._add_layers(layers, before_id=before_id)
+            if fit_bounds and data.get("features"):
+                bounds = utils.geojson_bounds(data)
+                if bounds is not None:
+                    self.fit_bounds([[bounds[0], bounds[1]], [bounds[2], bounds[3]]])
+
     def add_vector(
         self,
         data: Union[str, "gpd.GeoDataFrame"],
@@ -2098,11 +2895,9 @@ class MapLibreMap(MapWidget):
         if not isinstance(data, gpd.GeoDataFrame):
             if isinstance(data, str) and data.endswith(".parquet"):
                 data = gpd.read_parquet(data)
-                data = data.__geo_interface__
             else:
-                data = gpd.read_file(data).__geo_interface__
-        else:
-            data = data.__geo_interface__
+                data = gpd.read_file(data)
+        data = utils.gdf_to_geojson(data)
 
         self.add_geojson(
             data,
@@ -2259,9 +3054,6 @@ class MapLibreMap(MapWidget):
         # Add any additional source options from kwargs
         source_config.update(kwargs)
 
-        # Add raster source
-        self.add_source(source_id, source_config)
-
         # Add raster layer
         layer_config = {"id": layer_id, "type": "raster", "source": source_id}
 
@@ -2276,8 +3068,10 @@ class MapLibreMap(MapWidget):
         if layout:
             layer_config["layout"] = layout
 
-        self.add_layer(
-            layer=layer_config,
+        self._add_source_and_layer(
+            source_id,
+            source_config,
+            layer_config,
             before_id=before_id,
             layer_id=layer_id,
             opacity=opacity,
@@ -2307,9 +3101,6 @@ class MapLibreMap(MapWidget):
         """
         source_id = f"{layer_id}_source"
 
-        # Add vector source
-        self.add_source(source_id, {"type": "vector", "url": source_url})
-
         # Add vector layer
         layer_config = {
             "id": layer_id,
@@ -2323,7 +3114,13 @@ class MapLibreMap(MapWidget):
         if layout:
             layer_config["layout"] = layout
 
-        self.add_layer(layer=layer_config, before_id=before_id, layer_id=layer_id)
+        self._add_source_and_layer(
+            source_id,
+            {"type": "vector", "url": source_url},
+            layer_config,
+            before_id=before_id,
+            layer_id=layer_id,
+        )
 
     def add_image_layer(
         self,
@@ -2345,18 +3142,19 @@ class MapLibreMap(MapWidget):
         """
         source_id = f"{layer_id}_source"
 
-        # Add image source
-        self.add_source(
-            source_id, {"type": "image", "url": image_url, "coordinates": coordinates}
-        )
-
         # Add raster layer for the image
         layer_config = {"id": layer_id, "type": "raster", "source": source_id}
 
         if paint:
             layer_config["paint"] = paint
 
-        self.add_layer(layer=layer_config, before_id=before_id, layer_id=layer_id)
+        self._add_source_and_layer(
+            source_id,
+            {"type": "image", "url": image_url, "coordinates": coordinates},
+            layer_config,
+            before_id=before_id,
+            layer_id=layer_id,
+        )
 
     def add_control(
         self,
@@ -2371,21 +3169,47 @@ class MapLibreMap(MapWidget):
             position: Position on map ('top-left', 'top-right', 'bottom-left', 'bottom-right')
             options: Additional options for the control
         """
-        control_options = options or {}
-        control_options["position"] = position
+        control_options = {**(options or {}), "position": position}
 
         # Store control in persistent state
-        control_key = f"{control_type}_{position}"
-        current_controls = dict(self._controls)
-        current_controls[control_key] = {
-            "type": control_type,
-            "position": position,
-            "options": control_options,
-        }
-        self._controls = current_controls
+        control_key = _control_key(control_type, position)
+        self._set_trait_item(
+            "_controls",
+            control_key,
+            {
+                "type": control_type,
+                "position": position,
+                "options": control_options,
+            },
+        )
 
         self.call_js_method("addControl", control_type, control_options)
 
+    def _add_controls(self, controls: Sequence[Tuple[str, str]]) -> None:
+        """Add several controls with default options in one JavaScript call.
+
+        Args:
+            controls: Sequence of (control_type, position) pairs.
+        """
+        if not controls:
+            return
+
+        control_defs = []
+        for control_type, position in controls:
+            control_options = {"position": position}
+            self._set_trait_item(
+                "_controls",
+                _control_key(control_type, position),
+                {
+                    "type": control_type,
+                    "position": position,
+                    "options": control_options,
+                },
+            )
+            control_defs.append([control_type, control_options])
+
+        self.call_js_method("addControls", control_defs)
+
     def add_html(
         self,
         html: str,
@@ -2408,11 +3232,9 @@ class MapLibreMap(MapWidget):
             control_id = f"html_{position}_{uuid.uuid4().hex[:6]}"
 
         # Check if control already exists and remove it first
-        current_controls = dict(self._controls)
         control_key = f"html_{control_id}"
-        if control_key in current_controls:
+        if control_key in self._controls:
             self.remove_html(control_id)
-            current_controls = dict(self._controls)
 
         control_options = dict(kwargs)
         control_options.update(
@@ -2425,12 +3247,15 @@ class MapLibreMap(MapWidget):
         )
 
         # Store control in persistent state
-        current_controls[control_key] = {
-            "type": "html",
-            "position": position,
-            "options": control_options,
-        }
-        self._controls = current_controls
+        self._set_trait_item(
+            "_controls",
+            control_key,
+            {
+                "type": "html",
+                "position": position,
+                "options": control_options,
+            },
+        )
 
         self.call_js_method("addControl", "html", control_options)
 
@@ -2449,12 +3274,11 @@ class MapLibreMap(MapWidget):
         """
         # Update persistent state
         control_key = f"html_{control_id}"
-        current_controls = dict(self._controls)
-        if control_key in current_controls:
-            current_controls[control_key]["options"]["html"] = html
-            if bg_color is not None:
-                current_controls[control_key]["options"]["bgColor"] = bg_color
-            self._controls = current_controls
+        if control_key in self._controls:
+            with self._mutate_controls() as controls:
+                controls[control_key]["options"]["html"] = html
+                if bg_color is not None:
+                    controls[control_key]["options"]["bgColor"] = bg_color
 
         self.call_js_method("updateHTML", control_key, html, bg_color)
 
@@ -2469,10 +3293,7 @@ class MapLibreMap(MapWidget):
         """
         # Remove from persistent state
         control_key = f"html_{control_id}"
-        current_controls = dict(self._controls)
-        if control_key in current_controls:
-            del current_controls[control_key]
-            self._controls = current_controls
+        self._pop_trait_item("_controls", control_key)
 
         self.call_js_method("removeHTML", control_key)
 
@@ -2488,11 +3309,13 @@ class MapLibreMap(MapWidget):
             position: Position where the control was added ('top-left', 'top-right', 'bottom-left', 'bottom-right')
         """
         # Remove control from persistent state
-        control_key = f"{control_type}_{position}"
-        current_controls = dict(self._controls)
-        if control_key in current_controls:
-            del current_controls[control_key]
-            self._controls = current_controls
+        control_key = _control_key(control_type, position)
+        self._pop_trait_item("_controls", control_key)
+        if control_type == "layer_control":
+            self._has_layer_control = any(
+                config.get("type") == "layer_control"
+                for config in self._controls.values()
+            )
 
         self.call_js_method("removeControl", control_type, position)
 
@@ -2515,48 +3338,29 @@ class MapLibreMap(MapWidget):
             layers: List of layer IDs to include. If None, includes all layers
             options: Additional options for the control
         """
-        control_options = options or {}
-        control_options.update(
-            {
-                "position": position,
-                "collapsed": collapsed,
-                "layers": layers,
-            }
-        )
+        control_options = {
+            **(options or {}),
+            "position": position,
+            "collapsed": collapsed,
+            "layers": layers,
+        }
 
         # Get current layer states for initialization
-        layer_states = {}
-        target_layers = layers if layers is not None else list(self.layer_dict.keys())
-
-        # Always include Background layer for controlling map style layers
-        if layers is None or "Background" in layers:
-            layer_states["Background"] = {
-                "visible": True,
-                "opacity": 1.0,
-                "name": "Background",
-            }
-
-        for layer_id in target_layers:
-            if layer_id in self.layer_dict and layer_id != "Background":
-                layer_info = self.layer_dict[layer_id]
-                layer_states[layer_id] = {
-                    "visible": layer_info.get("visible", True),
-                    "opacity": layer_info.get("opacity", 1.0),
-                    "name": layer_info.get("name", layer_id),
-                    "type": layer_info.get("type"),
-                }
-
-        control_options["layerStates"] = layer_states
+        control_options["layerStates"] = self._build_layer_states(layers)
 
         # Store control in persistent state
-        control_key = f"layer_control_{position}"
-        current_controls = dict(self._controls)
-        current_controls[control_key] = {
-            "type": "layer_control",
-            "position": position,
-            "options": control_options,
-        }
-        self._controls = current_controls
+        control_key = _control_key("layer_control", position)
+        self._set_trait_item(
+            "_controls",
+            control_key,
+            {
+                "type": "layer_control",
+                "position": position,
+                "options": control_options,
+            },
+        )
+
+        self._has_layer_control = True
 
         self.call_js_method("addControl", "layer_control", control_options)
 
@@ -2588,25 +3392,25 @@ class MapLibreMap(MapWidget):
                 "api_url": "https://nominatim.openstreetmap.org/search",
             }
 
-        control_options = options or {}
-        control_options.update(
+        control_options = {
+            **(options or {}),
+            "position": position,
+            "api_config": api_config,
+            "collapsed": collapsed,
+        }
+
+        # Store control in persistent state
+        control_key = _control_key("geocoder", position)
+        self._set_trait_item(
+            "_controls",
+            control_key,
             {
+                "type": "geocoder",
                 "position": position,
-                "api_config": api_config,
-                "collapsed": collapsed,
-            }
+                "options": control_options,
+            },
         )
 
-        # Store control in persistent state
-        control_key = f"geocoder_{position}"
-        current_controls = dict(self._controls)
-        current_controls[control_key] = {
-            "type": "geocoder",
-            "position": position,
-            "options": control_options,
-        }
-        self._controls = current_controls
-
         self.call_js_method("addControl", "geocoder", control_options)
 
     def add_maplibre_geocoder(
@@ -2670,24 +3474,21 @@ class MapLibreMap(MapWidget):
             )
             ```
         """
-        geocoder_config: Dict[str, Any] = options or {}
-
         # Build configuration
-        geocoder_config.update(
-            {
-                "position": position,
-                "maplibregl": True,  # Signal to use maplibregl
-                "placeholder": placeholder,
-                "limit": limit,
-                "marker": marker,
-                "showResultMarkers": show_result_markers,
-                "collapsed": collapsed,
-                "clearOnBlur": clear_on_blur,
-                "clearAndBlurOnEsc": clear_and_blur_on_esc,
-                "enableEventLogging": enable_event_logging,
-                "minLength": min_length,
-            }
-        )
+        geocoder_config: Dict[str, Any] = {
+            **(options or {}),
+            "position": position,
+            "maplibregl": True,  # Signal to use maplibregl
+            "placeholder": placeholder,
+            "limit": limit,
+            "marker": marker,
+            "showResultMarkers": show_result_markers,
+            "collapsed": collapsed,
+            "clearOnBlur": clear_on_blur,
+            "clearAndBlurOnEsc": clear_and_blur_on_esc,
+            "enableEventLogging": enable_event_logging,
+            "minLength": min_length,
+        }
 
         if api_key:
             geocoder_config["apiKey"] = api_key
@@ -2719,14 +3520,16 @@ class MapLibreMap(MapWidget):
             geocoder_config["types"] = types
 
         # Store control state
-        control_key = f"maplibre_geocoder_{position}"
-        current_controls = dict(self._controls)
-        current_controls[control_key] = {
-            "type": "maplibre_geocoder",
-            "position": position,
-            "options": geocoder_config,
-        }
-        self._controls = current_controls
+        control_key = _control_key("maplibre_geocoder", position)
+        self._set_trait_item(
+            "_controls",
+            control_key,
+            {
+                "type": "maplibre_geocoder",
+                "position": position,
+                "options": geocoder_config,
+            },
+        )
 
         self.call_js_method("addControl", "maplibre_geocoder", geocoder_config)
 
@@ -2815,14 +3618,16 @@ class MapLibreMap(MapWidget):
                 size.upper() for size in allowed_sizes if isinstance(size, str)
             ]
 
-        control_key = f"export_{position}"
-        current_controls = dict(self._controls)
-        current_controls[control_key] = {
-            "type": "export",
-            "position": position,
-            "options": control_options,
-        }
-        self._controls = current_controls
+        control_key = _control_key("export", position)
+        self._set_trait_item(
+            "_controls",
+            control_key,
+            {
+                "type": "export",
+                "position": position,
+                "options": control_options,
+            },
+        )
 
         self.call_js_method("addControl", "export", control_options)
 
@@ -2889,25 +3694,24 @@ class MapLibreMap(MapWidget):
         if label_style is not None:
             control_options["labelStyle"] = dict(label_style)
 
-        control_key = f"geogrid_{position}"
-        current_controls = dict(self._controls)
-        current_controls[control_key] = {
-            "type": "geogrid",
-            "position": position,
-            "options": control_options,
-        }
-        self._controls = current_controls
+        control_key = _control_key("geogrid", position)
+        self._set_trait_item(
+            "_controls",
+            control_key,
+            {
+                "type": "geogrid",
+                "position": position,
+                "options": control_options,
+            },
+        )
 
         self.call_js_method("addControl", "geogrid", control_options)
 
     def remove_geogrid_control(self, position: str = "top-left") -> None:
         """Remove the GeoGrid control from the map."""
 
-        control_key = f"geogrid_{position}"
-        current_controls = dict(self._controls)
-        if control_key in current_controls:
-            current_controls.pop(control_key)
-            self._controls = current_controls
+        control_key = _control_key("geogrid", position)
+        self._pop_trait_item("_controls", control_key)
         self.call_js_method("removeControl", "geogrid", position)
 
     def add_geoman_control(
@@ -2995,14 +3799,16 @@ class MapLibreMap(MapWidget):
             control_options["geoman_paint"] = dict(paint)
             control_options["geoman_paint_above"] = bool(paint_above_geoman)
 
-        control_key = f"geoman_{position}"
-        current_controls = dict(self._controls)
-        current_controls[control_key] = {
-            "type": "geoman",
-            "position": position,
-            "options": control_options,
-        }
-        self._controls = current_controls
+        control_key = _control_key("geoman", position)
+        self._set_trait_item(
+            "_controls",
+            control_key,
+            {
+                "type": "geoman",
+                "position": position,
+                "options": control_options,
+            },
+        )
         self.controls["geoman"] = position
 
         self.call_js_method("addControl", "geoman", control_options)
@@ -3025,11 +3831,8 @@ class MapLibreMap(MapWidget):
     def remove_geoman_control(self, position: str = "top-left") -> None:
         """Remove the Geoman control toolbar."""
 
-        control_key = f"geoman_{position}"
-        current_controls = dict(self._controls)
-        if control_key in current_controls:
-            current_controls.pop(control_key)
-            self._controls = current_controls
+        control_key = _control_key("geoman", position)
+        self._pop_trait_item("_controls", control_key)
         self.controls.pop("geoman", None)
         self.call_js_method("removeControl", "geoman", position)
 
@@ -3055,7 +3858,7 @@ class MapLibreMap(MapWidget):
 
         return self.geoman_data
 
-    def get_geoman_data_as_gdf(self, crs: str = "EPSG:4326") -> gpd.GeoDataFrame:
+    def get_geoman_data_as_gdf(self, crs: str = "EPSG:4326") -> "gpd.GeoDataFrame":
         """Return the current Geoman feature collection as a GeoDataFrame.
 
         Args:
@@ -3063,6 +3866,7 @@ class MapLibreMap(MapWidget):
         Returns:
             A GeoDataFrame containing the current Geoman feature collection.
         """
+        import geopandas as gpd
 
         return gpd.GeoDataFrame.from_features(self.geoman_data["features"], crs=crs)
 
@@ -3604,14 +4408,16 @@ class MapLibreMap(MapWidget):
             "measures_options": measures_config,
         }
 
-        control_key = f"measures_{position}"
-        current_controls = dict(self._controls)
-        current_controls[control_key] = {
-            "type": "measures",
-            "position": position,
-            "options": control_options,
-        }
-        self._controls = current_controls
+        control_key = _control_key("measures", position)
+        self._set_trait_item(
+            "_controls",
+            control_key,
+            {
+                "type": "measures",
+                "position": position,
+                "options": control_options,
+            },
+        )
         self.controls["measures"] = position
 
         self.call_js_method("addControl", "measures", control_options)
@@ -3619,11 +4425,8 @@ class MapLibreMap(MapWidget):
     def remove_measures_control(self, position: str = "top-left") -> None:
         """Remove the Measures control."""
 
-        control_key = f"measures_{position}"
-        current_controls = dict(self._controls)
-        if control_key in current_controls:
-            current_controls.pop(control_key)
-            self._controls = current_controls
+        control_key = _control_key("measures", position)
+        self._pop_trait_item("_controls", control_key)
         self.controls.pop("measures", None)
         self.call_js_method("removeControl", "measures", position)
 
@@ -3654,70 +4457,143 @@ class MapLibreMap(MapWidget):
                     "or set the GOOGLE_MAPS_API_KEY environment variable."
                 )
 
-        control_options = options or {}
-        control_options.update(
+        control_options = {
+            **(options or {}),
+            "position": position,
+            "api_key": api_key,
+        }
+
+        # Store control in persistent state
+        control_key = _control_key("google_streetview", position)
+        self._set_trait_item(
+            "_controls",
+            control_key,
             {
+                "type": "google_streetview",
                 "position": position,
-                "api_key": api_key,
-            }
+                "options": control_options,
+            },
         )
 
-        # Store control in persistent state
-        control_key = f"google_streetview_{position}"
-        current_controls = dict(self._controls)
-        current_controls[control_key] = {
-            "type": "google_streetview",
-            "position": position,
-            "options": control_options,
-        }
-        self._controls = current_controls
-
         self.call_js_method("addControl", "google_streetview", control_options)
 
-    def _update_layer_controls(self) -> None:
-        """Update all existing layer controls with the current layer state."""
-        # Find all layer controls in the _controls dictionary
-        for control_key, control_config in self._controls.items():
-            if control_config.get("type") == "layer_control":
-                # Update the layerStates in the control options
-                control_options = control_config.get("options", {})
-                layers_filter = control_options.get("layers")
-
-                # Get current layer states for this control
-                layer_states = {}
-                target_layers = (
-                    layers_filter
-                    if layers_filter is not None
-                    else list(self.layer_dict.keys())
-                )
+    def _update_layer_controls(self, refresh_layer_manager: bool = False) -> None:
+        """Schedule an update of all layer controls with the current layer state.
 
-                # Always include Background layer for controlling map style layers
-                if layers_filter is None or "Background" in layers_filter:
-                    layer_states["Background"] = {
-                        "visible": True,
-                        "opacity": 1.0,
-                        "name": "Background",
-                    }
+        The update runs once on the next iteration of the running event loop
+        (e.g. after the current notebook cell), or immediately when there is
+        none, so that adding many layers refreshes the controls only once.
 
-                for layer_id in target_layers:
-                    if layer_id in self.layer_dict and layer_id != "Background":
-                        layer_info = self.layer_dict[layer_id]
-                        layer_states[layer_id] = {
-                            "visible": layer_info.get("visible", True),
-                            "opacity": layer_info.get("opacity", 1.0),
-                            "name": layer_info.get("name", layer_id),
-                            "type": layer_info.get("type"),
-                        }
+        Args:
+            refresh_layer_manager: Whether to also rebuild the layer manager
+                widget in the sidebar.
+        """
+        self._layer_manager_dirty = self._layer_manager_dirty or refresh_layer_manager
+        # Inside batch_update() the refresh is scheduled when the block exits
+        if self._batching:
+            self._layer_controls_dirty = True
+            return
+        if self._layer_controls_scheduled:
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._flush_layer_controls()
+            return
+        self._layer_controls_scheduled = True
+        loop.call_soon(self._flush_layer_controls)
+
+    def _flush_layer_controls(self) -> None:
+        """Update all existing layer controls with the current layer state."""
+        self._layer_controls_scheduled = False
+
+        # Most maps have no layer control, so skip scanning the controls
+        if self._has_layer_control:
+            # Controls without a layer filter all show every layer, so they
+            # share one layer states dict that is built at most once
+            all_layer_states = None
+
+            # Find all layer controls in the _controls dictionary
+            for control_key, control_config in self._controls.items():
+                if control_config.get("type") == "layer_control":
+                    # Update the layerStates in the control options
+                    control_options = control_config.get("options", {})
+                    layers_filter = control_options.get("layers")
+
+                    # Get current layer states for this control
+                    if layers_filter is None:
+                        if all_layer_states is None:
+                            all_layer_states = self._build_layer_states()
+                        layer_states = all_layer_states
+                    else:
+                        layer_states = self._build_layer_states(layers_filter)
 
-                # Update the control options with new layer states
-                control_options["layerStates"] = layer_states
+                    # Update the control options with new layer states
+                    control_options["layerStates"] = layer_states
 
-                # Update the control configuration
-                control_config["options"] = control_options
+                    # Update the control configuration
+                    control_config["options"] = control_options
 
         # Trigger the JavaScript layer control to check for new layers
         # by updating the _layer_dict trait that the JS listens to
-        self._layer_dict = dict(self.layer_dict)
+        self._sync_layer_dict()
+
+        if self._layer_manager_dirty:
+            self._layer_manager_dirty = False
+            if self.layer_manager is not None:
+                self.layer_manager.refresh()
+
+    def _build_layer_states(
+        self, layers_filter: Optional[List[str]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Build the layer states shown by a layer control.
+
+        Args:
+            layers_filter: Layer IDs to include. If None, includes all layers.
+
+        Returns:
+            Dictionary mapping layer IDs to their visibility, opacity, name
+            and type.
+        """
+        layer_states = {}
+        layer_dict = self._layer_dict
+        layers_set = frozenset(layers_filter) if layers_filter is not None else None
+        target_layers = layers_filter if layers_filter is not None else layer_dict
+
+        # Always include Background layer for controlling map style layers
+        if layers_set is None or "Background" in layers_set:
+            layer_states["Background"] = {
+                "visible": True,
+                "opacity": 1.0,
+                "name": "Background",
+            }
+
+        for layer_id in target_layers:
+            if layer_id == "Background":
+                continue
+            layer_info = layer_dict.get(layer_id)
+            if layer_info is not None:
+                layer_states[layer_id] = {
+                    "visible": layer_info.get("visible", True),
+                    "opacity": layer_info.get("opacity", 1.0),
+                    "name": layer_info.get("name", layer_id),
+                    "type": layer_info.get("type"),
+                }
+
+        return layer_states
+
+    def _sync_layer_dict(self) -> None:
+        """Notify the front end that layer_dict was changed in place.
+
+        layer_dict is the trait's own dictionary, so no copy is made, and
+        the change is notified directly rather than through an assignment,
+        which would make traitlets deep-compare the old and new values at a
+        cost proportional to all layer definitions (including inline
+        GeoJSON).
+        """
+        layer_dict = self._layer_dict
+        self._notify_trait("_layer_dict", layer_dict, layer_dict)
 
     def remove_layer(self, layer_id: str) -> None:
         """Remove a layer from the map.
@@ -3738,10 +4614,7 @@ class MapLibreMap(MapWidget):
         self.call_js_method("removeLayer", layer_id)
 
         # Remove from local state
-        if layer_id in self._layers:
-            current_layers = dict(self._layers)
-            del current_layers[layer_id]
-            self._layers = current_layers
+        self._pop_trait_item("_layers", layer_id)
 
         # Remove FlatGeobuf metadata if present
         if layer_id in self.flatgeobuf_layers:
@@ -3931,15 +4804,6 @@ class MapLibreMap(MapWidget):
         # Add PMTiles source using pmtiles:// protocol
         pmtiles_source_url = f"pmtiles://{pmtiles_url}"
 
-        self.add_source(
-            source_id,
-            {
-                "type": "vector",
-                "url": pmtiles_source_url,
-                "attribution": "PMTiles",
-            },
-        )
-
         # Add default layers if none provided
         if layers is None:
             url_lower = pmtiles_url.lower()
@@ -3947,55 +4811,32 @@ class MapLibreMap(MapWidget):
             # - If this looks like an Overture Buildings dataset, add only the buildings layer.
             # - Otherwise, fall back to a simple protomaps-style set.
             if "buildings" in url_lower:
-                layers = [
-                    {
-                        "id": f"{layer_id}_buildings",
-                        "source": source_id,
-                        "source-layer": "buildings",
-                        "type": "fill",
-                        "paint": {"fill-color": "gray", "fill-opacity": 0.7},
-                    }
-                ]
+                templates = (_PMTILES_BUILDINGS_LAYER,)
             else:
-                layers = [
-                    {
-                        "id": f"{layer_id}_landuse",
-                        "source": source_id,
-                        "source-layer": "landuse",
-                        "type": "fill",
-                        "paint": {"fill-color": "steelblue", "fill-opacity": 0.5},
-                    },
-                    {
-                        "id": f"{layer_id}_roads",
-                        "source": source_id,
-                        "source-layer": "roads",
-                        "type": "line",
-                        "paint": {"line-color": "black", "line-width": 1},
-                    },
-                    {
-                        "id": f"{layer_id}_buildings",
-                        "source": source_id,
-                        "source-layer": "buildings",
-                        "type": "fill",
-                        "paint": {"fill-color": "gray", "fill-opacity": 0.7},
-                    },
-                    {
-                        "id": f"{layer_id}_water",
-                        "source": source_id,
-                        "source-layer": "water",
-                        "type": "fill",
-                        "paint": {"fill-color": "lightblue", "fill-opacity": 0.8},
-                    },
-                ]
+                templates = _PMTILES_DEFAULT_LAYERS
+            layers = [
+                {
+                    "id": f"{layer_id}_{source_layer}",
+                    "source": source_id,
+                    "source-layer": source_layer,
+                    "type": layer_type,
+                    "paint": dict(paint),
+                }
+                for source_layer, layer_type, paint in templates
+            ]
 
-        # Add all layers
-        for layer_config in layers:
-            self.add_layer(
-                layer=layer_config,
-                before_id=before_id,
-                layer_id=layer_config["id"],
-                opacity=opacity,
-                visible=visible,
+        with self.batch_update():
+            self.add_source(
+                source_id,
+                {
+                    "type": "vector",
+                    "url": pmtiles_source_url,
+                    "attribution": "PMTiles",
+                },
+            )
+            # Add all layers
+            self._add_layers(
+                layers, before_id=before_id, opacity=opacity, visible=visible
             )
 
     def add_basemap(
@@ -4004,6 +4845,7 @@ class MapLibreMap(MapWidget):
         layer_id: Optional[str] = None,
         before_id: Optional[str] = None,
         visible: Optional[bool] = True,
+        opacity: Optional[float] = 1.0,
         **kwargs: Any,
     ) -> None:
         """Add a basemap to the map using xyzservices providers.
@@ -4015,26 +4857,14 @@ class MapLibreMap(MapWidget):
             before_id: Optional layer ID to insert this layer before.
                       If None, layer is added on top.
             visible: Whether the layer should be visible initially.
+            opacity: Layer opacity between 0.0 and 1.0.
             **kwargs: Additional parameters passed to the basemap layer.
 
         Raises:
             ValueError: If the specified basemap is not available.
         """
-        from .basemaps import available_basemaps
-
-        if basemap not in available_basemaps:
-            available_names = list(available_basemaps.keys())
-            raise ValueError(
-                f"Basemap '{basemap}' not found. Available basemaps: {available_names}"
-            )
-
-        basemap_config = available_basemaps[basemap]
-
-        # Convert xyzservices URL template to tile URL
-        tile_url = basemap_config.build_url()
-
-        # Get attribution if available
-        attribution = basemap_config.get("attribution", "")
+        # Tile URL of the xyzservices provider, cached across maps
+        tile_url, _ = resolve_basemap(basemap)
         if layer_id is None:
             layer_id = basemap
 
@@ -4042,9 +4872,9 @@ class MapLibreMap(MapWidget):
         self.add_tile_layer(
             layer_id=layer_id,
             source_url=tile_url,
-            paint={"raster-opacity": 1.0},
             before_id=before_id,
             visible=visible,
+            opacity=opacity,
             **kwargs,
         )
 
@@ -4097,14 +4927,16 @@ class MapLibreMap(MapWidget):
         }
 
         # Store draw control configuration
-        current_controls = dict(self._controls)
-        draw_key = f"draw_{position}"
-        current_controls[draw_key] = {
-            "type": "draw",
-            "position": position,
-            "options": draw_options,
-        }
-        self._controls = current_controls
+        draw_key = _control_key("draw", position)
+        self._set_trait_item(
+            "_controls",
+            draw_key,
+            {
+                "type": "draw",
+                "position": position,
+                "options": draw_options,
+            },
+        )
 
         self.call_js_method("addDrawControl", draw_options)
 
@@ -4117,13 +4949,26 @@ class MapLibreMap(MapWidget):
             geojson_data: GeoJSON data as dictionary or JSON string
         """
         if isinstance(geojson_data, str):
-            geojson_data = json.loads(geojson_data)
+            geojson_data = utils.json_loads(geojson_data)
 
-        # Update the trait immediately to ensure consistency
-        self._draw_data = geojson_data
+        self._set_and_send("_draw_data", "loadDrawData", geojson_data)
 
-        # Send to JavaScript
-        self.call_js_method("loadDrawData", geojson_data)
+    def _set_and_send(
+        self, trait_name: str, js_method: str, payload: Dict[str, Any]
+    ) -> None:
+        """Set a synced data trait and have JavaScript load it from the trait.
+
+        The payload travels to the frontend once, as the trait value, instead
+        of a second time as an argument of the JavaScript call.
+
+        Args:
+            trait_name: Name of the synced trait holding the data.
+            js_method: JavaScript method that loads the data from the trait.
+            payload: The data to store and load.
+        """
+        with self.batch_update():
+            self.set_trait(trait_name, payload)
+            self.call_js_method(js_method)
 
     def add_draw_data(self, geojson_data: Union[Dict[str, Any], str]) -> None:
         """Add GeoJSON features to the existing draw control data.
@@ -4136,7 +4981,7 @@ class MapLibreMap(MapWidget):
                          FeatureCollection or a single Feature.
         """
         if isinstance(geojson_data, str):
-            geojson_data = json.loads(geojson_data)
+            geojson_data = utils.json_loads(geojson_data)
 
         # Normalize input to FeatureCollection if it's a single Feature
         if geojson_data.get("type") == "Feature":
@@ -4145,29 +4990,90 @@ class MapLibreMap(MapWidget):
         # Send to JavaScript - it will handle adding features and syncing back the data
         self.call_js_method("addDrawData", geojson_data)
 
-    def get_draw_data(self) -> Dict[str, Any]:
+    def get_draw_data(
+        self, callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
         """Get all drawn features as GeoJSON.
 
+        If no features have been synced from the browser yet, the front end is
+        asked for them. The kernel only receives the reply after this method
+        returns, so the features are available from a later call (e.g. in the
+        next cell), or through the callback.
+
+        Args:
+            callback: Optional function called with the FeatureCollection once
+                the front end has synced the features, or right away if they
+                are already available.
+
         Returns:
-            Dict containing GeoJSON FeatureCollection with drawn features
+            Dict containing GeoJSON FeatureCollection with drawn features,
+            empty if they have not been synced yet.
         """
-        # Try to get current data first
-        if self._draw_data:
-            return self._draw_data
+        return self._request_draw_data("_draw_data", "getDrawData", callback)
+
+    def _request_draw_data(
+        self,
+        name: str,
+        method: str,
+        callback: Optional[Callable[[Dict[str, Any]], None]],
+    ) -> Dict[str, Any]:
+        """Return synced draw data, or ask the front end to sync it.
 
-        # If no data in trait, call JavaScript to get fresh data
-        self.call_js_method("getDrawData")
-        # Give JavaScript time to execute and sync data
-        import time
+        Args:
+            name: Name of the trait holding the data.
+            method: JavaScript method that syncs the data back.
+            callback: Optional function called with the data once available.
 
-        time.sleep(0.2)
+        Returns:
+            The synced data, or an empty FeatureCollection.
+        """
+        data = getattr(self, name)
+        if data:
+            if callback is not None:
+                callback(data)
+            return data
 
-        # Return the synced data or empty FeatureCollection if nothing
-        return (
-            self._draw_data
-            if self._draw_data
-            else {"type": "FeatureCollection", "features": []}
-        )
+        if callback is not None:
+            getattr(self, f"{name}_callbacks").append(callback)
+        self.call_js_method(method)
+        return {"type": "FeatureCollection", "features": []}
+
+    @traitlets.observe("_js_events")
+    def _on_layer_state_events(self, change: Dict[str, Any]) -> None:
+        """Record visibility and opacity changes made in the layer control.
+
+        Keeping layer_dict current lets set_visibility and set_opacity skip
+        updates that would not change anything on the map.
+
+        Args:
+            change: Dictionary containing the change information from traitlets.
+        """
+        for event in change["new"]:
+            event_type = event.get("type")
+            if event_type == "layer_visibility_changed":
+                key, value = "visible", event.get("visible")
+            elif event_type == "layer_opacity_changed":
+                key, value = "opacity", event.get("opacity")
+            else:
+                continue
+            layer_info = self.layer_dict.get(event.get("layerId"))
+            if layer_info is not None and value is not None:
+                layer_info[key] = value
+
+    @traitlets.observe("_draw_data", "_terra_draw_data")
+    def _on_draw_data_synced(self, change: Dict[str, Any]) -> None:
+        """Call the callbacks of pending get_draw_data/get_terra_draw_data calls.
+
+        Args:
+            change: Dictionary containing the change information from traitlets.
+        """
+        callbacks = getattr(self, f"{change['name']}_callbacks", None)
+        if not callbacks:
+            return
+        pending = list(callbacks)
+        callbacks.clear()
+        for callback in pending:
+            callback(change["new"])
 
     @property
     def draw_data(self) -> Dict[str, Any]:
@@ -4228,6 +5134,8 @@ class MapLibreMap(MapWidget):
         if not draw_data or not draw_data.get("features"):
             raise ValueError("No drawn features to save")
 
+        import geopandas as gpd
+
         # Convert to GeoDataFrame
         gdf = gpd.GeoDataFrame.from_features(draw_data["features"])
 
@@ -4299,40 +5207,37 @@ class MapLibreMap(MapWidget):
         self._terra_draw_enabled = True
 
         # Store Terra Draw control configuration
-        current_controls = dict(self._controls)
-        terra_draw_key = f"terra_draw_{position}"
-        current_controls[terra_draw_key] = {
-            "type": "terra_draw",
-            "position": position,
-            "options": terra_draw_options,
-        }
-        self._controls = current_controls
+        terra_draw_key = _control_key("terra_draw", position)
+        self._set_trait_item(
+            "_controls",
+            terra_draw_key,
+            {
+                "type": "terra_draw",
+                "position": position,
+                "options": terra_draw_options,
+            },
+        )
 
         self.call_js_method("addTerraDrawControl", terra_draw_options)
 
-    def get_terra_draw_data(self) -> Dict[str, Any]:
+    def get_terra_draw_data(
+        self, callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
         """Get all Terra Draw features as GeoJSON.
 
-        Returns:
-            Dict containing GeoJSON FeatureCollection with drawn features
-        """
-        # Try to get current data first
-        if self._terra_draw_data:
-            return self._terra_draw_data
+        As with `get_draw_data`, features that have not been synced yet are
+        requested from the front end and arrive after this method returns.
 
-        # If no data in trait, call JavaScript to get fresh data
-        self.call_js_method("getTerraDrawData")
-        # Give JavaScript time to execute and sync data
-        import time
-
-        time.sleep(0.2)
+        Args:
+            callback: Optional function called with the FeatureCollection once
+                the front end has synced the features, or right away if they
+                are already available.
 
-        # Return the synced data or empty FeatureCollection if nothing
-        return (
-            self._terra_draw_data
-            if self._terra_draw_data
-            else {"type": "FeatureCollection", "features": []}
-        )
+        Returns:
+            Dict containing GeoJSON FeatureCollection with drawn features,
+            empty if they have not been synced yet.
+        """
+        return self._request_draw_data("_terra_draw_data", "getTerraDrawData", callback)
 
     def clear_terra_draw_data(self) -> None:
         """Clear all Terra Draw features from the draw control."""
@@ -4349,56 +5254,164 @@ class MapLibreMap(MapWidget):
             geojson_data: GeoJSON data as dictionary or JSON string
         """
         if isinstance(geojson_data, str):
-            geojson_data = json.loads(geojson_data)
-
-        # Update the trait immediately to ensure consistency
-        self._terra_draw_data = geojson_data
+            geojson_data = utils.json_loads(geojson_data)
 
-        # Send to JavaScript
-        self.call_js_method("loadTerraDrawData", geojson_data)
+        self._set_and_send("_terra_draw_data", "loadTerraDrawData", geojson_data)
 
     def _generate_html_template(
-        self, map_state: Dict[str, Any], title: Optional[str], **kwargs: Any
-    ) -> str:
+        self,
+        map_state: Dict[str, Any],
+        title: Optional[str],
+        precision: Optional[int] = None,
+        file: Optional[IO[str]] = None,
+        script_url: Optional[str] = None,
+        **kwargs: Any,
+    ) -> Optional[str]:
         """Generate HTML template for MapLibre GL JS.
 
         Args:
             map_state: Dictionary containing the current map state including
                       center, zoom, style, layers, and sources.
             title: Title for the HTML page. If None, no title is displayed.
+            precision: Number of decimal places to keep in the coordinates of
+                inline GeoJSON sources. If None, coordinates are not rounded.
+            file: Text file to stream the HTML to instead of returning it.
+            script_url: URL to load the map restore script from instead of
+                embedding it.
             **kwargs: Additional arguments for template customization.
 
         Returns:
-            Complete HTML string for a standalone MapLibre GL JS map.
+            Complete HTML string for a standalone MapLibre GL JS map, or None
+            if it was written to `file`.
+        """
+        values = {
+            # If None, use an empty string which will hide the h1 element
+            "title": str(title) if title else "",
+            "width": str(map_state["width"]),
+            "height": str(map_state["height"]),
+            # Serialize map state for JavaScript; the sources are embedded
+            # separately as a JSON block
+            "map_state_json": self._map_state_json(map_state),
+            "sources_json": self._sources_json_parts(
+                map_state.get("_sources", {}), precision
+            ),
+            "draw_styles_json": "null",
+        }
+        if script_url:
+            import html as html_module
+
+            values["export_script"] = (
+                f'<script src="{html_module.escape(script_url)}"></script>'
+            )
+        else:
+            values["export_script"] = (
+                f"<script>\n{utils.read_asset('static', 'maplibre_export.js')}</script>"
+            )
+        if any(
+            control.get("type") == "draw"
+            for control in map_state.get("_controls", {}).values()
+        ):
+            values["draw_styles_json"] = utils.read_asset(
+                "static", "maplibre_draw_styles.json"
+            )
+        return utils.render_html_template("maplibre_template.html", values, file)
+
+    def _map_state_json(self, map_state: Dict[str, Any]) -> str:
+        """Serialize the exported map state, without its sources.
+
+        Layers and controls are emitted as ordered arrays of `[id, config]`
+        pairs, which the page iterates without converting objects and which
+        keep their order even for numeric-looking IDs. The sources are
+        embedded separately by `_sources_json_parts`.
+
+        Args:
+            map_state: Dictionary containing the current map state.
+
+        Returns:
+            The map state as a JSON string.
         """
-        import os
+        state = {key: value for key, value in map_state.items() if key != "_sources"}
+        for key in ("_layers", "_controls"):
+            if key in state:
+                state[key] = list(state[key].items())
+        # Keep strings such as "</script>" from ending the page's script
+        return utils.json_dumps(state).replace("</", "<\\/")
 
-        # Get the directory of the current file
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        template_path = os.path.join(current_dir, "templates", "maplibre_template.html")
+    def _sources_json_parts(
+        self, sources: Dict[str, Dict[str, Any]], precision: Optional[int] = None
+    ) -> List[str]:
+        """Serialize exported sources as an array of `[id, config]` pairs.
 
-        # Read the template file
-        with open(template_path, "r", encoding="utf-8") as f:
-            template_content = f.read()
+        Source configs are replaced rather than mutated when a source is
+        updated, so the JSON of a config that is still the same object can be
+        reused across exports. A config that was replaced by an equal one is
+        recognized by a hash of its plain JSON, which is much cheaper to
+        produce than rounding its coordinates again.
 
-        # Normalize double braces used to escape Python str.format in template assets.
-        # We now do manual placeholder substitution, so convert '{{' -> '{' and '}}' -> '}'.
-        # This fixes invalid CSS/JS like 'body {{ ... }}' and '${{x}}' in the exported HTML.
-        template_content = template_content.replace("{{", "{").replace("}}", "}")
+        The cache keeps the JSON of every source that is still on the map,
+        so it takes about as much memory as the serialized source data. Only
+        the page itself is never assembled as a whole when streamed to a file.
 
-        # Serialize map state for JavaScript
-        map_state_json = json.dumps(map_state, indent=2)
+        "</" is written as "<\\/" so that the JSON can be embedded in a
+        script element.
 
-        # Replace placeholders with actual values using safe string replacement
-        # to avoid conflicts with single-brace usage throughout the template.
-        html_template = template_content
-        # Handle title - if None, use empty string which will hide the h1 element
-        html_template = html_template.replace("{title}", str(title) if title else "")
-        html_template = html_template.replace("{width}", str(map_state["width"]))
-        html_template = html_template.replace("{height}", str(map_state["height"]))
-        html_template = html_template.replace("{map_state_json}", map_state_json)
+        Args:
+            sources: Source configurations keyed by source ID.
+            precision: Number of decimal places to keep in the coordinates of
+                inline GeoJSON sources. If None, coordinates are not rounded.
 
-        return html_template
+        Returns:
+            JSON fragments that concatenate to the array, with each source in
+            its own fragment.
+        """
+        cache = self._source_json_cache
+        fragments = ["["]
+        for source_id, source_config in sources.items():
+            cached = cache.get(source_id)
+            if (
+                cached is None
+                or cached[0] is not source_config
+                or cached[1] != precision
+            ):
+                source_json = utils.json_dumps(source_config)
+                digest = hashlib.blake2b(
+                    source_json.encode("utf-8"), digest_size=16
+                ).digest()
+                if (
+                    cached is not None
+                    and cached[1] == precision
+                    and cached[3] == digest
+                ):
+                    # A new but equal config, e.g. the same GeoJSON added
+                    # again, so the rounded JSON is still valid
+                    source_json = cached[2]
+                else:
+                    data = source_config.get("data")
+                    if source_config.get("_raw"):
+                        # Embed the serialized GeoJSON text as the data itself
+                        config = {
+                            key: value
+                            for key, value in source_config.items()
+                            if key not in ("_raw", "data")
+                        }
+                        source_json = f'{utils.json_dumps(config)[:-1]},"data":{data}}}'
+                    elif precision is not None and isinstance(data, dict):
+                        data = utils.round_geojson_coordinates(data, precision)
+                        source_json = utils.json_dumps({**source_config, "data": data})
+                    source_json = source_json.replace("</", "<\\/")
+                cached = (source_config, precision, source_json, digest)
+                cache[source_id] = cached
+            if len(fragments) > 1:
+                fragments.append(",")
+            source_id_json = utils.json_dumps(source_id).replace("</", "<\\/")
+            fragments.append(f"[{source_id_json},")
+            fragments.append(cached[2])
+            fragments.append("]")
+        fragments.append("]")
+        # Drop entries of removed sources
+        for source_id in cache.keys() - sources.keys():
+            del cache[source_id]
+        return fragments
 
     def _update_current_state(self, event: Dict[str, Any]) -> None:
         """Update current state attributes from moveend event."""
@@ -4541,8 +5554,6 @@ class MapLibreMap(MapWidget):
             ...     initial_basemap="OpenStreetMap.Mapnik"
             ... )
         """
-        from .basemaps import available_basemaps
-
         # Default basemaps if none provided
         if basemaps is None:
             basemaps = [
@@ -4571,8 +5582,7 @@ class MapLibreMap(MapWidget):
         basemap_configs = []
         for basemap_name in valid_basemaps:
             basemap_provider = available_basemaps[basemap_name]
-            tile_url = basemap_provider.build_url()
-            attribution = basemap_provider.get("attribution", "")
+            tile_url, attribution = resolve_basemap(basemap_name)
 
             # Use custom label if provided, otherwise use basemap name
             display_label = (
@@ -4592,26 +5602,26 @@ class MapLibreMap(MapWidget):
             }
             basemap_configs.append(basemap_config)
 
-        control_options = options or {}
-        control_options.update(
+        control_options = {
+            **(options or {}),
+            "position": position,
+            "basemaps": basemap_configs,
+            "initialBasemap": initial_basemap,
+            "expandDirection": expand_direction,
+        }
+
+        # Store control in persistent state
+        control_key = _control_key("basemap_control", position)
+        self._set_trait_item(
+            "_controls",
+            control_key,
             {
+                "type": "basemap_control",
                 "position": position,
-                "basemaps": basemap_configs,
-                "initialBasemap": initial_basemap,
-                "expandDirection": expand_direction,
-            }
+                "options": control_options,
+            },
         )
 
-        # Store control in persistent state
-        control_key = f"basemap_control_{position}"
-        current_controls = dict(self._controls)
-        current_controls[control_key] = {
-            "type": "basemap_control",
-            "position": position,
-            "options": control_options,
-        }
-        self._controls = current_controls
-
         self.call_js_method("addControl", "basemap_control", control_options)
 
     def add_temporal_control(
@@ -4661,26 +5671,26 @@ class MapLibreMap(MapWidget):
         if not frames:
             raise ValueError("At least one frame must be provided")
 
-        control_options = options or {}
-        control_options.update(
+        control_options = {
+            **(options or {}),
+            "position": position,
+            "frames": frames,
+            "interval": interval,
+            "performance": performance,
+        }
+
+        # Store control in persistent state
+        control_key = _control_key("temporal", position)
+        self._set_trait_item(
+            "_controls",
+            control_key,
             {
+                "type": "temporal",
                 "position": position,
-                "frames": frames,
-                "interval": interval,
-                "performance": performance,
-            }
+                "options": control_options,
+            },
         )
 
-        # Store control in persistent state
-        control_key = f"temporal_{position}"
-        current_controls = dict(self._controls)
-        current_controls[control_key] = {
-            "type": "temporal",
-            "position": position,
-            "options": control_options,
-        }
-        self._controls = current_controls
-
         self.call_js_method("addControl", "temporal", control_options)
 
     def add_infobox_control(
@@ -4719,14 +5729,16 @@ class MapLibreMap(MapWidget):
                 # Best-effort stringification to avoid non-serializable objects
                 control_options["formatter_template"] = str(formatter)
 
-        control_key = f"infobox_{position}"
-        current_controls = dict(self._controls)
-        current_controls[control_key] = {
-            "type": "infobox",
-            "position": position,
-            "options": control_options,
-        }
-        self._controls = current_controls
+        control_key = _control_key("infobox", position)
+        self._set_trait_item(
+            "_controls",
+            control_key,
+            {
+                "type": "infobox",
+                "position": position,
+                "options": control_options,
+            },
+        )
 
         self.call_js_method("addControl", "infobox", control_options)
 
@@ -4770,14 +5782,16 @@ class MapLibreMap(MapWidget):
         if colors is not None:
             control_options["colors"] = colors
 
-        control_key = f"gradientbox_{position}"
-        current_controls = dict(self._controls)
-        current_controls[control_key] = {
-            "type": "gradientbox",
-            "position": position,
-            "options": control_options,
-        }
-        self._controls = current_controls
+        control_key = _control_key("gradientbox", position)
+        self._set_trait_item(
+            "_controls",
+            control_key,
+            {
+                "type": "gradientbox",
+                "position": position,
+                "options": control_options,
+            },
+        )
 
         self.call_js_method("addControl", "gradientbox", control_options)
 
@@ -4887,14 +5901,16 @@ class MapLibreMap(MapWidget):
         if merged_labels:
             control_options["label_overrides"] = merged_labels
 
-        control_key = f"legend_{position}"
-        current_controls = dict(self._controls)
-        current_controls[control_key] = {
-            "type": "legend",
-            "position": position,
-            "options": control_options,
-        }
-        self._controls = current_controls
+        control_key = _control_key("legend", position)
+        self._set_trait_item(
+            "_controls",
+            control_key,
+            {
+                "type": "legend",
+                "position": position,
+                "options": control_options,
+            },
+        )
 
         self.call_js_method("addControl", "legend", control_options)
 
@@ -5347,6 +6363,10 @@ class MapLibreMap(MapWidget):
         title: Optional[str] = None,
         width: str = "100%",
         height: str = "100vh",
+        coalesce_sources: bool = False,
+        precision: Optional[int] = 6,
+        debug: bool = False,
+        script_url: Optional[str] = None,
         **kwargs: Any,
     ) -> str:
         """Export the map to a standalone HTML file with DeckGL layers.
@@ -5358,11 +6378,31 @@ class MapLibreMap(MapWidget):
             title: Title for the HTML page. If None, no title is displayed.
             width: Width of the map container as CSS string (default: "100%").
             height: Height of the map container as CSS string (default: "100vh").
+            coalesce_sources: Whether to merge inline GeoJSON sources that share
+                the same options into one source in the exported page, which
+                renders faster with many sources. The merged features carry an
+                extra ``__src`` property naming their original source, which
+                shows up in feature popups and property-based styling
+                (default: False).
+            precision: Number of decimal places to keep in the coordinates of
+                inline GeoJSON sources, 6 being about 10 cm. If None,
+                coordinates are exported unchanged (default: 6).
+            debug: Whether the exported page logs map clicks and draw events
+                to the browser console (default: False).
+            script_url: URL of a hosted copy of the package's
+                `static/maplibre_export.js`, which restores the layers and
+                controls. Pages that share the URL let the browser cache the
+                script instead of each embedding it. If None, the script is
+                embedded so that the page works offline (default: None).
             **kwargs: Additional arguments passed to the HTML template.
 
         Returns:
             HTML string content of the exported map.
         """
+        # Apply a layer control update that is still waiting for the event loop
+        if self._layer_controls_scheduled:
+            self._flush_layer_controls()
+
         # Get the current map state
         map_state = {
             "center": self.center,
@@ -5377,7 +6417,18 @@ class MapLibreMap(MapWidget):
             "_deckgl_layers": dict(self._deckgl_layers),  # Include DeckGL layers
             # Include recorded JS calls so we can faithfully reconstruct dynamic elements
             "_js_calls": list(self._js_calls),
+            "_debug": debug,
+            # Hidden layers and their sources are only added once shown
+            "_hidden_layers": [
+                layer_id
+                for layer_id, layer_info in self._layer_dict.items()
+                if layer_id in self._layers and not layer_info.get("visible", True)
+            ],
         }
+        if coalesce_sources:
+            map_state["_sources"], map_state["_layers"] = _coalesce_geojson_sources(
+                map_state["_sources"], map_state["_layers"], self._geoarrow_data
+            )
 
         # Add class-specific attributes
         if hasattr(self, "style"):
@@ -5415,15 +6466,22 @@ class MapLibreMap(MapWidget):
             # Non-fatal if inspection fails
             pass
 
-        # Generate HTML content
-        html_content = self._generate_html_template(map_state, title, **kwargs)
-
-        # Save to file if filename provided
+        # Save to file if filename provided, streaming the large source JSON
+        # rather than building the whole document first
         if filename:
             with open(filename, "w", encoding="utf-8") as f:
-                f.write(html_content)
+                self._generate_html_template(
+                    map_state,
+                    title,
+                    precision=precision,
+                    file=f,
+                    script_url=script_url,
+                    **kwargs,
+                )
         else:
-            return html_content
+            return self._generate_html_template(
+                map_state, title, precision=precision, script_url=script_url, **kwargs
+            )
 
     def add_legend(
         self,
@@ -5668,22 +6726,24 @@ class MapLibreMap(MapWidget):
             safe_fs = 14
 
         legend_export_key = f"legend_{position}_{uuid.uuid4().hex[:6]}"
-        current_controls = dict(self._controls)
-        current_controls[legend_export_key] = {
-            "type": "legend",
-            "position": position,
-            "options": {
-                "title": title,
-                "labels": list(labels),
-                "colors": list(colors),
-                "shape_type": shape_type,
-                "bg_color": bg_color,
-                "icon": icon,
-                "collapsed": collapsed,
-                "fontsize": safe_fs,
-                "max_height": max_height,
-                "header_color": header_color,
-                "header_text_color": header_text_color,
+        self._set_trait_item(
+            "_controls",
+            legend_export_key,
+            {
+                "type": "legend",
+                "position": position,
+                "options": {
+                    "title": title,
+                    "labels": list(labels),
+                    "colors": list(colors),
+                    "shape_type": shape_type,
+                    "bg_color": bg_color,
+                    "icon": icon,
+                    "collapsed": collapsed,
+                    "fontsize": safe_fs,
+                    "max_height": max_height,
+                    "header_color": header_color,
+                    "header_text_color": header_text_color,
+                },
             },
-        }
-        self._controls = current_controls
+        )
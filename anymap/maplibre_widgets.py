@@ -13,15 +13,110 @@ These classes were extracted from maplibre.py to improve code organization
 and maintainability.
 """
 
-from typing import Any, Dict, List, Optional, Tuple, Union, TYPE_CHECKING
+import functools
+import math
+import weakref
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    TYPE_CHECKING,
+)
 
 import ipyvuetify as v
 import ipywidgets as widgets
+from ipywidgets.widgets.widget_bool import CheckboxStyle
+from ipywidgets.widgets.widget_description import DescriptionStyle
 
 if TYPE_CHECKING:
     from .maplibre import MapLibreMap
 
 
+def _on_row_visibility_change(
+    manager_ref: Callable[[], Optional["LayerManagerWidget"]],
+    name: str,
+    change: Dict[str, Any],
+) -> None:
+    """
+    Applies a layer manager checkbox change to the map.
+
+    Args:
+        manager_ref (Callable): Weak reference to the layer manager.
+        name (str): The name of the layer.
+        change (Dict[str, Any]): The traitlets change of the widget value.
+    """
+    manager = manager_ref()
+    # Values synced from the map during a rebuild are not user changes
+    if manager is not None and not manager._building:
+        manager.set_layer_visibility(name, change["new"])
+
+
+def _on_row_opacity_change(
+    manager_ref: Callable[[], Optional["LayerManagerWidget"]],
+    name: str,
+    change: Dict[str, Any],
+) -> None:
+    """
+    Applies a layer manager slider change to the map.
+
+    Args:
+        manager_ref (Callable): Weak reference to the layer manager.
+        name (str): The name of the layer.
+        change (Dict[str, Any]): The traitlets change of the widget value.
+    """
+    manager = manager_ref()
+    if manager is not None and not manager._building:
+        manager.set_layer_opacity(name, change["new"])
+
+
+def _on_row_settings_click(
+    manager_ref: Callable[[], Optional["LayerManagerWidget"]],
+    name: str,
+    button: widgets.Button,
+) -> None:
+    """
+    Opens the style widget of a layer in the map sidebar.
+
+    Args:
+        manager_ref (Callable): Weak reference to the layer manager.
+        name (str): The name of the layer.
+        button (widgets.Button): The clicked button.
+    """
+    manager = manager_ref()
+    if manager is None:
+        return
+    style_widget = LayerStyleWidget(manager.m.layer_dict[name], manager.m)
+    manager.m.add_to_sidebar(
+        style_widget,
+        widget_icon="mdi-palette",
+        label=f"Style {name}",
+    )
+
+
+def _on_row_remove_click(
+    manager_ref: Callable[[], Optional["LayerManagerWidget"]],
+    name: str,
+    button: widgets.Button,
+) -> None:
+    """
+    Removes a layer from the map and the layer manager.
+
+    Args:
+        manager_ref (Callable): Weak reference to the layer manager.
+        name (str): The name of the layer.
+        button (widgets.Button): The clicked button.
+    """
+    manager = manager_ref()
+    if manager is not None:
+        manager.remove_layers([name])
+
+
 class CustomWidget(v.ExpansionPanels):
     """
     A custom expansion panel widget with dynamic widget management.
@@ -63,6 +158,8 @@ class CustomWidget(v.ExpansionPanels):
         # Wrap content in a mutable VBox
         self.content_box = widgets.VBox()
         self.host_map = host_map
+        # Children collected by batch_children, None outside of a batch
+        self._pending_children = None
         if widget:
             if isinstance(widget, (list, tuple)):
                 self.content_box.children = widget
@@ -78,6 +175,7 @@ class CustomWidget(v.ExpansionPanels):
             children=[v.Icon(children=[close_icon])],
         )
         close_btn.on_event("click", self._handle_close)
+        self.close_btn = close_btn
 
         header = v.ExpansionPanelHeader(
             style_=f"height: {height}; min-height: {height}; background-color: {background_color};",
@@ -119,6 +217,52 @@ class CustomWidget(v.ExpansionPanels):
             self.host_map.remove_from_sidebar(self)
         # self.close()
 
+    def close(self) -> None:
+        """
+        Closes the panel and the header and content box widgets it created.
+        The widgets shown in the content box are left open.
+        """
+        if "panel" not in self.__dict__ or self.comm is None:
+            # Already closed, or not fully initialized
+            super().close()
+            return
+        self.close_btn.on_event("click", self._handle_close, remove=True)
+        stack = [self.panel]
+        while stack:
+            widget = stack.pop()
+            if widget is not self.content_box:
+                stack.extend(
+                    child
+                    for child in getattr(widget, "children", None) or ()
+                    if isinstance(child, widgets.Widget)
+                )
+            widget.close()
+        super().close()
+
+    @contextmanager
+    def batch_children(self) -> Iterator[None]:
+        """
+        Collects widget additions and removals into a single update.
+
+        Within the block, add_widget, remove_widget and set_widgets only change
+        a pending list of children, which is assigned to the content box once
+        on exit. Nested blocks join the outermost one.
+
+        Example:
+            >>> with panel.batch_children():
+            ...     for widget in widgets_list:
+            ...         panel.add_widget(widget)
+        """
+        if self._pending_children is not None:
+            yield
+            return
+        self._pending_children = list(self.content_box.children)
+        try:
+            yield
+        finally:
+            children, self._pending_children = self._pending_children, None
+            self.content_box.children = children
+
     def add_widget(self, widget: widgets.Widget) -> None:
         """
         Adds a widget to the content box.
@@ -126,7 +270,10 @@ class CustomWidget(v.ExpansionPanels):
         Args:
             widget (widgets.Widget): The widget to add to the content box.
         """
-        self.content_box.children += (widget,)
+        if self._pending_children is not None:
+            self._pending_children.append(widget)
+        else:
+            self.content_box.children += (widget,)
 
     def remove_widget(self, widget: widgets.Widget) -> None:
         """
@@ -135,9 +282,12 @@ class CustomWidget(v.ExpansionPanels):
         Args:
             widget (widgets.Widget): The widget to remove from the content box.
         """
-        self.content_box.children = tuple(
-            w for w in self.content_box.children if w != widget
-        )
+        if self._pending_children is not None:
+            self._pending_children = [w for w in self._pending_children if w != widget]
+        else:
+            self.content_box.children = tuple(
+                w for w in self.content_box.children if w != widget
+            )
 
     def set_widgets(self, widgets_list: List[widgets.Widget]) -> None:
         """
@@ -146,7 +296,10 @@ class CustomWidget(v.ExpansionPanels):
         Args:
             widgets_list (List[widgets.Widget]): A list of widgets to set as the content of the content box.
         """
-        self.content_box.children = widgets_list
+        if self._pending_children is not None:
+            self._pending_children = list(widgets_list)
+        else:
+            self.content_box.children = widgets_list
 
 
 class Container(v.Container):
@@ -194,8 +347,17 @@ class Container(v.Container):
         self.sidebar_visible = sidebar_visible
         self.min_width = min_width
         self.max_width = max_width
-        self.host_map = host_map
+        # A proxy avoids a reference cycle between the map and its container
+        self.host_map = weakref.proxy(host_map) if host_map is not None else None
         self.sidebar_widgets = {}
+        # The widget passed to add_to_sidebar for each label, before wrapping
+        self._sidebar_sources = {}
+        # Sidebar children changed while the sidebar was hidden, if any
+        self._pending_sidebar_children = None
+        # Whether add_to_sidebar/remove_from_sidebar calls are being batched
+        self._batching_sidebar = False
+        # (visible, min_width, max_width) last applied to the sidebar styles
+        self._sidebar_state = None
 
         # Map display container (left column)
         self.map_container = v.Col(
@@ -232,29 +394,23 @@ class Container(v.Container):
 
         # Sidebar controls row (toggle + settings)
         self.sidebar_controls = v.Row(
-            class_="ma-0 pa-0", children=[self.toggle_btn, self.settings_btn]
+            class_="ma-0 pa-0",
+            align="center",
+            justify="space-between",
+            children=[self.toggle_btn, self.settings_btn],
         )
 
-        # Sidebar width slider (initially hidden)
-        self.width_slider = widgets.IntSlider(
-            value=self.max_width,
-            min=200,
-            max=1000,
-            step=10,
-            description="Width:",
-            continuous_update=True,
-        )
-        self.width_slider.observe(self.on_width_change, names="value")
-
-        self.settings_widget = CustomWidget(
-            self.width_slider,
-            widget_icon="mdi-cog",
-            label="Sidebar Settings",
-            host_map=self.host_map,
-        )
+        # Sidebar width slider, created when the settings panel is first opened
+        self.width_slider = None
+        self.settings_widget = None
 
         # Sidebar (right column)
-        self.sidebar = v.Col(class_="pa-1", style_="overflow-y: hidden;")
+        # The sidebar children are fixed; toggling it only changes their styles
+        self.sidebar = v.Col(
+            class_="pa-1",
+            style_="overflow-y: hidden;",
+            children=[self.sidebar_controls, self.sidebar_content_box],
+        )
         self.update_sidebar_content()
 
         # Main layout row
@@ -295,26 +451,25 @@ class Container(v.Container):
         Updates the content of the sidebar based on its visibility.
         If the sidebar is visible, it displays the toggle button and the sidebar content.
         If the sidebar is hidden, it only displays the toggle button.
+        Nothing is sent to the front end if the sidebar already shows this state.
         """
-        if self.sidebar_visible:
-            # Header row: toggle on the left, settings on the right
-            header_row = v.Row(
-                class_="ma-0 pa-0",
-                align="center",
-                justify="space-between",
-                children=[self.toggle_btn, self.settings_btn],
-            )
-
-            children = [header_row]
-
-            children.append(self.sidebar_content_box)
+        state = (self.sidebar_visible, self.min_width, self.max_width)
+        if state == self._sidebar_state:
+            return
+        self._sidebar_state = state
 
-            self.sidebar.children = children
+        if self.sidebar_visible:
+            if self._pending_sidebar_children is not None:
+                self.sidebar_content_box.children = self._pending_sidebar_children
+                self._pending_sidebar_children = None
+            self.settings_btn.style_ = "width: 36px; height: 36px;"
+            self.sidebar_content_box.layout.display = None
             self.sidebar.style_ = (
                 f"min-width: {self.min_width}px; max-width: {self.max_width}px;"
             )
         else:
-            self.sidebar.children = [self.toggle_btn]
+            self.settings_btn.style_ = "width: 36px; height: 36px; display: none;"
+            self.sidebar_content_box.layout.display = "none"
             self.sidebar.style_ = "width: 48px; min-width: 48px; max-width: 48px;"
 
     def set_sidebar_content(
@@ -326,6 +481,7 @@ class Container(v.Container):
         Args:
             content (Union[widgets.VBox, List[widgets.Widget]]): The new content for the sidebar.
         """
+        self._pending_sidebar_children = None
         if isinstance(content, (list, tuple)):
             self.sidebar_content_box.children = content
         else:
@@ -345,7 +501,8 @@ class Container(v.Container):
         **kwargs: Any,
     ) -> None:
         """
-        Appends a widget to the sidebar content.
+        Appends a widget to the sidebar content. Adding the same widget again
+        under the same label leaves the sidebar unchanged.
 
         Args:
             widget (Optional[Union[widgets.Widget, List[widgets.Widget]]]): Initial widget(s) to display in the content box.
@@ -358,9 +515,10 @@ class Container(v.Container):
             **kwargs (Any): Additional keyword arguments for the parent class.
         """
 
-        if label in self.sidebar_widgets:
-            self.remove_from_sidebar(name=label)
+        if label in self.sidebar_widgets and self._sidebar_sources.get(label) is widget:
+            return
 
+        source = widget
         if add_header:
             widget = CustomWidget(
                 widget,
@@ -374,8 +532,13 @@ class Container(v.Container):
                 **kwargs,
             )
 
-        self.sidebar_content_box.children += (widget,)
-        self.sidebar_widgets[label] = widget
+        # Replacing a widget sends a single children change to the front end
+        with self.sidebar_content_box.hold_trait_notifications():
+            if label in self.sidebar_widgets:
+                self.remove_from_sidebar(name=label)
+            self._sidebar_sources[label] = source
+            self.sidebar_widgets[label] = widget
+            self._sync_sidebar_children(added=widget)
 
     def remove_from_sidebar(
         self, widget: widgets.Widget = None, name: str = None
@@ -387,18 +550,81 @@ class Container(v.Container):
             widget (widgets.Widget): The widget to remove from the sidebar.
             name (str): The name of the widget to remove from the sidebar.
         """
-        key = None
-        for key, value in self.sidebar_widgets.items():
-            if value == widget or key == name:
-                if widget is None:
-                    widget = self.sidebar_widgets[key]
-                break
-
-        if key is not None and key in self.sidebar_widgets:
-            self.sidebar_widgets.pop(key)
-        self.sidebar_content_box.children = tuple(
-            child for child in self.sidebar_content_box.children if child != widget
-        )
+        if name is not None and name in self.sidebar_widgets:
+            widget = self.sidebar_widgets.pop(name)
+            self._sidebar_sources.pop(name, None)
+        elif widget is not None:
+            key = next(
+                (k for k, value in self.sidebar_widgets.items() if value is widget),
+                None,
+            )
+            if key is not None:
+                self.sidebar_widgets.pop(key)
+                self._sidebar_sources.pop(key, None)
+        if widget is not None:
+            self._sync_sidebar_children(removed=widget)
+
+    def _sync_sidebar_children(
+        self,
+        added: Optional[widgets.Widget] = None,
+        removed: Optional[widgets.Widget] = None,
+    ) -> None:
+        """
+        Updates the sidebar children in one assignment.
+
+        The current children are patched in place rather than rebuilt from
+        ``sidebar_widgets``, so that content set through
+        ``set_sidebar_content`` is kept. While the sidebar is hidden, the new
+        children are only assigned once it is shown again.
+
+        Args:
+            added (Optional[widgets.Widget]): The widget just registered, if any.
+            removed (Optional[widgets.Widget]): The widget just unregistered, if any.
+        """
+        children = self._pending_sidebar_children
+        if children is None:
+            children = self.sidebar_content_box.children
+        if removed is not None:
+            children = tuple(child for child in children if child is not removed)
+        if added is not None:
+            children = tuple(children) + (added,)
+
+        if self.sidebar_visible and not self._batching_sidebar:
+            self._pending_sidebar_children = None
+            self.sidebar_content_box.children = children
+        else:
+            # No view shows the hidden content, so sync it when the sidebar
+            # opens or the batch ends
+            self._pending_sidebar_children = children
+
+    @contextmanager
+    def batch_add(self) -> Iterator[None]:
+        """
+        Collects sidebar additions and removals into a single update.
+
+        Within the block, add_to_sidebar and remove_from_sidebar only update
+        sidebar_widgets, and the resulting children are assigned to the sidebar
+        once on exit. Nested blocks join the outermost one.
+
+        Example:
+            >>> with container.batch_add():
+            ...     for label, widget in tools.items():
+            ...         container.add_to_sidebar(widget, label=label)
+        """
+        if self._batching_sidebar:
+            yield
+            return
+        self._batching_sidebar = True
+        try:
+            yield
+        finally:
+            self._batching_sidebar = False
+            if self.sidebar_visible and self._pending_sidebar_children is not None:
+                children, self._pending_sidebar_children = (
+                    self._pending_sidebar_children,
+                    None,
+                )
+                self.sidebar_content_box.children = children
 
     def set_sidebar_width(self, min_width: int = None, max_width: int = None) -> None:
         """
@@ -418,16 +644,125 @@ class Container(v.Container):
             self.max_width = max_width
         self.update_sidebar_content()
 
+    def close(self) -> None:
+        """
+        Closes the container, detaching its event handlers and closing the
+        sidebar widgets it owns. The host map's layer manager is left open so
+        that a new container can reuse it.
+        """
+        if "sidebar" not in self.__dict__ or self.comm is None:
+            # Already closed, or not fully initialized
+            super().close()
+            return
+        self.toggle_btn.on_event("click", self.toggle_sidebar, remove=True)
+        self.settings_btn.on_event("click", self.toggle_width_slider, remove=True)
+        if self.width_slider is not None:
+            self.width_slider.unobserve(self.on_width_change, names="value")
+            self.width_slider.close()
+            self.settings_widget.close()
+
+        layer_manager = getattr(self.host_map, "layer_manager", None)
+        for widget in self.sidebar_widgets.values():
+            if widget is not layer_manager:
+                widget.close()
+        self.sidebar_widgets.clear()
+        self._sidebar_sources.clear()
+        self._pending_sidebar_children = None
+        super().close()
+
     def toggle_width_slider(self, *args: Any) -> None:
+        """
+        Shows the sidebar settings panel if it is not already in the sidebar.
 
-        if self.settings_widget not in self.sidebar_content_box.children:
-            self.add_to_sidebar(self.settings_widget, add_header=False)
+        Args:
+            *args (Any): Additional positional arguments.
+        """
+        if self.settings_widget is None:
+            self.width_slider = widgets.IntSlider(
+                value=self.max_width,
+                min=200,
+                max=1000,
+                step=10,
+                description="Width:",
+                # Resize the sidebar once on release rather than on every step
+                continuous_update=False,
+            )
+            self.width_slider.observe(self.on_width_change, names="value")
+            self.settings_widget = CustomWidget(
+                self.width_slider,
+                widget_icon="mdi-cog",
+                label="Sidebar Settings",
+                host_map=self.host_map,
+            )
+        self.add_to_sidebar(
+            self.settings_widget, add_header=False, label="Sidebar Settings"
+        )
 
     def on_width_change(self, change: dict) -> None:
         new_width = change["new"]
         self.set_sidebar_width(min_width=new_width, max_width=new_width)
 
 
+def _is_paint_value(value: Any) -> bool:
+    """Returns whether a style widget value can be sent as a paint property."""
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, (int, float)):
+        return math.isfinite(value)
+    if isinstance(value, (list, tuple)):
+        return all(_is_paint_value(item) for item in value)
+    return isinstance(value, str) and value != ""
+
+
+# Line dash patterns offered by the line style dropdown, as immutable tuples so
+# that the dropdown can compare them cheaply
+_LINE_STYLE_OPTIONS: Tuple[Tuple[str, Tuple[float, ...]], ...] = (
+    ("Solid", (1,)),
+    ("Dashed", (2, 4)),
+    ("Dotted", (1, 4)),
+    ("Dash-dot", (2, 4, 8, 4)),
+)
+
+# Style widgets offered for each layer type, as (kind, description, property
+# name, default value, ...) where the remaining items are the slider range and
+# step or the dropdown options
+_LAYER_STYLE_SPECS = {
+    "circle": (
+        ("color", "Circle Color", "circle-color", "#3388ff"),
+        ("slider", "Circle Radius", "circle-radius", 6, 1, 20),
+        ("slider", "Circle Opacity", "circle-opacity", 0.8, 0, 1, 0.05),
+        ("slider", "Circle Blur", "circle-blur", 0, 0, 1, 0.05),
+        ("color", "Circle Stroke Color", "circle-stroke-color", "#3388ff"),
+        ("slider", "Circle Stroke Width", "circle-stroke-width", 1, 0, 5),
+        ("slider", "Circle Stroke Opacity", "circle-stroke-opacity", 1.0, 0, 1, 0.05),
+    ),
+    "line": (
+        ("color", "Line Color", "line-color", "#3388ff"),
+        ("slider", "Line Width", "line-width", 2, 1, 10),
+        ("slider", "Line Opacity", "line-opacity", 1.0, 0, 1, 0.05),
+        ("slider", "Line Blur", "line-blur", 0, 0, 1, 0.05),
+        (
+            "dropdown",
+            "Line Style",
+            "line-dasharray",
+            _LINE_STYLE_OPTIONS,
+        ),
+    ),
+    "fill": (
+        ("color", "Fill Color", "fill-color", "#3388ff"),
+        ("slider", "Fill Opacity", "fill-opacity", 0.2, 0, 1, 0.05),
+        ("color", "Fill Outline Color", "fill-outline-color", "#3388ff"),
+    ),
+}
+
+# LayerStyleWidget methods that create each kind of style widget
+_STYLE_WIDGET_FACTORIES = {
+    "color": "_create_color_picker",
+    "slider": "_create_number_slider",
+    "dropdown": "_create_dropdown",
+}
+
+
 class LayerStyleWidget(widgets.VBox):
     """
     A widget for styling map layers interactively.
@@ -448,13 +783,34 @@ class LayerStyleWidget(widgets.VBox):
     ):
         super().__init__()
         self.layer = layer
-        self.map = map_widget
+        # Held weakly so that a style panel left open in an old cell output
+        # does not keep its map alive
+        self._map_ref = weakref.ref(map_widget)
         self.layer_type = self._get_layer_type()
-        self.layer_id = layer["layer"].id
-        self.layer_paint = layer["layer"].paint
-        self.original_style = self._get_current_style()
+        layer_config = layer["layer"]
+        if isinstance(layer_config, dict):
+            # Entries of MapLibreMap.layer_dict hold the layer definition
+            self.layer_id = layer_config["id"]
+            self.layer_paint = layer_config.get("paint") or {}
+        else:
+            self.layer_id = layer_config.id
+            self.layer_paint = layer_config.paint
+        # Array values such as dash patterns are kept as tuples, like the
+        # dropdown options they are compared with
+        self.original_style = {
+            name: tuple(value) if isinstance(value, list) else value
+            for name, value in self._get_current_style().items()
+        }
+        # Paint properties as last sent to the map, to only send changes
+        self._last_applied = dict(self.original_style)
         self.widget_width = widget_width
         self.label_width = label_width
+        # Layout and style models shared by all style widgets of the panel
+        self._shared_layout = widgets.Layout(
+            width=widget_width, description_width=label_width
+        )
+        self._shared_style = DescriptionStyle(description_width="initial")
+        self._shared_slider_style = widgets.SliderStyle(description_width="initial")
 
         # Create the styling widgets based on layer type
         self.style_widgets = self._create_style_widgets()
@@ -501,86 +857,32 @@ class LayerStyleWidget(widgets.VBox):
         """Determine the layer type."""
         return self.layer["type"]
 
+    @property
+    def map(self) -> Optional["MapLibreMap"]:
+        """The map being styled, or None if it has been garbage collected."""
+        return self._map_ref()
+
     def _get_current_style(self) -> dict:
         """Get the current layer style."""
         return self.layer_paint
 
     def _create_style_widgets(self) -> List[widgets.Widget]:
         """Create style widgets based on layer type."""
-        widgets_list = []
-
-        if self.layer_type == "circle":
-            widgets_list.extend(
-                [
-                    self._create_color_picker(
-                        "Circle Color", "circle-color", "#3388ff"
-                    ),
-                    self._create_number_slider(
-                        "Circle Radius", "circle-radius", 6, 1, 20
-                    ),
-                    self._create_number_slider(
-                        "Circle Opacity", "circle-opacity", 0.8, 0, 1, 0.05
-                    ),
-                    self._create_number_slider(
-                        "Circle Blur", "circle-blur", 0, 0, 1, 0.05
-                    ),
-                    self._create_color_picker(
-                        "Circle Stroke Color", "circle-stroke-color", "#3388ff"
-                    ),
-                    self._create_number_slider(
-                        "Circle Stroke Width", "circle-stroke-width", 1, 0, 5
-                    ),
-                    self._create_number_slider(
-                        "Circle Stroke Opacity",
-                        "circle-stroke-opacity",
-                        1.0,
-                        0,
-                        1,
-                        0.05,
-                    ),
-                ]
-            )
-
-        elif self.layer_type == "line":
-            widgets_list.extend(
-                [
-                    self._create_color_picker("Line Color", "line-color", "#3388ff"),
-                    self._create_number_slider("Line Width", "line-width", 2, 1, 10),
-                    self._create_number_slider(
-                        "Line Opacity", "line-opacity", 1.0, 0, 1, 0.05
-                    ),
-                    self._create_number_slider("Line Blur", "line-blur", 0, 0, 1, 0.05),
-                    self._create_dropdown(
-                        "Line Style",
-                        "line-dasharray",
-                        [
-                            ("Solid", [1]),
-                            ("Dashed", [2, 4]),
-                            ("Dotted", [1, 4]),
-                            ("Dash-dot", [2, 4, 8, 4]),
-                        ],
-                    ),
-                ]
-            )
-
-        elif self.layer_type == "fill":
-            widgets_list.extend(
-                [
-                    self._create_color_picker("Fill Color", "fill-color", "#3388ff"),
-                    self._create_number_slider(
-                        "Fill Opacity", "fill-opacity", 0.2, 0, 1, 0.05
-                    ),
-                    self._create_color_picker(
-                        "Fill Outline Color", "fill-outline-color", "#3388ff"
-                    ),
-                ]
-            )
-        else:
-            widgets_list.extend(
-                [widgets.HTML(value=f"Layer type {self.layer_type} is not supported.")]
-            )
+        # Paint property edited by each style widget
+        self._property_widgets = {}
+        specs = _LAYER_STYLE_SPECS.get(self.layer_type)
+        if specs is None:
+            return [
+                widgets.HTML(value=f"Layer type {self.layer_type} is not supported.")
+            ]
 
-        return widgets_list
+        for kind, description, property_name, *args in specs:
+            factory = getattr(self, _STYLE_WIDGET_FACTORIES[kind])
+            # The spec names the paint property itself (e.g. line-dasharray for
+            # the line style dropdown), so applying needs no name translation
+            widget = factory(description, property_name, *args)
+            self._property_widgets[property_name] = widget
+        return list(self._property_widgets.values())
 
     def _create_color_picker(
         self, description: str, property_name: str, default_color: str
@@ -589,10 +891,8 @@ class LayerStyleWidget(widgets.VBox):
         return widgets.ColorPicker(
             description=description,
             value=self.original_style.get(property_name, default_color),
-            layout=widgets.Layout(
-                width=self.widget_width, description_width=self.label_width
-            ),
-            style={"description_width": "initial"},
+            layout=self._shared_layout,
+            style=self._shared_style,
         )
 
     def _create_number_slider(
@@ -611,10 +911,8 @@ class LayerStyleWidget(widgets.VBox):
             min=min_val,
             max=max_val,
             step=step,
-            layout=widgets.Layout(
-                width=self.widget_width, description_width=self.label_width
-            ),
-            style={"description_width": "initial"},
+            layout=self._shared_layout,
+            style=self._shared_slider_style,
             continuous_update=False,
         )
 
@@ -622,61 +920,87 @@ class LayerStyleWidget(widgets.VBox):
         self,
         description: str,
         property_name: str,
-        options: List[Tuple[str, List[float]]],
+        options: Tuple[Tuple[str, Tuple[float, ...]], ...],
     ) -> widgets.Dropdown:
         """Create a dropdown widget."""
         return widgets.Dropdown(
             description=description,
             options=options,
             value=self.original_style.get(property_name, options[0][1]),
-            layout=widgets.Layout(
-                width=self.widget_width, description_width=self.label_width
-            ),
-            style={"description_width": "initial"},
+            layout=self._shared_layout,
+            style=self._shared_style,
         )
 
     def _apply_style(self, _) -> None:
         """Apply the style changes to the layer."""
-        new_style = {}
-
-        for widget in self.style_widgets:
-            if isinstance(widget, widgets.ColorPicker):
-                property_name = widget.description.lower().replace(" ", "-")
-                new_style[property_name] = widget.value
-            elif isinstance(widget, widgets.FloatSlider):
-                property_name = widget.description.lower().replace(" ", "-")
-                new_style[property_name] = widget.value
-            elif isinstance(widget, widgets.Dropdown):
-                property_name = widget.description.lower().replace(" ", "-")
-                new_style[property_name] = widget.value
-
-        with self.output_widget:
-            try:
-                for key, value in new_style.items():
-                    if key == "line-style":
-                        key = "line-dasharray"
-                    self.map.set_paint_property(self.layer["layer"].id, key, value)
-            except Exception as e:
-                print(e)
-
-        self.map.layer_manager.refresh()
+        m = self.map
+        if m is None:
+            return
+        changed = {
+            property_name: widget.value
+            for property_name, widget in self._property_widgets.items()
+            if self._last_applied.get(property_name) != widget.value
+        }
+        errors = [
+            f"Invalid value for {key}: {value!r}"
+            for key, value in changed.items()
+            if not _is_paint_value(value)
+        ]
+        changed = {
+            key: value for key, value in changed.items() if _is_paint_value(value)
+        }
+
+        if changed:
+            # Send the changed paint properties to the front end in one call
+            m.set_paint_properties(self.layer_id, changed)
+            self._last_applied.update(changed)
+        if errors:
+            with self.output_widget:
+                print("; ".join(errors))
+        if not changed:
+            return
+
+        if m.layer_manager is not None:
+            m.layer_manager.refresh(layer_id=self.layer_id)
 
     def _reset_style(self, _) -> None:
         """Reset to original style."""
-
-        # Update widgets to reflect original style
-        for widget in self.style_widgets:
-            if isinstance(
-                widget, (widgets.ColorPicker, widgets.FloatSlider, widgets.Dropdown)
-            ):
-                property_name = widget.description.lower().replace(" ", "-")
-                if property_name in self.original_style:
-                    widget.value = self.original_style[property_name]
+        # Update widgets to reflect original style, leaving unchanged ones alone
+        # so that they do not send a value update to the front end
+        for property_name, widget in self._property_widgets.items():
+            value = self.original_style.get(property_name)
+            if value is not None and widget.value != value:
+                widget.value = value
 
     def _close_widget(self, _) -> None:
-        """Close the widget."""
-        # self.close()
-        self.map.remove_from_sidebar(name=f"Style {self.layer['layer'].id}")
+        """Close the widget, its sidebar panel and the widgets it owns."""
+        m = self.map
+        wrapper = None
+        if m is not None:
+            label = f"Style {self.layer_id}"
+            container = getattr(m, "container", None)
+            if container is not None:
+                wrapper = container.sidebar_widgets.get(label)
+            m.remove_from_sidebar(name=label)
+
+        # Drop the observers and comms of the panel's widgets
+        self.apply_btn.on_click(self._apply_style, remove=True)
+        self.reset_btn.on_click(self._reset_style, remove=True)
+        self.close_btn.on_click(self._close_widget, remove=True)
+        for widget in (
+            *self.style_widgets,
+            self.apply_btn,
+            self.reset_btn,
+            self.close_btn,
+            self.button_box,
+            self.output_widget,
+        ):
+            widget.unobserve_all()
+            widget.close()
+        self._property_widgets = {}
+        self.close()
+        if wrapper is not None and wrapper is not self:
+            wrapper.close()
 
 
 class LayerManagerWidget(v.ExpansionPanels):
@@ -691,6 +1015,8 @@ class LayerManagerWidget(v.ExpansionPanels):
         m (Map): The map object to manage layers for.
         layer_items (Dict[str, Dict[str, widgets.Widget]]): A dictionary mapping layer names
             to their corresponding control widgets (checkbox and slider).
+        _row_cache (Dict[str, widgets.HBox]): The control row of each layer, reused
+            across refreshes.
         _building (bool): A flag indicating whether the widget is currently being built.
         master_toggle (widgets.Checkbox): A checkbox to toggle all layers on or off.
         layers_box (widgets.VBox): A container for individual layer controls.
@@ -728,6 +1054,9 @@ class LayerManagerWidget(v.ExpansionPanels):
         """
         self.m = m
         self.layer_items = {}
+        self._row_cache = {}
+        self._row_order = []
+        self._row_styles = None
         self.groups = groups
         self._building = False
 
@@ -812,97 +1141,165 @@ class LayerManagerWidget(v.ExpansionPanels):
         Builds the controls for individual layers.
 
         This method creates checkboxes for toggling visibility, sliders for adjusting opacity,
-        and buttons for removing layers.
+        and buttons for removing layers. Rows of layers that are already shown are reused and
+        only their values are updated, so a refresh only creates widgets for new layers.
         """
         self._building = True
-        self.layer_items.clear()
-        rows = []
+        try:
+            layer_dict = self.m.layer_dict
 
-        style = {"description_width": "initial"}
-        padding = "0px 5px 0px 5px"
-
-        for name, info in list(self.m.layer_dict.items()):
-            # if name == "Background":
-            #     continue
-
-            visible = info.get("visible", True)
-            opacity = info.get("opacity", 1.0)
-
-            checkbox = widgets.Checkbox(value=visible, description=name, style=style)
-            checkbox.layout.max_width = "150px"
-
-            slider = widgets.FloatSlider(
-                value=opacity,
-                min=0,
-                max=1,
-                step=0.01,
-                readout=False,
-                tooltip="Change layer opacity",
-                layout=widgets.Layout(width="150px", padding=padding),
-            )
+            for name in self._row_cache.keys() - layer_dict.keys():
+                self._close_row(name)
 
-            settings = widgets.Button(
-                icon="gear",
-                tooltip="Change layer style",
-                layout=widgets.Layout(width="38px", height="25px", padding=padding),
-            )
+            rows = []
+            for name, info in list(layer_dict.items()):
+                # if name == "Background":
+                #     continue
 
-            remove = widgets.Button(
-                icon="times",
-                tooltip="Remove layer",
-                layout=widgets.Layout(width="38px", height="25px", padding=padding),
-            )
+                visible = info.get("visible", True)
+                opacity = info.get("opacity", 1.0)
 
-            def on_visibility_change(change, layer_name=name):
-                self.set_layer_visibility(layer_name, change["new"])
+                row = self._row_cache.get(name)
+                if row is None:
+                    row = self._build_layer_row(name, visible, opacity)
+                else:
+                    controls = self.layer_items[name]
+                    controls["checkbox"].value = visible
+                    controls["slider"].value = opacity
+                rows.append(row)
+
+            rows = tuple(rows)
+            if self.layers_box.children != rows:
+                self.layers_box.children = rows
+            self._row_order = list(layer_dict)
+        finally:
+            self._building = False
+
+    def _build_layer_row(
+        self, name: str, visible: bool, opacity: float
+    ) -> widgets.HBox:
+        """
+        Builds the control row of a single layer.
 
-            def on_opacity_change(change, layer_name=name):
-                self.set_layer_opacity(layer_name, change["new"])
+        Args:
+            name (str): The name of the layer.
+            visible (bool): Whether the layer is visible.
+            opacity (float): The opacity of the layer (0 to 1).
 
-            def on_remove_clicked(btn, layer_name=name, row_ref=None):
-                if layer_name == "Background":
-                    for layer in self.m.get_style_layers():
-                        self.m.add_call("removeLayer", layer["id"])
-                else:
-                    self.m.remove_layer(layer_name)
-                if row_ref in self.layers_box.children:
-                    self.layers_box.children = tuple(
-                        c for c in self.layers_box.children if c != row_ref
-                    )
-                self.layer_items.pop(layer_name, None)
-                if f"Style {layer_name}" in self.m.sidebar_widgets:
-                    self.m.remove_from_sidebar(name=f"Style {layer_name}")
-
-            def on_settings_clicked(btn, layer_name=name):
-                style_widget = LayerStyleWidget(self.m.layer_dict[layer_name], self.m)
-                self.m.add_to_sidebar(
-                    style_widget,
-                    widget_icon="mdi-palette",
-                    label=f"Style {layer_name}",
-                )
+        Returns:
+            widgets.HBox: The row with the visibility checkbox, opacity slider,
+                style and remove buttons.
+        """
+        styles = self._row_styles
+        if styles is None:
+            # Layout and style models are shared by all rows, so that a row only
+            # adds its four control widgets and its box to the widget state
+            padding = "0px 5px 0px 5px"
+            button_layout = widgets.Layout(width="38px", height="25px", padding=padding)
+            styles = self._row_styles = {
+                "checkbox": {
+                    "layout": widgets.Layout(max_width="150px"),
+                    "style": CheckboxStyle(description_width="initial"),
+                },
+                "slider": {
+                    "layout": widgets.Layout(width="150px", padding=padding),
+                    "style": widgets.SliderStyle(),
+                },
+                "button": {"layout": button_layout, "style": widgets.ButtonStyle()},
+                "row": {"layout": widgets.Layout()},
+            }
+
+        checkbox = widgets.Checkbox(
+            value=visible, description=name, **styles["checkbox"]
+        )
 
-            checkbox.observe(on_visibility_change, names="value")
-            slider.observe(on_opacity_change, names="value")
+        slider = widgets.FloatSlider(
+            value=opacity,
+            min=0,
+            max=1,
+            step=0.01,
+            readout=False,
+            tooltip="Change layer opacity",
+            **styles["slider"],
+        )
 
-            row = widgets.HBox(
-                [checkbox, slider, settings, remove], layout=widgets.Layout()
-            )
+        settings = widgets.Button(
+            icon="gear", tooltip="Change layer style", **styles["button"]
+        )
 
-            remove.on_click(
-                lambda btn, r=row, n=name: on_remove_clicked(
-                    btn, layer_name=n, row_ref=r
-                )
-            )
+        remove = widgets.Button(
+            icon="times", tooltip="Remove layer", **styles["button"]
+        )
 
-            settings.on_click(
-                lambda btn, n=name: on_settings_clicked(btn, layer_name=n)
-            )
+        # The handlers only hold a weak reference to the manager, so rows that
+        # outlive it (e.g. in the front end) do not keep the map alive
+        manager_ref = weakref.ref(self)
+        checkbox.observe(
+            functools.partial(_on_row_visibility_change, manager_ref, name),
+            names="value",
+        )
+        slider.observe(
+            functools.partial(_on_row_opacity_change, manager_ref, name),
+            names="value",
+        )
+        settings.on_click(functools.partial(_on_row_settings_click, manager_ref, name))
+        remove.on_click(functools.partial(_on_row_remove_click, manager_ref, name))
 
-            rows.append(row)
-            self.layer_items[name] = {"checkbox": checkbox, "slider": slider}
+        row = widgets.HBox([checkbox, slider, settings, remove], **styles["row"])
 
-        self.layers_box.children = rows
-        self._building = False
+        self._row_cache[name] = row
+        self.layer_items[name] = {"checkbox": checkbox, "slider": slider}
+        return row
+
+    def remove_layers(self, names: List[str]) -> None:
+        """
+        Removes layers from the map and their rows from the widget.
+
+        The rows are taken out of the layers box with a single update, however many
+        layers are removed.
+
+        Args:
+            names (List[str]): The names of the layers to remove.
+        """
+        removed = set()
+        with self.m.batch_update():
+            for name in names:
+                if name == "Background":
+                    for layer in self.m.get_style_layers():
+                        self.m.add_call("removeLayer", layer["id"])
+                else:
+                    self.m.remove_layer(name)
+                if name in self._row_cache:
+                    removed.add(name)
+
+        if removed:
+            # Rows are in the same order as their names in self._row_order
+            children = self.layers_box.children
+            keep = [i for i, n in enumerate(self._row_order) if n not in removed]
+            self._row_order = [self._row_order[i] for i in keep]
+            self.layers_box.children = tuple(children[i] for i in keep)
+            for name in removed:
+                self._close_row(name)
+
+        for name in names:
+            if f"Style {name}" in self.m.sidebar_widgets:
+                self.m.remove_from_sidebar(name=f"Style {name}")
+
+    def _close_row(self, name: str) -> None:
+        """
+        Closes the control row of a layer that is no longer on the map.
+
+        Args:
+            name (str): The name of the layer.
+        """
+        row = self._row_cache.pop(name)
+        items = self.layer_items.pop(name, None)
+        if items is not None:
+            items["checkbox"].unobserve_all()
+            items["slider"].unobserve_all()
+        for child in row.children:
+            child.close()
+        row.close()
 
     def toggle_all_layers(self, change: Dict[str, Any]) -> None:
         """
@@ -913,11 +1310,20 @@ class LayerManagerWidget(v.ExpansionPanels):
         """
         if self._building:
             return
-        for name, controls in self.layer_items.items():
-            controls["checkbox"].value = change["new"]
-
-        for widget in self.group_toggles.children:
-            widget.value = change["new"]
+        visible = change["new"]
+        # Send all visibility changes to the map in one update
+        self._building = True
+        try:
+            with self.m.batch_update():
+                for name, controls in self.layer_items.items():
+                    if controls["checkbox"].value != visible:
+                        controls["checkbox"].value = visible
+                        self.set_layer_visibility(name, visible)
+
+                for widget in self.group_toggles.children:
+                    widget.value = visible
+        finally:
+            self._building = False
 
     def toggle_group_layers(self, change: Dict[str, Any]) -> None:
         """
@@ -927,9 +1333,17 @@ class LayerManagerWidget(v.ExpansionPanels):
             return
         group_name = change["owner"].description.split(" ")[0]
         group_layers = self.groups[group_name]
-        for layer_name in group_layers:
-            self.set_layer_visibility(layer_name, change["new"])
-        self.refresh()
+        visible = change["new"]
+        # Update the rows in place rather than rebuilding them
+        self._building = True
+        try:
+            for layer_name in group_layers:
+                controls = self.layer_items.get(layer_name)
+                if controls is not None:
+                    controls["checkbox"].value = visible
+        finally:
+            self._building = False
+        self.m.set_visibility_bulk(group_layers, visible)
 
     def set_layer_visibility(self, name: str, visible: bool) -> None:
         """
@@ -951,8 +1365,23 @@ class LayerManagerWidget(v.ExpansionPanels):
         """
         self.m.set_opacity(name, opacity)
 
-    def refresh(self) -> None:
+    def refresh(self, layer_id: Optional[str] = None) -> None:
         """
         Rebuilds the UI to reflect the current layers in the map.
+
+        Args:
+            layer_id (Optional[str]): If given and the layer already has a row,
+                only that row is updated. Defaults to None.
         """
-        self.build_layer_controls()
+        info = self.m.layer_dict.get(layer_id)
+        if info is None or layer_id not in self._row_cache:
+            self.build_layer_controls()
+            return
+
+        self._building = True
+        try:
+            controls = self.layer_items[layer_id]
+            controls["checkbox"].value = info.get("visible", True)
+            controls["slider"].value = info.get("opacity", 1.0)
+        finally:
+            self._building = False
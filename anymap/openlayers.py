@@ -1,33 +1,12 @@
 """OpenLayers implementation of the map widget."""
 
-import pathlib
 import traitlets
 from typing import Dict, List, Any, Optional, Union
 import json
 
+from . import utils
 from .base import MapWidget
 
-# Load OpenLayers-specific js and css
-try:
-    with open(
-        pathlib.Path(__file__).parent / "static" / "openlayers_widget.js",
-        "r",
-        encoding="utf-8",
-    ) as f:
-        _esm_openlayers = f.read()
-except FileNotFoundError:
-    _esm_openlayers = "console.error('OpenLayers widget JS not found');"
-
-try:
-    with open(
-        pathlib.Path(__file__).parent / "static" / "openlayers_widget.css",
-        "r",
-        encoding="utf-8",
-    ) as f:
-        _css_openlayers = f.read()
-except FileNotFoundError:
-    _css_openlayers = "/* OpenLayers widget CSS not found */"
-
 
 class OpenLayersMap(MapWidget):
     """OpenLayers implementation of the map widget."""
@@ -37,8 +16,16 @@ class OpenLayersMap(MapWidget):
     projection = traitlets.Unicode("EPSG:3857").tag(sync=True)
 
     # Define the JavaScript module path
-    _esm = _esm_openlayers
-    _css = _css_openlayers
+    _esm = utils.BundledAsset(
+        "static",
+        "openlayers_widget.js",
+        default="console.error('OpenLayers widget JS not found');",
+    )
+    _css = utils.BundledAsset(
+        "static",
+        "openlayers_widget.css",
+        default="/* OpenLayers widget CSS not found */",
+    )
 
     def __init__(
         self,
@@ -1,6 +1,5 @@
 """Potree point cloud viewer implementation of the map widget."""
 
-import pathlib
 import traitlets
 from typing import Dict, List, Any, Optional
 import psutil
@@ -8,21 +7,9 @@ import os
 import warnings
 from pathlib import Path
 
+from . import utils
 from .base import MapWidget
 
-# Load Potree-specific js and css
-with open(
-    pathlib.Path(__file__).parent / "static" / "potree_widget.js", "r", encoding="utf-8"
-) as f:
-    _esm_potree = f.read()
-
-with open(
-    pathlib.Path(__file__).parent / "static" / "potree_widget.css",
-    "r",
-    encoding="utf-8",
-) as f:
-    _css_potree = f.read()
-
 
 def _download_potree(quiet=False):
     import urllib.request
@@ -190,8 +177,8 @@ class PotreeMap(MapWidget):
     far_clip = traitlets.Float(1000.0).tag(sync=True)
 
     # Define the JavaScript module path
-    _esm = _esm_potree
-    _css = _css_potree
+    _esm = utils.BundledAsset("static", "potree_widget.js")
+    _css = utils.BundledAsset("static", "potree_widget.css")
 
     POTREE_LIBS_DIR = traitlets.Unicode(read_only=True).tag(sync=True)
 
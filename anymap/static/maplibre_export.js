@@ -0,0 +1,398 @@
+// Restores the sources, layers and controls of a map exported with
+// MapLibreMap.to_html from its serialized state.
+
+function anymapRestoreLayers(map, mapState, pending) {
+    const { pendingLayers, pendingSources, addPendingSource } = pending;
+    const sources = mapState._sources || [];
+    const layers = mapState._layers || [];
+
+    // Sources used only by hidden layers are deferred
+    const hiddenLayers = new Set(mapState._hidden_layers || []);
+    const visibleSources = new Set();
+    const hiddenSources = new Set();
+    layers.forEach(([layerId, layerConfig]) => {
+        const layout = layerConfig.layout || {};
+        const hidden = hiddenLayers.has(layerId) || layout.visibility === 'none';
+        if (hidden) {
+            pendingLayers[layerId] = {
+                ...layerConfig,
+                layout: { ...layout, visibility: 'none' },
+            };
+        }
+        if (typeof layerConfig.source === 'string') {
+            (hidden ? hiddenSources : visibleSources).add(layerConfig.source);
+        }
+    });
+
+    // Add sources first
+    sources.forEach(([sourceId, sourceConfig]) => {
+        pendingSources[sourceId] = sourceConfig;
+        if (visibleSources.has(sourceId) || !hiddenSources.has(sourceId)) {
+            addPendingSource(sourceId);
+        }
+    });
+
+    // Then add the visible layers
+    layers.forEach(([layerId, layerConfig]) => {
+        if (pendingLayers[layerId]) return;
+        try {
+            map.addLayer(layerConfig);
+        } catch (error) {
+            console.warn(`Failed to add layer ${layerId}:`, error);
+        }
+    });
+
+    // Set terrain if it exists
+    const terrain = mapState._terrain || {};
+    if (Object.keys(terrain).length > 0) {
+        try {
+            map.setTerrain(terrain);
+            console.log('Terrain restored successfully:', terrain);
+        } catch (error) {
+            console.warn('Failed to restore terrain:', error);
+        }
+    }
+}
+
+function anymapRestoreControls(map, mapState, LayerControl) {
+    const controls = mapState._controls || [];
+    controls.forEach(([controlKey, controlConfig]) => {
+        try {
+            const { type: controlType, position, options: controlOptions } = controlConfig;
+            let control;
+
+            switch (controlType) {
+                case 'navigation':
+                    control = new maplibregl.NavigationControl(controlOptions || {});
+                    break;
+                case 'scale':
+                    control = new maplibregl.ScaleControl(controlOptions || {});
+                    break;
+                case 'fullscreen':
+                    control = new maplibregl.FullscreenControl(controlOptions || {});
+                    break;
+                case 'geolocate':
+                    control = new maplibregl.GeolocateControl(controlOptions || {});
+                    break;
+                case 'attribution':
+                    control = new maplibregl.AttributionControl(controlOptions || {});
+                    break;
+                case 'globe':
+                    control = new maplibregl.GlobeControl(controlOptions || {});
+                    break;
+                case 'draw':
+                    // Handle draw control restoration
+                    if (typeof MapboxDraw !== 'undefined') {
+                        // Use custom styles for MapLibre compatibility
+                        const drawOptions = {
+                            ...controlOptions,
+                            styles: window.MapLibreDrawStyles || undefined
+                        };
+                        control = new MapboxDraw(drawOptions);
+
+                        // Store reference for data loading
+                        window.drawControl = control;
+
+                        // Log draw events when exported with debug=True
+                        if (mapState._debug) {
+                            ['create', 'update', 'delete', 'selectionchange'].forEach((drawEvent) => {
+                                map.on(`draw.${drawEvent}`, (e) => console.log(`Draw ${drawEvent}:`, e.features));
+                            });
+                        }
+
+                        console.log('Draw control restored successfully with custom styles');
+
+                        // Load saved draw data if it exists
+                        const savedDrawData = mapState._draw_data;
+                        if (savedDrawData && savedDrawData.features && savedDrawData.features.length > 0) {
+                            try {
+                                control.set(savedDrawData);
+                                console.log('Saved draw data loaded successfully:', savedDrawData);
+                            } catch (error) {
+                                console.error('Failed to load saved draw data:', error);
+                            }
+                        }
+                    } else {
+                        console.warn('MapboxDraw not available during restore');
+                        return;
+                    }
+                    break;
+                case 'terra_draw':
+                    // Handle Terra Draw control restoration
+                    if (typeof MaplibreTerradrawControl !== 'undefined') {
+                        const terraDrawOptions = {
+                            ...controlOptions
+                        };
+                        control = new MaplibreTerradrawControl.MaplibreTerradrawControl(terraDrawOptions);
+
+                        // Store reference for data operations
+                        window.terraDrawControl = control;
+
+                        console.log('Terra Draw control restored successfully');
+
+                        // Load saved Terra Draw data if it exists
+                        const savedTerraDrawData = mapState._terra_draw_data;
+                        if (savedTerraDrawData && savedTerraDrawData.features && savedTerraDrawData.features.length > 0) {
+                            try {
+                                // Terra Draw data loading would need to be implemented based on the library's API
+                                console.log('Saved Terra Draw data found:', savedTerraDrawData);
+                            } catch (error) {
+                                console.error('Failed to load saved Terra Draw data:', error);
+                            }
+                        }
+                    } else {
+                        console.warn('MaplibreTerradrawControl not available during restore');
+                        return;
+                    }
+                    break;
+                case 'layer_control':
+                    // Handle layer control restoration
+                    control = new LayerControl(controlOptions || {}, map);
+                    break;
+                case 'html':
+                    (function() {
+                        const opts = controlOptions || {};
+                        const container = document.createElement('div');
+                        container.className = 'maplibregl-ctrl';
+                        container.style.background = (opts.bgColor || 'white');
+                        container.style.padding = '6px';
+                        container.style.borderRadius = '4px';
+                        if (opts.html) {
+                            container.innerHTML = opts.html;
+                        } else {
+                            container.textContent = opts.text || '';
+                        }
+                        control = {
+                            onAdd: function() { return container; },
+                            onRemove: function() { if (container.parentNode) { container.parentNode.removeChild(container); } }
+                        };
+                    })();
+                    break;
+                case 'geoman':
+                    (function() {
+                        try {
+                            const GeomanConstructor = (window.Geoman && (window.Geoman.Geoman || window.Geoman)) || null;
+                            if (!GeomanConstructor) {
+                                console.warn('Geoman constructor unavailable; skipping geoman control restore');
+                                return;
+                            }
+                            const gmOptions = (controlOptions && controlOptions.geoman_options) || {};
+                            const settings = gmOptions.settings || {};
+                            if (!settings.position && controlOptions && controlOptions.position) {
+                                gmOptions.settings = { ...settings, position: controlOptions.position };
+                            }
+                            new GeomanConstructor(map, gmOptions);
+                            if (mapState.geoman_data && map && map.gm && map.gm.features && typeof map.gm.features.importGeoJson === 'function') {
+                                try {
+                                    map.gm.features.importGeoJson(mapState.geoman_data);
+                                } catch (e) {
+                                    console.warn('Failed to import saved geoman_data:', e);
+                                }
+                            }
+                            control = {
+                                onAdd: function() { return document.createElement('div'); },
+                                onRemove: function() {}
+                            };
+                        } catch (e) {
+                            console.warn('Failed to initialize Geoman control in export:', e);
+                            return;
+                        }
+                    })();
+                    break;
+                case 'geocoder':
+                    // Handle geocoder control restoration
+                    if (typeof MaplibreGeocoder !== 'undefined') {
+                        const apiConfig = controlOptions.api_config || {};
+
+                        // Create geocoder API implementation
+                        const geocoderApi = {
+                            forwardGeocode: async (config) => {
+                                const features = [];
+                                try {
+                                    const request = `${apiConfig.api_url || 'https://nominatim.openstreetmap.org/search'}?q=${config.query}&format=geojson&polygon_geojson=1&addressdetails=1&limit=${apiConfig.limit || 5}`;
+                                    const response = await fetch(request);
+                                    const geojson = await response.json();
+
+                                    for (const feature of geojson.features) {
+                                        const center = [
+                                            feature.bbox[0] + (feature.bbox[2] - feature.bbox[0]) / 2,
+                                            feature.bbox[1] + (feature.bbox[3] - feature.bbox[1]) / 2,
+                                        ];
+                                        const point = {
+                                            type: "Feature",
+                                            geometry: {
+                                                type: "Point",
+                                                coordinates: center,
+                                            },
+                                            place_name: feature.properties.display_name,
+                                            properties: feature.properties,
+                                            text: feature.properties.display_name,
+                                            place_type: ["place"],
+                                            center,
+                                        };
+                                        features.push(point);
+                                    }
+                                } catch (e) {
+                                    console.error(`Failed to forwardGeocode with error: ${e}`);
+                                }
+
+                                return { features };
+                            },
+                        };
+
+                        // Create geocoder control
+                        const geocoderOptions = {
+                            maplibregl: maplibregl,
+                            placeholder: apiConfig.placeholder || 'Search for places...',
+                            collapsed: controlOptions.collapsed !== false,
+                            ...controlOptions
+                        };
+                        delete geocoderOptions.api_config; // Remove from options passed to geocoder
+                        delete geocoderOptions.position; // Remove position from geocoder options
+
+                        control = new MaplibreGeocoder(geocoderApi, geocoderOptions);
+                        console.log('Geocoder control restored successfully');
+                    } else {
+                        console.warn('MaplibreGeocoder not available during restore');
+                        return;
+                    }
+                    break;
+                case 'basemap_control':
+                    // Handle basemap control restoration
+                    if (typeof MaplibreGLBasemapsControl !== 'undefined') {
+                        const basemapsOptions = {
+                            basemaps: controlOptions.basemaps || [],
+                            initialBasemap: controlOptions.initialBasemap,
+                            expandDirection: controlOptions.expandDirection || 'down',
+                            ...controlOptions
+                        };
+                        delete basemapsOptions.position; // Remove position from options passed to control
+
+                        control = new MaplibreGLBasemapsControl(basemapsOptions);
+                        console.log('Basemap control restored successfully');
+                    } else {
+                        console.warn('MaplibreGLBasemapsControl not available during restore');
+                        return;
+                    }
+                    break;
+                case 'legend':
+                    (function() {
+                        const opts = controlOptions || {};
+                        const legendTitle = opts.title || 'Legend';
+                        const legendLabels = opts.labels || [];
+                        const legendColors = opts.colors || [];
+                        const shapeType = opts.shape_type || 'rectangle';
+                        const bgColor = opts.bg_color || 'white';
+                        const legendIcon = opts.icon || '\u2261';
+                        const collapsed = opts.collapsed !== false;
+                        const fontSize = opts.fontsize || 14;
+                        const maxHeight = opts.max_height || 380;
+                        const headerColor = opts.header_color || null;
+                        const headerTextColor = opts.header_text_color || '#333';
+
+                        // Build the panel container
+                        const wrapper = document.createElement('div');
+                        wrapper.className = 'maplibregl-ctrl anymap-legend-ctrl';
+                        wrapper.style.cssText = 'font-family: Arial, sans-serif; pointer-events: auto;';
+
+                        // Toggle button (shown when collapsed)
+                        const toggleBtn = document.createElement('button');
+                        toggleBtn.className = 'anymap-legend-toggle';
+                        toggleBtn.textContent = legendIcon;
+                        toggleBtn.title = legendTitle;
+                        toggleBtn.style.cssText = 'display: block; width: 30px; height: 30px; padding: 0; border: none; background: white; cursor: pointer; font-size: 18px; line-height: 30px; text-align: center; border-radius: 4px; box-shadow: 0 0 0 2px rgba(0,0,0,.1);';
+                        wrapper.appendChild(toggleBtn);
+
+                        // Panel (shown when expanded)
+                        const panel = document.createElement('div');
+                        panel.className = 'anymap-legend-panel';
+                        panel.style.cssText = 'display: none; background: ' + bgColor + '; border-radius: 4px; box-shadow: 0 0 0 2px rgba(0,0,0,.1); min-width: 120px; max-width: 360px;';
+
+                        // Header
+                        const header = document.createElement('div');
+                        header.style.cssText = 'display: flex; justify-content: space-between; align-items: center; padding: 6px 10px; border-bottom: 1px solid #ddd; cursor: pointer; border-radius: 4px 4px 0 0;' +
+                            (headerColor ? ' background: ' + headerColor + ';' : ' background: #f0f0f0;');
+                        const headerLabel = document.createElement('span');
+                        headerLabel.textContent = legendTitle;
+                        headerLabel.style.cssText = 'font-weight: bold; font-size: 13px; color: ' + (headerTextColor || '#333') + ';';
+                        const closeBtn = document.createElement('span');
+                        closeBtn.innerHTML = '&times;';
+                        closeBtn.style.cssText = 'cursor: pointer; font-size: 16px; color: ' + (headerTextColor || '#666') + '; margin-left: 12px;';
+                        header.appendChild(headerLabel);
+                        header.appendChild(closeBtn);
+                        panel.appendChild(header);
+
+                        // Content area with items
+                        const contentHeight = Math.max(100, maxHeight - 60);
+                        const content = document.createElement('div');
+                        content.style.cssText = 'padding: 8px; max-height: ' + contentHeight + 'px; overflow-y: auto; overflow-x: hidden;';
+
+                        for (let i = 0; i < legendLabels.length; i++) {
+                            const label = legendLabels[i];
+                            const color = legendColors[i] || '#ccc';
+                            const row = document.createElement('div');
+                            row.style.cssText = 'margin: 0 0 4px 0; line-height: 1.4; white-space: nowrap; font-size: ' + fontSize + 'px;';
+
+                            const shape = document.createElement('span');
+                            if (shapeType === 'circle') {
+                                shape.style.cssText = 'display: inline-block; width: 20px; height: 20px; background-color: ' + color + '; border-radius: 50%; margin-right: 8px; vertical-align: middle;';
+                            } else if (shapeType === 'line') {
+                                shape.style.cssText = 'display: inline-block; width: 20px; height: 3px; background-color: ' + color + '; margin-right: 8px; vertical-align: middle;';
+                            } else {
+                                shape.style.cssText = 'display: inline-block; width: 20px; height: 20px; background-color: ' + color + '; margin-right: 8px; vertical-align: middle;';
+                            }
+
+                            const text = document.createElement('span');
+                            text.textContent = label;
+                            text.style.verticalAlign = 'middle';
+
+                            row.appendChild(shape);
+                            row.appendChild(text);
+                            content.appendChild(row);
+                        }
+
+                        panel.appendChild(content);
+                        wrapper.appendChild(panel);
+
+                        // Toggle behaviour
+                        function expand() {
+                            toggleBtn.style.display = 'none';
+                            panel.style.display = 'block';
+                        }
+                        function collapse() {
+                            panel.style.display = 'none';
+                            toggleBtn.style.display = 'block';
+                        }
+                        toggleBtn.addEventListener('click', expand);
+                        closeBtn.addEventListener('click', collapse);
+                        header.addEventListener('click', function(e) {
+                            if (e.target === closeBtn) return;
+                            collapse();
+                        });
+
+                        if (!collapsed) {
+                            expand();
+                        }
+
+                        control = {
+                            onAdd: function() { return wrapper; },
+                            onRemove: function() { if (wrapper.parentNode) { wrapper.parentNode.removeChild(wrapper); } }
+                        };
+                    })();
+                    break;
+                case 'widget_panel':
+                    // widget_panel controls use ipywidgets which are only
+                    // available inside Jupyter.  Skip silently during HTML
+                    // export — the legend case above handles legend data.
+                    return;
+                default:
+                    console.warn(`Unknown control type during restore: ${controlType}`);
+                    return;
+            }
+
+            map.addControl(control, position);
+        } catch (error) {
+            console.warn(`Failed to add control ${controlKey}:`, error);
+        }
+    });
+}
@@ -785,6 +785,17 @@ function normalizeGeomanGeoJson(data) {
   return { type: 'FeatureCollection', features: [] };
 }
 
+// GeoJSON sources added from an already serialized document carry the JSON
+// text in `data` and a `_raw` flag, so Python does not have to parse it
+function resolveSourceConfig(sourceConfig) {
+  if (!sourceConfig || !sourceConfig._raw) {
+    return sourceConfig;
+  }
+  const { _raw, ...config } = sourceConfig;
+  config.data = JSON.parse(config.data);
+  return config;
+}
+
 function ensureThreeImportMap() {
   if (document.querySelector('script[data-source="anymap-three-importmap"]')) {
     return;
@@ -6676,7 +6687,7 @@ const pointInPolygon = (pt, poly) => {
                 }
               }, 500);
             } else {
-              map.addSource(sourceId, sourceConfig);
+              map.addSource(sourceId, resolveSourceConfig(sourceConfig));
             }
           } catch (error) {
             console.warn(`Failed to restore source ${sourceId}:`, error);
@@ -6684,6 +6695,11 @@ const pointInPolygon = (pt, poly) => {
         }
       });
 
+      // Fill GeoJSON sources whose features were sent as GeoArrow buffers
+      Object.keys(model.get("_geoarrow_data") || {}).forEach(sourceId => {
+        loadGeoArrowData(map, sourceId);
+      });
+
       // Then add layers (with delay for COG-dependent layers)
       Object.entries(layers).forEach(([layerId, layerConfig]) => {
         if (!map.getLayer(layerId)) {
@@ -7567,13 +7583,45 @@ const pointInPolygon = (pt, poly) => {
     });
 
     // Handle map events and send to Python
-    const sendEvent = (eventType, eventData) => {
+    const pushEvent = (eventType, eventData) => {
       const currentEvents = model.get("_js_events") || [];
       const newEvents = [...currentEvents, { type: eventType, ...eventData }];
       model.set("_js_events", newEvents);
       model.save_changes();
     };
 
+    // High-frequency events are throttled so that continuous interactions do
+    // not send one comm message per frame; the last event is always sent
+    const DEFAULT_EVENT_THROTTLE = { mousemove: 16 };
+    const eventThrottleState = {};
+    const sendEvent = (eventType, eventData) => {
+      const throttle = { ...DEFAULT_EVENT_THROTTLE, ...(model.get("_event_throttle") || {}) };
+      const throttleMs = throttle[eventType] || 0;
+      if (throttleMs <= 0) {
+        pushEvent(eventType, eventData);
+        return;
+      }
+      const state = eventThrottleState[eventType] ||
+        (eventThrottleState[eventType] = { last: 0, timer: null, pending: null });
+      const wait = throttleMs - (performance.now() - state.last);
+      if (wait <= 0 && !state.timer) {
+        state.last = performance.now();
+        pushEvent(eventType, eventData);
+        return;
+      }
+      // Keep only the latest event until the interval has passed
+      state.pending = eventData;
+      if (!state.timer) {
+        state.timer = setTimeout(() => {
+          const pendingData = state.pending;
+          state.timer = null;
+          state.pending = null;
+          state.last = performance.now();
+          pushEvent(eventType, pendingData);
+        }, Math.max(wait, 0));
+      }
+    };
+
     // Map event handlers
     map.on('load', () => {
       sendEvent('load', {});
@@ -7733,6 +7781,100 @@ const pointInPolygon = (pt, poly) => {
       model.save_changes();
     });
 
+    // Ids of the basemap style layers, recorded whenever a style finishes
+    // loading so that layers added later (from Python or by the draw tools)
+    // are not treated as part of the basemap
+    let basemapLayerIds = [];
+    const recordBasemapLayers = () => {
+      const style = map.getStyle();
+      basemapLayerIds = ((style && style.layers) || []).map(layer => layer.id);
+    };
+    map.on('style.load', recordBasemapLayers);
+    if (map.isStyleLoaded()) {
+      recordBasemapLayers();
+    }
+
+    // Style layers that belong to the basemap
+    function getBackgroundLayers(map) {
+      return basemapLayerIds.map(layerId => map.getLayer(layerId)).filter(Boolean);
+    }
+
+    // GeoArrow extension names mapped to GeoJSON geometry types
+    const GEOARROW_GEOMETRY_TYPES = {
+      'geoarrow.point': 'Point',
+      'geoarrow.linestring': 'LineString',
+      'geoarrow.polygon': 'Polygon',
+      'geoarrow.multipoint': 'MultiPoint',
+      'geoarrow.multilinestring': 'MultiLineString',
+      'geoarrow.multipolygon': 'MultiPolygon',
+    };
+
+    // Convert an Arrow cell (nested lists, typed arrays, BigInts) to plain JS
+    function arrowValueToJS(value) {
+      if (value === null || value === undefined) {
+        return null;
+      }
+      if (typeof value === 'bigint') {
+        return Number(value);
+      }
+      if (ArrayBuffer.isView(value)) {
+        return Array.from(value, arrowValueToJS);
+      }
+      if (typeof value === 'object' && typeof value.toArray === 'function') {
+        return Array.from(value.toArray(), arrowValueToJS);
+      }
+      return value;
+    }
+
+    // Decode the Arrow IPC stream stored for a source and set it as GeoJSON data
+    async function loadGeoArrowData(map, sourceId) {
+      const buffer = (model.get("_geoarrow_data") || {})[sourceId];
+      if (!buffer) {
+        return;
+      }
+      try {
+        const arrow = await import('https://esm.sh/apache-arrow@17.0.0');
+        const bytes = ArrayBuffer.isView(buffer)
+          ? new Uint8Array(buffer.buffer, buffer.byteOffset, buffer.byteLength)
+          : new Uint8Array(buffer);
+        const table = arrow.tableFromIPC(bytes);
+        const geometryField = table.schema.fields.find(field =>
+          GEOARROW_GEOMETRY_TYPES[field.metadata.get('ARROW:extension:name')]
+        );
+        if (!geometryField) {
+          throw new Error('No GeoArrow geometry column found');
+        }
+        const geometryType = GEOARROW_GEOMETRY_TYPES[geometryField.metadata.get('ARROW:extension:name')];
+        const geometries = table.getChild(geometryField.name);
+        const columns = table.schema.fields
+          .filter(field => field !== geometryField)
+          .map(field => [field.name, table.getChild(field.name)]);
+
+        const features = new Array(table.numRows);
+        for (let i = 0; i < table.numRows; i++) {
+          const properties = {};
+          columns.forEach(([name, column]) => {
+            properties[name] = arrowValueToJS(column.get(i));
+          });
+          const coordinates = geometries.get(i);
+          features[i] = {
+            type: 'Feature',
+            properties,
+            geometry: coordinates === null
+              ? null
+              : { type: geometryType, coordinates: arrowValueToJS(coordinates) },
+          };
+        }
+
+        const source = map.getSource(sourceId);
+        if (source) {
+          source.setData({ type: 'FeatureCollection', features });
+        }
+      } catch (error) {
+        console.error(`Failed to load GeoArrow data for source ${sourceId}:`, error);
+      }
+    }
+
     // Method execution function
     function executeMapMethod(map, call, el) {
       const { method, args, kwargs } = call;
@@ -7745,10 +7887,14 @@ const pointInPolygon = (pt, poly) => {
             map.flyTo(flyToOptions);
             break;
 
+          case 'loadGeoArrowData':
+            loadGeoArrowData(map, args[0]);
+            break;
+
           case 'addSource':
             const [sourceId, sourceConfig] = args;
             if (!map.getSource(sourceId)) {
-              map.addSource(sourceId, sourceConfig);
+              map.addSource(sourceId, resolveSourceConfig(sourceConfig));
               // Persist source in model state
               const currentSources = model.get("_sources") || {};
               currentSources[sourceId] = sourceConfig;
@@ -7813,6 +7959,44 @@ const pointInPolygon = (pt, poly) => {
             }
             break;
 
+          case 'addLayers': {
+            const [batchLayerConfigs, batchBeforeId] = args;
+            (batchLayerConfigs || []).forEach(batchLayerConfig => {
+              executeMapMethod(map, { method: 'addLayer', args: [batchLayerConfig, batchBeforeId] }, el);
+            });
+            break;
+          }
+
+          case 'setLayersVisibility': {
+            const [visibilityLayerIds, layersVisible] = args;
+            const layersVisibility = layersVisible ? 'visible' : 'none';
+            // MapLibre repaints once for all the changes in the next frame
+            (visibilityLayerIds || []).forEach(visibilityLayerId => {
+              if (map.getLayer(visibilityLayerId)) {
+                map.setLayoutProperty(visibilityLayerId, 'visibility', layersVisibility);
+              }
+            });
+            break;
+          }
+
+          case 'setPaintProperties': {
+            const [paintLayerId, paintProperties] = args;
+            if (map.getLayer(paintLayerId)) {
+              // MapLibre repaints once for all the changes in the next frame
+              Object.entries(paintProperties || {}).forEach(([paintName, paintValue]) => {
+                map.setPaintProperty(paintLayerId, paintName, paintValue);
+              });
+            }
+            break;
+          }
+
+          case 'addSourceAndLayer': {
+            const [pairSourceId, pairSourceConfig, pairLayerConfig, pairBeforeId] = args;
+            executeMapMethod(map, { method: 'addSource', args: [pairSourceId, pairSourceConfig] }, el);
+            executeMapMethod(map, { method: 'addLayer', args: [pairLayerConfig, pairBeforeId] }, el);
+            break;
+          }
+
           case 'addFlatGeobufLayer':
             const flatgeobufConfig = args[0] || {};
             addFlatGeobufLayerFromConfig(flatgeobufConfig);
@@ -7845,6 +8029,31 @@ const pointInPolygon = (pt, poly) => {
             map.setStyle(args[0]);
             break;
 
+          case 'setBackgroundVisibility': {
+            const backgroundVisibility = args[0] ? 'visible' : 'none';
+            getBackgroundLayers(map).forEach(layer => {
+              map.setLayoutProperty(layer.id, 'visibility', backgroundVisibility);
+            });
+            break;
+          }
+
+          case 'setBackgroundOpacity': {
+            const backgroundOpacity = args[0];
+            getBackgroundLayers(map).forEach(layer => {
+              try {
+                if (layer.type === 'symbol') {
+                  map.setPaintProperty(layer.id, 'icon-opacity', backgroundOpacity);
+                  map.setPaintProperty(layer.id, 'text-opacity', backgroundOpacity);
+                } else {
+                  map.setPaintProperty(layer.id, `${layer.type}-opacity`, backgroundOpacity);
+                }
+              } catch (error) {
+                console.warn(`Failed to set opacity for layer ${layer.id}:`, error);
+              }
+            });
+            break;
+          }
+
           case 'enableFeaturePopup':
             enableFeaturePopup(args[0] || {});
             break;
@@ -7913,6 +8122,13 @@ const pointInPolygon = (pt, poly) => {
             el._markers.push(marker);
             break;
 
+          case 'addMarkers': {
+            (args[0] || []).forEach(batchMarkerData => {
+              executeMapMethod(map, { method: 'addMarker', args: [batchMarkerData] }, el);
+            });
+            break;
+          }
+
           case 'addMarkerGroup':
             const groupData = args[0];
             const layerId = groupData.layerId;
@@ -8048,6 +8264,12 @@ const pointInPolygon = (pt, poly) => {
             map.fitBounds(bounds, options || {});
             break;
 
+          case 'addControls':
+            (args[0] || []).forEach(([batchControlType, batchControlOptions]) => {
+              executeMapMethod(map, { method: 'addControl', args: [batchControlType, batchControlOptions] }, el);
+            });
+            break;
+
           case 'addControl':
             const [controlType, controlOptions] = args;
             const position = controlOptions?.position || 'top-right';
@@ -9084,7 +9306,8 @@ const pointInPolygon = (pt, poly) => {
             break;
 
           case 'loadDrawData':
-            const [geojsonData] = args;
+            // Python sends the data through the _draw_data trait
+            const geojsonData = args.length > 0 ? args[0] : model.get('_draw_data');
             try {
               if (el._drawControl) {
                 // Clear existing data first
@@ -9254,7 +9477,8 @@ const pointInPolygon = (pt, poly) => {
             break;
 
           case 'loadTerraDrawData':
-            const [terraGeojsonData] = args;
+            // Python sends the data through the _terra_draw_data trait
+            const terraGeojsonData = args.length > 0 ? args[0] : model.get('_terra_draw_data');
             try {
               if (el._terraDrawControl) {
                 // Get the Terra Draw instance from the control
@@ -24,15 +24,160 @@ Example:
     >>> style = construct_maplibre_style("dark-matter")
 """
 
+import copy
+import functools
 import json
 import os
-import requests
+import re
+import sys
 import warnings
-from typing import Optional, Dict, Any, Union, List, Tuple
+from typing import (
+    IO,
+    Container,
+    Iterable,
+    Optional,
+    Dict,
+    Any,
+    Union,
+    List,
+    Sequence,
+    Set,
+    Tuple,
+    TYPE_CHECKING,
+)
+
+# requests, duckdb, geopandas and pandas are slow to import, so they are
+# imported by the functions that need them
+if TYPE_CHECKING:
+    import geopandas as gpd
+    import pandas as pd
+    import requests
+
+try:
+    import orjson
+
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+_ASSET_CACHE: Dict[Tuple[str, int], str] = {}
+
+
+def read_asset(*parts: str) -> str:
+    """Reads a text file bundled with the package, such as a widget's JS or CSS.
+
+    The decoded contents are cached per path and modification time, so that
+    re-importing a widget module (e.g. with IPython autoreload) does not read
+    and decode the same file again.
+
+    Args:
+        *parts (str): Path components relative to the package directory,
+            e.g. ("static", "maplibre_widget.js").
+
+    Returns:
+        str: The file contents.
+    """
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), *parts)
+    key = (path, os.stat(path).st_mtime_ns)
+    content = _ASSET_CACHE.get(key)
+    if content is None:
+        with open(path, "rb") as f:
+            content = f.read().decode("utf-8")
+        _ASSET_CACHE[key] = content
+    return content
+
+
+class BundledAsset:
+    """Widget class attribute that reads a bundled asset on first use.
 
-import duckdb
-import geopandas as gpd
-import pandas as pd
+    Assigning `_esm = BundledAsset("static", "maplibre_widget.js")` in a widget
+    class defers reading the file from import time to the creation of the first
+    widget, so that importing a backend module does no file I/O.
+
+    Args:
+        *parts (str): Path components relative to the package directory,
+            passed to `read_asset`.
+        default (Optional[str], optional): Text to use if the file is missing.
+            Defaults to None, in which case FileNotFoundError is raised.
+    """
+
+    def __init__(self, *parts: str, default: Optional[str] = None) -> None:
+        self.parts = parts
+        self.default = default
+
+    def __get__(self, instance: Any, owner: Optional[type] = None) -> Any:
+        # Accessed on the class, e.g. by AnyWidget.__init_subclass__
+        if instance is None:
+            return self
+        try:
+            return read_asset(*self.parts)
+        except FileNotFoundError:
+            if self.default is None:
+                raise
+            return self.default
+
+
+_HTML_TEMPLATE_PLACEHOLDER = re.compile(
+    r"\{(title|width|height|map_state_json|access_token_warning|draw_styles_json"
+    r"|export_script|sources_json)\}"
+)
+
+
+@functools.lru_cache(maxsize=8)
+def _split_html_template(template_content: str) -> Tuple[str, ...]:
+    """Prepare an HTML export template once for placeholder substitution.
+
+    Double braces used to escape Python str.format in the template asset are
+    normalized to single braces, and the result is split at the placeholders.
+
+    Args:
+        template_content: The raw template text.
+
+    Returns:
+        Literal template text alternating with placeholder names.
+    """
+    template_content = template_content.replace("{{", "{").replace("}}", "}")
+    return tuple(_HTML_TEMPLATE_PLACEHOLDER.split(template_content))
+
+
+def render_html_template(
+    template_name: str,
+    values: Dict[str, Union[str, Sequence[str]]],
+    file: Optional[IO[str]] = None,
+) -> Optional[str]:
+    """Fills the placeholders of an HTML export template bundled with the package.
+
+    Args:
+        template_name (str): File name in the package's templates directory,
+            e.g. "maplibre_template.html".
+        values (Dict[str, Union[str, Sequence[str]]]): Replacement text for
+            each placeholder used by the template, either a string or a
+            sequence of strings to be concatenated.
+        file (Optional[IO[str]], optional): Text file to write the document to.
+            The template text and the replacement fragments are written one
+            after the other, so that the document is never held in memory as a
+            whole. Defaults to None.
+
+    Returns:
+        Optional[str]: The rendered HTML document, or None if it was written
+            to `file`.
+    """
+    template_parts = _split_html_template(read_asset("templates", template_name))
+    chunks = []
+    # Odd items are placeholder names, even items are literal template text
+    for i, part in enumerate(template_parts):
+        if not i % 2:
+            chunks.append(part)
+        elif isinstance(values[part], str):
+            chunks.append(values[part])
+        else:
+            chunks.extend(values[part])
+    if file is None:
+        return "".join(chunks)
+    for chunk in chunks:
+        file.write(chunk)
+    return None
 
 
 def _in_colab_shell() -> bool:
@@ -42,6 +187,26 @@ def _in_colab_shell() -> bool:
     return "google.colab" in sys.modules
 
 
+@functools.lru_cache(maxsize=None)
+def get_http_session() -> "requests.Session":
+    """Returns a shared requests session for fetching styles and metadata.
+
+    Reusing one session keeps connections to the same host (e.g. MapTiler)
+    alive, so repeated fetches skip the TCP and TLS handshakes.
+
+    Returns:
+        requests.Session: The shared session.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
 def get_env_var(name: Optional[str] = None, key: Optional[str] = None) -> Optional[str]:
     """
     Retrieves an environment variable. If a key is provided, it is returned directly. If a
@@ -144,7 +309,7 @@ def construct_maptiler_style(style: str, api_key: Optional[str] = None) -> str:
 
     url = f"https://api.maptiler.com/maps/{style}/style.json?key={api_key}"
 
-    response = requests.get(url, timeout=10)
+    response = get_http_session().get(url, timeout=10)
     if response.status_code != 200:
         # print(
         #     "Failed to retrieve the MapTiler style. Defaulting to OpenFreeMap 'liberty' style."
@@ -300,31 +465,95 @@ def maptiler_3d_style(
     return style
 
 
+_CARTO_BASEMAPS = [
+    "dark-matter",
+    "positron",
+    "voyager",
+    "positron-nolabels",
+    "dark-matter-nolabels",
+    "voyager-nolabels",
+]
+_OPENFREEMAP_BASEMAPS = [
+    "liberty",
+    "bright",
+    "positron2",
+]
+
+
+def _is_builtin_style(style: str) -> bool:
+    """Checks whether a style name is constructed without network requests.
+
+    Args:
+        style (str): The name of the MapLibre style.
+
+    Returns:
+        bool: True for the CARTO, OpenFreeMap, demo, 3D and Amazon styles.
+    """
+    return (
+        style.startswith(("3d-", "amazon-"))
+        or style.lower() in _CARTO_BASEMAPS
+        or style.lower() in _OPENFREEMAP_BASEMAPS
+        or style == "demotiles"
+    )
+
+
 def construct_maplibre_style(style: str, **kwargs) -> str:
     """
     Constructs a URL for a MapLibre style.
 
+    Built-in styles, which are constructed without network requests, are
+    memoized per style name, keyword arguments and API keys, so creating many
+    maps with the same style does not repeat the work. Style URLs and MapTiler
+    styles are fetched every time, so that changes to a hosted style are
+    picked up and a failed request is not remembered. Use
+    `construct_maplibre_style.cache_clear()` to reset the cache.
+
     Args:
         style (str): The name of the MapLibre style to be accessed.
     """
-    carto_basemaps = [
-        "dark-matter",
-        "positron",
-        "voyager",
-        "positron-nolabels",
-        "dark-matter-nolabels",
-        "voyager-nolabels",
-    ]
-    openfreemap_basemaps = [
-        "liberty",
-        "bright",
-        "positron2",
-    ]
+    if not isinstance(style, str) or not _is_builtin_style(style):
+        return _construct_maplibre_style(style, **kwargs)
+
+    api_keys = (os.environ.get("MAPTILER_KEY"), os.environ.get("AWS_MAPS_API_KEY"))
+    try:
+        result = _construct_maplibre_style_cached(
+            style, tuple(sorted(kwargs.items())), api_keys
+        )
+    except TypeError:  # unhashable keyword arguments
+        return _construct_maplibre_style(style, **kwargs)
+    if isinstance(result, dict):
+        result = copy_json(result)
+    return result
+
+
+@functools.lru_cache(maxsize=64)
+def _construct_maplibre_style_cached(
+    style: str, kwargs: Tuple[Tuple[str, Any], ...], api_keys: Tuple
+) -> Union[str, Dict[str, Any]]:
+    """Memoized wrapper of `_construct_maplibre_style`.
+
+    `api_keys` is only part of the cache key so that setting an API key
+    invalidates previously constructed styles.
+    """
+    return _construct_maplibre_style(style, **dict(kwargs))
+
+
+construct_maplibre_style.cache_clear = _construct_maplibre_style_cached.cache_clear
+
+
+def _construct_maplibre_style(style: str, **kwargs) -> str:
+    """Constructs a URL for a MapLibre style without caching.
+
+    Args:
+        style (str): The name of the MapLibre style to be accessed.
+    """
+    carto_basemaps = _CARTO_BASEMAPS
+    openfreemap_basemaps = _OPENFREEMAP_BASEMAPS
 
     if isinstance(style, str):
 
         if style.startswith("https"):
-            response = requests.get(style, timeout=10)
+            response = get_http_session().get(style, timeout=10)
             if response.status_code != 200:
                 print(
                     "The provided style URL is invalid. Falling back to 'dark-matter'."
@@ -364,6 +593,118 @@ def construct_maplibre_style(style: str, **kwargs) -> str:
     return style
 
 
+def json_dumps(obj: Any, indent: bool = False) -> str:
+    """Serializes an object to a JSON string, using orjson when available.
+
+    orjson is a compiled JSON library that is several times faster than the
+    standard library encoder, especially for large GeoJSON payloads and when
+    pretty-printing. It also serializes numpy arrays and scalars natively. The
+    standard library is used as a fallback.
+
+    Args:
+        obj (Any): The object to serialize.
+        indent (bool, optional): Whether to pretty-print the output with an
+            indentation of two spaces. Defaults to False.
+
+    Returns:
+        str: The JSON string.
+    """
+    if HAS_ORJSON:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, option=option).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(obj, indent=2 if indent else None)
+
+
+def copy_json(obj: Any) -> Any:
+    """Returns a deep copy of a JSON-compatible object, such as a map style.
+
+    With orjson, a serialization round trip is about ten times faster than
+    `copy.deepcopy` for large style documents. Tuples are copied as lists.
+    Objects that orjson cannot serialize are copied with `copy.deepcopy`.
+
+    Args:
+        obj (Any): The object to copy.
+
+    Returns:
+        Any: The copy.
+    """
+    if HAS_ORJSON:
+        try:
+            return orjson.loads(orjson.dumps(obj))
+        except TypeError:
+            pass
+    return copy.deepcopy(obj)
+
+
+def json_loads(data: Union[str, bytes]) -> Any:
+    """Parses a JSON string or bytes, using orjson when available.
+
+    Args:
+        data (Union[str, bytes]): The JSON document to parse.
+
+    Returns:
+        Any: The parsed object.
+    """
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def enable_orjson_comm(session: Any = None) -> bool:
+    """Serializes Jupyter kernel messages, including widget state, with orjson.
+
+    Widget traits such as the layers and sources of a map are converted to
+    JSON by the kernel's message session, not by the widget, so large GeoJSON
+    sources are encoded and decoded with the standard library on every sync.
+    This replaces the session's packer and unpacker with orjson, which is
+    several times faster. Messages that orjson cannot handle fall back to the
+    original functions.
+
+    Args:
+        session (Any, optional): The jupyter_client Session to patch. Defaults
+            to None, which uses the session of the running IPython kernel.
+
+    Returns:
+        bool: True if orjson is used, False if orjson is not installed or no
+            kernel session is available.
+    """
+    if not HAS_ORJSON:
+        return False
+    if session is None:
+        try:
+            from IPython import get_ipython
+
+            session = get_ipython().kernel.session
+        except (ImportError, AttributeError):
+            return False
+    if getattr(session, "_orjson_enabled", False):
+        return True
+
+    pack, unpack = session.pack, session.unpack
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC
+
+    def orjson_pack(obj: Any) -> bytes:
+        try:
+            return orjson.dumps(obj, option=option)
+        except TypeError:
+            return pack(obj)
+
+    def orjson_unpack(data: bytes) -> Any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return unpack(data)
+
+    session.pack, session.unpack = orjson_pack, orjson_unpack
+    session._orjson_enabled = True
+    return True
+
+
 def replace_top_level_hyphens(d: Union[Dict, Any]) -> Union[Dict, Any]:
     """
     Replaces hyphens with underscores in top-level dictionary keys.
@@ -420,13 +761,15 @@ def replace_underscores_in_keys(d: Union[Dict, List, Any]) -> Union[Dict, List,
         return d
 
 
-def get_unique_name(name: str, names: list, overwrite: bool = False) -> str:
+def get_unique_name(name: str, names: Container[str], overwrite: bool = False) -> str:
     """
     Generates a unique name based on the input name and existing names.
 
     Args:
         name (str): The base name to generate a unique name from.
-        names (list): A list of existing names to check against.
+        names (Container[str]): The existing names to check against. A set or
+            dict gives constant-time lookups, so there is no need to copy the
+            keys of a dict into a list first.
         overwrite (bool, optional): If True, the function will return the original name even if it exists in the list. Defaults to False.
 
     Returns:
@@ -749,6 +1092,99 @@ def get_local_tile_url(
         return url
 
 
+_GEOJSON_PAYLOADS: Dict[str, bytes] = {}
+_GEOJSON_SERVER = None
+
+
+def serve_geojson(
+    geojson: Union[Dict[str, Any], str, bytes],
+    prefix: Optional[str] = None,
+) -> str:
+    """Serves GeoJSON data from a local HTTP server running in the kernel.
+
+    The data is serialized once and kept in memory by a lightweight server
+    running in a background thread, so that MapLibre can fetch and parse it
+    directly instead of receiving it through the widget state.
+
+    If you are using this function in JupyterHub on a remote server, install
+    jupyter-server-proxy so that the server can be reached through the proxy.
+    As with local raster tiles, the proxy prefix can also be set with:
+
+        import os
+        os.environ['LOCALTILESERVER_CLIENT_PREFIX'] = 'proxy/{port}'
+
+    Args:
+        geojson (Union[Dict[str, Any], str, bytes]): The GeoJSON dictionary or
+            an already serialized GeoJSON document.
+        prefix (str, optional): URL prefix used to reach the server, with a
+            `{port}` placeholder, e.g. 'proxy/{port}'. Defaults to None, which
+            uses the JupyterHub proxy if available and localhost otherwise.
+
+    Returns:
+        str: The URL of the served GeoJSON document.
+    """
+    import threading
+    import uuid
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    global _GEOJSON_SERVER
+
+    if isinstance(geojson, str):
+        payload = geojson.encode("utf-8")
+    elif isinstance(geojson, bytes):
+        payload = geojson
+    else:
+        payload = json_dumps(geojson).encode("utf-8")
+
+    if _GEOJSON_SERVER is None:
+
+        class GeoJSONRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                token = self.path.lstrip("/").split("?")[0]
+                data = _GEOJSON_PAYLOADS.get(token)
+                if data is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/geo+json")
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("Access-Control-Allow-Origin", "*")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        _GEOJSON_SERVER = ThreadingHTTPServer(("127.0.0.1", 0), GeoJSONRequestHandler)
+        threading.Thread(target=_GEOJSON_SERVER.serve_forever, daemon=True).start()
+
+    token = f"{uuid.uuid4().hex}.geojson"
+    _GEOJSON_PAYLOADS[token] = payload
+    port = _GEOJSON_SERVER.server_address[1]
+
+    if prefix is None:
+        prefix = os.environ.get("LOCALTILESERVER_CLIENT_PREFIX")
+    if prefix is None and os.environ.get("JUPYTERHUB_SERVICE_PREFIX") is not None:
+        prefix = f"{os.environ['JUPYTERHUB_SERVICE_PREFIX'].strip('/')}/proxy/{{port}}"
+
+    if prefix is not None:
+        return f"/{prefix.format(port=port).strip('/')}/{token}"
+    return f"http://127.0.0.1:{port}/{token}"
+
+
+def unserve_geojson(url: Optional[str]) -> None:
+    """Stops serving GeoJSON data served with `serve_geojson`.
+
+    The data is released from memory and its URL returns 404 afterwards.
+
+    Args:
+        url (Optional[str]): The URL returned by `serve_geojson`. None is
+            ignored.
+    """
+    if url is not None:
+        _GEOJSON_PAYLOADS.pop(url.rsplit("/", 1)[-1], None)
+
+
 def get_api_key(name: Optional[str] = None, key: Optional[str] = None) -> Optional[str]:
     """
     Retrieves an API key. If a key is provided, it is returned directly. If a
@@ -1342,12 +1778,12 @@ def download_file(
 
 
 def df_to_gdf(
-    df: pd.DataFrame,
+    df: "pd.DataFrame",
     geometry: str = "geometry",
     src_crs: str = "EPSG:4326",
     dst_crs: str = None,
     **kwargs: Any,
-) -> gpd.GeoDataFrame:
+) -> "gpd.GeoDataFrame":
     """
     Converts a pandas DataFrame to a GeoPandas GeoDataFrame.
 
@@ -1375,6 +1811,310 @@ def df_to_gdf(
     return gdf
 
 
+def read_geojson_text(data: Any) -> Optional[str]:
+    """Returns the text of an already serialized GeoJSON document.
+
+    Args:
+        data (Any): A JSON string, UTF-8 encoded bytes, or the path of a local
+            GeoJSON file. Anything else, including strings that are not a JSON
+            object such as URLs, is not considered serialized GeoJSON.
+
+    Returns:
+        Optional[str]: The GeoJSON text, or None if `data` is not serialized
+            GeoJSON.
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return bytes(data).decode("utf-8")
+    if isinstance(data, os.PathLike):
+        with open(data, encoding="utf-8") as f:
+            return f.read()
+    if isinstance(data, str) and data.lstrip().startswith("{"):
+        return data
+    return None
+
+
+def is_geopandas_object(obj: Any) -> bool:
+    """Checks whether an object is a GeoDataFrame or GeoSeries.
+
+    geopandas is not imported for the check: if it has not been imported yet,
+    the object cannot be one of its types.
+
+    Args:
+        obj (Any): The object to check.
+
+    Returns:
+        bool: True if the object is a GeoDataFrame or GeoSeries.
+    """
+    gpd = sys.modules.get("geopandas")
+    if gpd is None:
+        return False
+    return isinstance(obj, (gpd.GeoDataFrame, gpd.GeoSeries))
+
+
+def _round_coordinates(coordinates: Any, precision: int) -> Any:
+    """Round a (nested) GeoJSON coordinate array to the given precision."""
+    if isinstance(coordinates, (list, tuple)):
+        if coordinates and isinstance(coordinates[0], (int, float)):
+            return [round(value, precision) for value in coordinates]
+        if len(coordinates) > 16 and isinstance(coordinates[0], (list, tuple)):
+            # Round long position lists (lines and rings) in a single NumPy pass
+            import numpy as np
+
+            try:
+                array = np.asarray(coordinates, dtype=float)
+            except ValueError:
+                # Positions with a varying number of dimensions
+                array = None
+            if array is not None and array.ndim == 2:
+                return np.round(array, precision).tolist()
+        return [_round_coordinates(item, precision) for item in coordinates]
+    return coordinates
+
+
+def round_geojson_coordinates(
+    geojson: Dict[str, Any], precision: int = 6
+) -> Dict[str, Any]:
+    """Rounds the coordinates of a GeoJSON object to a number of decimal places.
+
+    MapLibre renders in single precision, so digits beyond ~6 decimal places
+    (about 11 cm at the equator) only inflate the payload sent to the browser.
+
+    Args:
+        geojson (Dict[str, Any]): A GeoJSON FeatureCollection, Feature or geometry.
+        precision (int, optional): Number of decimal places to keep. Defaults to 6.
+
+    Returns:
+        Dict[str, Any]: A new GeoJSON object with rounded coordinates. The input
+            is not modified.
+    """
+    if not isinstance(geojson, dict):
+        return geojson
+    geojson_type = geojson.get("type")
+    if geojson_type == "FeatureCollection":
+        features = [
+            round_geojson_coordinates(feature, precision)
+            for feature in geojson.get("features", [])
+        ]
+        return {**geojson, "features": features}
+    if geojson_type == "Feature":
+        geometry = round_geojson_coordinates(geojson.get("geometry"), precision)
+        return {**geojson, "geometry": geometry}
+    if geojson_type == "GeometryCollection":
+        geometries = [
+            round_geojson_coordinates(geometry, precision)
+            for geometry in geojson.get("geometries", [])
+        ]
+        return {**geojson, "geometries": geometries}
+    if "coordinates" in geojson:
+        coordinates = _round_coordinates(geojson["coordinates"], precision)
+        return {**geojson, "coordinates": coordinates}
+    return geojson
+
+
+def gdf_to_geojson(
+    gdf: Union["gpd.GeoDataFrame", "gpd.GeoSeries"],
+    precision: Optional[int] = None,
+    simplify_tolerance: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Converts a GeoDataFrame or GeoSeries to a GeoJSON FeatureCollection.
+
+    Geometries are encoded in one vectorized call to `shapely.to_geojson` and
+    the attribute table with `DataFrame.to_json`, instead of building every
+    feature through `__geo_interface__`, which is much slower for large
+    datasets. Timestamps are written as ISO 8601 strings.
+
+    Args:
+        gdf (Union[gpd.GeoDataFrame, gpd.GeoSeries]): The data to convert.
+        precision (Optional[int], optional): If set, round coordinates to this
+            many decimal places. Defaults to None.
+        simplify_tolerance (Optional[float], optional): If set, simplify line
+            and polygon geometries with the Douglas-Peucker algorithm, using
+            this tolerance in the units of the data's CRS. Defaults to None.
+
+    Returns:
+        Dict[str, Any]: The GeoJSON FeatureCollection.
+    """
+    import geopandas as gpd
+    import numpy as np
+    import pandas as pd
+    import shapely
+
+    if isinstance(gdf, gpd.GeoSeries):
+        gdf = gdf.to_frame()
+    if simplify_tolerance is not None:
+        gdf = gdf.set_geometry(
+            gdf.geometry.simplify(simplify_tolerance, preserve_topology=False)
+        )
+    if not hasattr(shapely, "to_geojson"):
+        geojson = gdf.__geo_interface__
+        if precision is not None:
+            geojson = round_geojson_coordinates(geojson, precision)
+        return geojson
+
+    geometry_array = np.asarray(gdf.geometry.array)
+    if precision is not None:
+        geometry_array = shapely.transform(
+            geometry_array, lambda coords: np.round(coords, precision)
+        )
+
+    try:
+        geometries = shapely.to_geojson(geometry_array)
+    except Exception:
+        # e.g. empty points, which GEOS cannot encode as GeoJSON
+        geojson = gdf.__geo_interface__
+        if precision is not None:
+            geojson = round_geojson_coordinates(geojson, precision)
+        return geojson
+
+    geometries = json_loads(
+        "[" + ",".join("null" if g is None else g for g in geometries) + "]"
+    )
+    attributes = pd.DataFrame(gdf.drop(columns=gdf.geometry.name))
+    if len(attributes.columns):
+        properties = json_loads(attributes.to_json(orient="records", date_format="iso"))
+    else:
+        properties = [{} for _ in range(len(attributes))]
+    features = [
+        {"id": str(index), "type": "Feature", "properties": props, "geometry": geom}
+        for index, props, geom in zip(gdf.index, properties, geometries)
+    ]
+    return {"type": "FeatureCollection", "features": features}
+
+
+def simplify_geojson(geojson: Dict[str, Any], tolerance: float) -> Dict[str, Any]:
+    """Simplifies the line and polygon geometries of a GeoJSON object.
+
+    The geometries are simplified with the Douglas-Peucker algorithm in one
+    vectorized call to `shapely.simplify`, which greatly reduces the number of
+    vertices sent to the browser for detailed datasets.
+
+    Args:
+        geojson (Dict[str, Any]): A GeoJSON FeatureCollection, Feature or geometry.
+        tolerance (float): The simplification tolerance, in the units of the
+            coordinates (degrees for GeoJSON).
+
+    Returns:
+        Dict[str, Any]: A new GeoJSON object with simplified geometries. The
+            input is not modified.
+    """
+    import shapely
+    from shapely.geometry import shape
+
+    geojson_type = geojson.get("type")
+    if geojson_type == "FeatureCollection":
+        features = geojson.get("features", [])
+    elif geojson_type == "Feature":
+        features = [geojson]
+    else:
+        features = [{"geometry": geojson}]
+
+    # Points cannot be simplified, so leave them untouched
+    indices = [
+        i
+        for i, feature in enumerate(features)
+        if (feature.get("geometry") or {}).get("type")
+        not in (None, "Point", "MultiPoint")
+    ]
+    geometries = shapely.simplify(
+        [shape(features[i]["geometry"]) for i in indices],
+        tolerance,
+        preserve_topology=False,
+    )
+    simplified = list(features)
+    for i, geometry in zip(indices, shapely.to_geojson(geometries)):
+        simplified[i] = {**features[i], "geometry": json_loads(geometry)}
+
+    if geojson_type == "FeatureCollection":
+        return {**geojson, "features": simplified}
+    if geojson_type == "Feature":
+        return simplified[0]
+    return simplified[0]["geometry"]
+
+
+# {name} tokens of legacy style strings such as "{name} ({population})"
+_STYLE_TOKEN = re.compile(r"\{([^{}]+)\}")
+# Comparison operators of legacy filters such as ["==", name, value]
+_LEGACY_FILTER_OPERATORS = ("==", "!=", "<", "<=", ">", ">=", "in", "!in")
+
+
+def get_style_property_names(*styles: Any) -> Set[str]:
+    """Collects the feature properties referenced by layer styles.
+
+    Properties are found in `["get", name]` and `["has", name]` expressions,
+    in legacy filters such as `["==", name, value]`, in legacy property
+    functions (`{"property": name, "stops": [...]}`) and in `{name}` tokens
+    of strings such as a legacy `text-field`.
+
+    Args:
+        *styles (Any): Paint or layout dictionaries, filter expressions, or any
+            other style values to scan.
+
+    Returns:
+        Set[str]: The names of the referenced properties.
+    """
+    names = set()
+    stack = list(styles)
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            if isinstance(value.get("property"), str):
+                names.add(value["property"])
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            if (
+                len(value) == 2
+                and value[0] in ("get", "has", "!has")
+                and isinstance(value[1], str)
+            ):
+                names.add(value[1])
+            elif (
+                len(value) >= 2
+                and value[0] in _LEGACY_FILTER_OPERATORS
+                and isinstance(value[1], str)
+                and not any(isinstance(v, (list, tuple)) for v in value[2:])
+            ):
+                # Legacy filter: the second item is a property name, unless
+                # it is one of the special `$type` or `$id` keys
+                if not value[1].startswith("$"):
+                    names.add(value[1])
+            else:
+                stack.extend(value)
+        elif isinstance(value, str) and "{" in value:
+            names.update(_STYLE_TOKEN.findall(value))
+    return names
+
+
+def select_geojson_properties(
+    geojson: Dict[str, Any], names: Iterable[str]
+) -> Dict[str, Any]:
+    """Keeps only the given properties of the features of a GeoJSON object.
+
+    Args:
+        geojson (Dict[str, Any]): A GeoJSON FeatureCollection or Feature.
+        names (Iterable[str]): The names of the properties to keep.
+
+    Returns:
+        Dict[str, Any]: A new GeoJSON object. The input is not modified.
+    """
+    names = tuple(names)
+
+    def select(feature):
+        properties = feature.get("properties") or {}
+        return {
+            **feature,
+            "properties": {
+                name: properties[name] for name in names if name in properties
+            },
+        }
+
+    geojson_type = geojson.get("type")
+    if geojson_type == "FeatureCollection":
+        return {**geojson, "features": [select(f) for f in geojson["features"]]}
+    if geojson_type == "Feature":
+        return select(geojson)
+    return geojson
+
+
 def geojson_bounds(geojson: dict) -> Optional[list]:
     """
     Calculate the bounds of a GeoJSON object.
@@ -1412,6 +2152,8 @@ def geojson_to_duckdb(
         overwrite: If True, replace existing table. If False, create only if not exists.
             Defaults to True.
     """
+    import geopandas as gpd
+
     duckdb_install_extensions(con)
 
     # Load GeoJSON into a GeoDataFrame
@@ -1485,7 +2227,7 @@ def duckdb_to_gdf(
     columns: Optional[List[str]] = None,
     src_crs: str = "EPSG:4326",
     dst_crs: str = "EPSG:4326",
-) -> gpd.GeoDataFrame:
+) -> "gpd.GeoDataFrame":
     """Convert a DuckDB table to a GeoPandas GeoDataFrame.
 
     Args:
@@ -1543,7 +2285,7 @@ def vector_to_duckdb(
         con.sql(query)
     elif isinstance(data, dict):
         geojson_to_duckdb(data, table_name, con, overwrite)
-    elif isinstance(data, gpd.GeoDataFrame):
+    elif is_geopandas_object(data):
         geojson_to_duckdb(data.__geo_interface__, table_name, con, overwrite)
     else:
         raise ValueError(f"Unsupported data type: {type(data)}")
@@ -1613,7 +2355,7 @@ def geojson_intersect_duckdb(
     crs: str = "EPSG:4326",
     distance: float = None,
     distance_unit: str = "meters",
-) -> pd.DataFrame:
+) -> "pd.DataFrame":
     """Query features from a DuckDB table that intersect with a GeoJSON geometry.
 
     This function performs a spatial intersection query against a DuckDB table with
@@ -1631,6 +2373,7 @@ def geojson_intersect_duckdb(
         The geometry column is returned as Well-Known Text (WKT). Returns an empty
         DataFrame with the same column structure if no features intersect.
     """
+    import geopandas as gpd
     from shapely import wkt
 
     duckdb_install_extensions(con)
@@ -1669,6 +2412,8 @@ def get_crs(filepath: str) -> str:
     Returns:
         The CRS of the file.
     """
+    import duckdb
+
     con = duckdb.connect()
     duckdb_install_extensions(con)
 
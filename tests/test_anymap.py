@@ -2,158 +2,317 @@
 
 """Tests for `anymap` package."""
 
-import unittest
+from collections import Counter
+from types import MappingProxyType
 from unittest.mock import Mock, patch
+
+import pytest
+
 from anymap import MapWidget, MapLibreMap, MapboxMap, CesiumMap
 
 
-class TestMapWidget(unittest.TestCase):
-    """Test cases for the base MapWidget class."""
+def js_methods(widget):
+    """Count the JavaScript calls queued on a widget by method name."""
+    return Counter(call["method"] for call in widget._js_calls)
 
-    def setUp(self):
-        """Set up test fixtures."""
-        self.widget = MapWidget()
 
-    def test_initialization(self):
-        """Test widget initialization."""
-        self.assertEqual(self.widget.center, [0.0, 0.0])
-        self.assertEqual(self.widget.zoom, 2.0)
-        self.assertEqual(self.widget.width, "100%")
-        self.assertEqual(self.widget.height, "600px")
-        self.assertEqual(self.widget._js_calls, [])
-        self.assertEqual(self.widget._js_events, [])
-
-    def test_set_center(self):
-        """Test setting map center."""
-        self.widget.set_center(40.7128, -74.0060)
-        self.assertEqual(self.widget.center, [40.7128, -74.0060])
+@pytest.fixture
+def widget():
+    """Create a base map widget."""
+    return MapWidget()
 
-    def test_set_zoom(self):
-        """Test setting map zoom."""
-        self.widget.set_zoom(12)
-        self.assertEqual(self.widget.zoom, 12)
 
-    def test_call_js_method(self):
-        """Test calling JavaScript methods."""
-        self.widget.call_js_method("testMethod", 1, 2, keyword="value")
+def _create_maplibre_map():
+    """Create a MapLibre map that does not fetch its style."""
+    return MapLibreMap(
+        center=[-122.4194, 37.7749], zoom=12, style="dark-matter", controls={}
+    )
 
-        calls = self.widget._js_calls
-        self.assertEqual(len(calls), 1)
-        self.assertEqual(calls[0]["method"], "testMethod")
-        self.assertEqual(calls[0]["args"], (1, 2))
-        self.assertEqual(calls[0]["kwargs"], {"keyword": "value"})
-        self.assertIn("id", calls[0])
 
-    def test_fly_to(self):
-        """Test fly_to method."""
-        self.widget.fly_to(51.5074, -0.1278, zoom=14)
-
-        calls = self.widget._js_calls
-        self.assertEqual(len(calls), 1)
-        self.assertEqual(calls[0]["method"], "flyTo")
-        self.assertEqual(calls[0]["args"][0]["center"], [51.5074, -0.1278])
-        self.assertEqual(calls[0]["args"][0]["zoom"], 14)
-
-    def test_add_layer(self):
-        """Test adding a layer."""
-        layer_config = {"id": "test", "type": "circle"}
-        self.widget.add_layer("test-layer", layer_config)
-
-        calls = self.widget._js_calls
-        self.assertEqual(len(calls), 1)
-        self.assertEqual(calls[0]["method"], "addLayer")
-        self.assertEqual(calls[0]["args"], (layer_config, "test-layer"))
-
-    def test_remove_layer(self):
-        """Test removing a layer."""
-        self.widget.remove_layer("test-layer")
-
-        calls = self.widget._js_calls
-        self.assertEqual(len(calls), 1)
-        self.assertEqual(calls[0]["method"], "removeLayer")
-        self.assertEqual(calls[0]["args"], ("test-layer",))
-
-    def test_add_source(self):
-        """Test adding a data source."""
-        source_config = {"type": "geojson", "data": {}}
-        self.widget.add_source("test-source", source_config)
+@pytest.fixture
+def maplibre_map():
+    """Create a MapLibre map for a test that changes it."""
+    return _create_maplibre_map()
+
 
-        calls = self.widget._js_calls
-        self.assertEqual(len(calls), 1)
-        self.assertEqual(calls[0]["method"], "addSource")
-        self.assertEqual(calls[0]["args"], ("test-source", source_config))
+@pytest.fixture(scope="module")
+def shared_maplibre_map():
+    """Create a MapLibre map shared by the tests that only read it."""
+    return _create_maplibre_map()
 
-    def test_remove_source(self):
-        """Test removing a data source."""
-        self.widget.remove_source("test-source")
 
-        calls = self.widget._js_calls
-        self.assertEqual(len(calls), 1)
-        self.assertEqual(calls[0]["method"], "removeSource")
-        self.assertEqual(calls[0]["args"], ("test-source",))
+@pytest.fixture
+def nyc_map():
+    """Create a MapLibre map centered on New York."""
+    return MapLibreMap(center=[40.7128, -74.0060], zoom=12)
+
+
+@pytest.fixture
+def mapbox_map():
+    """Create a Mapbox map."""
+    return MapboxMap(
+        center=[-122.4194, 37.7749],
+        zoom=12,
+        style="mapbox://styles/mapbox/streets-v12",
+    )
+
+
+@pytest.fixture
+def cesium_map():
+    """Create a Cesium map."""
+    return CesiumMap(
+        center=[-122.4194, 37.7749],
+        zoom=12,
+        camera_height=15000000,
+    )
+
+
+class TestMapWidget:
+    """Test cases for the base MapWidget class."""
+
+    def test_initialization(self, widget):
+        """Test widget initialization."""
+        assert widget.center == [0.0, 0.0]
+        assert widget.zoom == 2.0
+        assert widget.width == "100%"
+        assert widget.height == "600px"
+        assert widget._js_calls == []
+        assert widget._js_events == []
+
+    def test_set_center(self, widget):
+        """Test setting map center."""
+        widget.set_center(40.7128, -74.0060)
+        assert widget.center == [40.7128, -74.0060]
 
-    def test_event_handling(self):
+    def test_set_zoom(self, widget):
+        """Test setting map zoom."""
+        widget.set_zoom(12)
+        assert widget.zoom == 12
+
+    def test_call_js_method(self, widget):
+        """Test calling JavaScript methods."""
+        widget.call_js_method("testMethod", 1, 2, keyword="value")
+
+        calls = widget._js_calls
+        assert len(calls) == 1
+        assert calls[0]["method"] == "testMethod"
+        assert calls[0]["args"] == (1, 2)
+        assert calls[0]["kwargs"] == {"keyword": "value"}
+        assert "id" in calls[0]
+
+    def test_batch_update(self, widget):
+        """Test that calls inside batch_update are sent in a single sync."""
+        with widget.batch_update():
+            widget.call_js_method("first")
+            with widget.batch_update():
+                widget.call_js_method("second")
+            assert widget._js_calls == []
+
+        calls = widget._js_calls
+        assert [call["method"] for call in calls] == ["first", "second"]
+
+    def test_batch_update_sends_calls_on_error(self, widget):
+        """Test that calls queued before an error are sent with the traits."""
+        with pytest.raises(ValueError):
+            with widget.batch_update():
+                widget.set_zoom(5)
+                widget.call_js_method("first")
+                raise ValueError("failed")
+
+        assert widget.zoom == 5
+        assert [call["method"] for call in widget._js_calls] == ["first"]
+        assert widget._pending_calls is None
+
+    def test_fly_to(self, widget):
+        """Test fly_to method."""
+        widget.fly_to(51.5074, -0.1278, zoom=14)
+
+        calls = widget._js_calls
+        assert len(calls) == 1
+        assert calls[0]["method"] == "flyTo"
+        assert calls[0]["args"][0]["center"] == [51.5074, -0.1278]
+        assert calls[0]["args"][0]["zoom"] == 14
+
+    @pytest.mark.parametrize(
+        ("action", "args", "method", "js_args"),
+        [
+            (
+                "add_layer",
+                ("test-layer", {"id": "test", "type": "circle"}),
+                "addLayer",
+                ({"id": "test", "type": "circle"}, "test-layer"),
+            ),
+            ("remove_layer", ("test-layer",), "removeLayer", ("test-layer",)),
+            (
+                "add_source",
+                ("test-source", {"type": "geojson", "data": {}}),
+                "addSource",
+                ("test-source", {"type": "geojson", "data": {}}),
+            ),
+            ("remove_source", ("test-source",), "removeSource", ("test-source",)),
+        ],
+    )
+    def test_layer_and_source_calls(self, widget, action, args, method, js_args):
+        """Test that adding and removing layers and sources queues one JS call."""
+        getattr(widget, action)(*args)
+
+        calls = widget._js_calls
+        assert len(calls) == 1
+        assert calls[0]["method"] == method
+        assert calls[0]["args"] == js_args
+
+    def test_event_handling(self, widget):
         """Test event handling registration."""
-        callback = Mock()
-        self.widget.on_map_event("click", callback)
+        received = []
+        widget.on_map_event("click", received.append)
 
         # Simulate event from JavaScript
         test_event = [{"type": "click", "data": "test"}]
 
         # Trigger the observer manually
-        self.widget._handle_js_events({"new": test_event})
+        widget._handle_js_events({"new": test_event})
 
-        # Check that callback was called with the event
-        callback.assert_called_with({"type": "click", "data": "test"})
-        # Verify it was called at least once
-        self.assertTrue(callback.called)
+        # Check that the callback was called once with the event
+        assert received == [{"type": "click", "data": "test"}]
+
+    @pytest.mark.slow
+    def test_import_does_not_load_requests(self):
+        """Test that importing anymap leaves requests unimported."""
+        import subprocess
+        import sys
+
+        code = "import sys, anymap; print('requests' in sys.modules)"
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        assert result.stdout.strip() == "False"
+
+    def test_event_throttle(self, widget):
+        """Test that an event throttle interval is sent to the front end."""
+        widget.on_map_event("click", Mock())
+        assert widget._event_throttle == {}
+
+        widget.on_map_event("mousemove", Mock(), throttle_ms=100)
+        widget.on_map_event("move", Mock(), throttle_ms=-5)
+        assert widget._event_throttle == {"mousemove": 100, "move": 0}
+
+    def test_enable_orjson_comm(self):
+        """Test that kernel messages can be packed with orjson."""
+        import json
+        import math
+        from types import SimpleNamespace
+        from anymap import utils
+
+        session = SimpleNamespace(
+            pack=lambda obj: json.dumps(obj, default=repr).encode(),
+            unpack=json.loads,
+        )
+        assert utils.enable_orjson_comm(session)
+        assert utils.enable_orjson_comm(session)
+
+        content = {"_sources": {"s": {"type": "geojson", "data": {"a": (1, 2)}}}}
+        packed = session.pack(content)
+        assert session.unpack(packed) == json.loads(json.dumps(content))
+        # Values orjson cannot serialize and NaN literals use the original functions
+        assert session.pack({"x": {1, 2}}) == b'{"x": "{1, 2}"}'
+        assert math.isnan(session.unpack(b"NaN"))
+
+    def test_deckgl_html_template(self):
+        """Test that the DeckGL export template is filled from the map state."""
+        from anymap.deckgl import DeckGLMap
+
+        html = DeckGLMap._generate_html_template(
+            object.__new__(DeckGLMap),
+            {"center": [0, 0], "zoom": 2, "width": "80%", "height": "400px"},
+            "Export",
+        )
 
+        assert "<title>Export</title>" in html
+        assert "width: 80%;" in html
+        assert '"zoom": 2' in html
+        assert "return new Function('d', `return ${expression}`);" in html
 
-class TestMapLibreMap(unittest.TestCase):
+
+class TestMapLibreMap:
     """Test cases for the MapLibreMap class."""
 
-    def setUp(self):
-        """Set up test fixtures."""
-        self.map = MapLibreMap(
-            center=[-122.4194, 37.7749], zoom=12, style="dark-matter", controls={}
+    def test_initialization(self, shared_maplibre_map):
+        """Test MapLibre map initialization."""
+        assert shared_maplibre_map.center == [-122.4194, 37.7749]
+        assert shared_maplibre_map.zoom == 12
+        assert (
+            shared_maplibre_map.style
+            == "https://basemaps.cartocdn.com/gl/dark-matter-gl-style/style.json"
         )
+        assert shared_maplibre_map.bearing == 0.0
+        assert shared_maplibre_map.pitch == 0.0
+        assert shared_maplibre_map.antialias
 
-    def test_initialization(self):
-        """Test MapLibre map initialization."""
-        self.assertEqual(self.map.center, [-122.4194, 37.7749])
-        self.assertEqual(self.map.zoom, 12)
-        self.assertEqual(
-            self.map.style,
-            "https://basemaps.cartocdn.com/gl/dark-matter-gl-style/style.json",
+    def test_widget_assets_read_on_first_use(self, shared_maplibre_map):
+        """Test that the widget JS and CSS are read when a map is created."""
+        from anymap import utils
+
+        assert isinstance(MapLibreMap.__dict__["_esm"], utils.BundledAsset)
+        assert shared_maplibre_map._esm == utils.read_asset(
+            "static", "maplibre_widget.js"
+        )
+        assert shared_maplibre_map._css == utils.read_asset(
+            "static", "maplibre_widget.css"
         )
-        self.assertEqual(self.map.bearing, 0.0)
-        self.assertEqual(self.map.pitch, 0.0)
-        self.assertTrue(self.map.antialias)
 
-    def test_set_style(self):
+    def test_set_style(self, maplibre_map):
         """Test setting map style."""
         # Test with string style
-        self.map.set_style("https://new-style.com/style.json")
-        self.assertEqual(self.map.style, "https://new-style.com/style.json")
+        maplibre_map.set_style("https://new-style.com/style.json")
+        assert maplibre_map.style == "https://new-style.com/style.json"
 
-        # Test with object style
+        # Test with object style, which is synced through the same trait
         style_obj = {"version": 8, "sources": {}}
-        self.map.set_style(style_obj)
-
-        calls = self.map._js_calls
-        self.assertTrue(any(call["method"] == "setStyle" for call in calls))
-
-    def test_set_bearing(self):
+        maplibre_map.set_style(style_obj)
+        assert maplibre_map.style == style_obj
+        assert "setStyle" not in js_methods(maplibre_map)
+
+    def test_get_style_cached(self, maplibre_map):
+        """Test that the parsed style is cached until the style changes."""
+        style_obj = {
+            "version": 8,
+            "sources": {},
+            "layers": [
+                {"id": "water", "type": "fill"},
+                {"id": "bg", "type": "background"},
+            ],
+        }
+        maplibre_map.set_style(style_obj)
+        assert maplibre_map.get_style() is maplibre_map.get_style()
+        assert maplibre_map.get_style_layers(return_ids=True) == ["bg", "water"]
+
+        maplibre_map.set_style({"version": 8, "sources": {}, "layers": []})
+        assert maplibre_map.get_style_layers(return_ids=True) == []
+
+    def test_background_visibility_and_opacity(self, maplibre_map):
+        """Test that Background updates are sent as a single JS call each."""
+        maplibre_map.set_visibility("Background", False)
+        maplibre_map.set_opacity("Background", 0.5)
+
+        calls = maplibre_map._js_calls
+        assert len(calls) == 2
+        assert calls[0]["method"] == "setBackgroundVisibility"
+        assert calls[0]["args"] == (False,)
+        assert calls[1]["method"] == "setBackgroundOpacity"
+        assert calls[1]["args"] == (0.5,)
+        assert not maplibre_map.layer_dict["Background"]["visible"]
+
+    def test_set_bearing(self, maplibre_map):
         """Test setting map bearing."""
-        self.map.set_bearing(45)
-        self.assertEqual(self.map.bearing, 45)
+        maplibre_map.set_bearing(45)
+        assert maplibre_map.bearing == 45
 
-    def test_set_pitch(self):
+    def test_set_pitch(self, maplibre_map):
         """Test setting map pitch."""
-        self.map.set_pitch(60)
-        self.assertEqual(self.map.pitch, 60)
+        maplibre_map.set_pitch(60)
+        assert maplibre_map.pitch == 60
 
-    def test_add_geojson_layer(self):
+    def test_add_geojson_layer(self, maplibre_map):
         """Test adding GeoJSON layer."""
         geojson_data = {
             "type": "FeatureCollection",
@@ -166,49 +325,1309 @@ class TestMapLibreMap(unittest.TestCase):
             ],
         }
 
-        self.map.add_geojson_layer(
+        maplibre_map.add_geojson_layer(
             layer_id="test-geojson",
             geojson_data=geojson_data,
             layer_type="circle",
             paint={"circle-radius": 5},
         )
 
-        calls = self.map._js_calls
-        # Should have calls for both addSource and addLayer
-        self.assertTrue(any(call["method"] == "addSource" for call in calls))
-        self.assertTrue(any(call["method"] == "addLayer" for call in calls))
+        calls = maplibre_map._js_calls
+        # The source and layer are added with a single call
+        assert [call["method"] for call in calls] == ["addSourceAndLayer"]
+        assert "test-geojson_source" in maplibre_map.get_sources()
+        assert "test-geojson" in maplibre_map.get_layers()
+
+    def test_add_basemap_control_resolves_once(self, maplibre_map):
+        """Test that the basemap control reuses resolved basemap URLs."""
+        from anymap.basemaps import resolve_basemap
+
+        resolve_basemap.cache_clear()
+        maplibre_map.add_basemap_control(basemaps=["OpenStreetMap.Mapnik", "Unknown"])
+        maplibre_map.add_basemap_control(basemaps=["OpenStreetMap.Mapnik"])
+        assert resolve_basemap.cache_info().hits == 1
+        options = maplibre_map._js_calls[-1]["args"][1]
+        assert options["basemaps"][0]["tiles"] == [
+            "https://tile.openstreetmap.org/{z}/{x}/{y}.png"
+        ]
+
+    def test_construct_style_returns_copies(self):
+        """Test that constructed style documents are cached but not shared."""
+        from anymap import utils
+
+        style = {"version": 8, "layers": [{"id": "bg", "paint": {"a": (1, 2)}}]}
+        utils.construct_maplibre_style.cache_clear()
+        with patch("anymap.utils._construct_maplibre_style", return_value=style):
+            first = utils.construct_maplibre_style("positron")
+            second = utils.construct_maplibre_style("positron")
+        utils.construct_maplibre_style.cache_clear()
+
+        assert first == {"version": 8, "layers": [{"id": "bg", "paint": {"a": [1, 2]}}]}
+        first["layers"][0]["paint"]["a"] = 0
+        assert second["layers"][0]["paint"]["a"] == [1, 2]
+        assert style["layers"][0]["paint"]["a"] == (1, 2)
+
+    def test_construct_style_fetched_styles_not_cached(self):
+        """Test that styles fetched over the network are not memoized."""
+        from anymap import utils
+
+        utils.construct_maplibre_style.cache_clear()
+        with patch(
+            "anymap.utils._construct_maplibre_style", return_value="dark-matter"
+        ) as construct:
+            for style in ("https://example.com/style.json", "streets", "positron"):
+                utils.construct_maplibre_style(style)
+                utils.construct_maplibre_style(style)
+        utils.construct_maplibre_style.cache_clear()
+
+        assert [call.args[0] for call in construct.call_args_list] == [
+            "https://example.com/style.json",
+            "https://example.com/style.json",
+            "streets",
+            "streets",
+            "positron",
+        ]
+
+    def test_fetch_style_failure_not_cached(self):
+        """Test that a failed style request is not memoized."""
+        from anymap.maplibre import _fetch_style
+
+        response = Mock()
+        response.raise_for_status.side_effect = OSError("404")
+        session = Mock()
+        session.get.return_value = response
+        _fetch_style.cache_clear()
+        with patch("anymap.utils.get_http_session", return_value=session):
+            for _ in range(2):
+                with pytest.raises(OSError):
+                    _fetch_style("https://example.com/missing.json")
+        _fetch_style.cache_clear()
+        assert session.get.call_count == 2
+
+    def test_add_basemap_resolves_once(self, maplibre_map):
+        """Test that basemap URLs are resolved once and reused."""
+        from anymap.basemaps import resolve_basemap
+
+        resolve_basemap.cache_clear()
+        maplibre_map.add_basemap("OpenStreetMap.Mapnik")
+        MapLibreMap().add_basemap("OpenStreetMap.Mapnik")
+        assert resolve_basemap.cache_info().hits == 1
+        assert maplibre_map.get_sources()["OpenStreetMap.Mapnik_source"]["tiles"] == [
+            "https://tile.openstreetmap.org/{z}/{x}/{y}.png"
+        ]
+        # The default opacity is neither stored nor sent
+        assert "paint" not in maplibre_map.get_layers()["OpenStreetMap.Mapnik"]
+        assert "setPaintProperty" not in [
+            call["method"] for call in maplibre_map._js_calls
+        ]
+        with pytest.raises(ValueError):
+            maplibre_map.add_basemap("Not.A.Basemap")
+
+    def test_add_layer_unique_ids(self, maplibre_map):
+        """Test that layers with the same ID get unique names."""
+        for _ in range(3):
+            maplibre_map.add_layer({"id": "dup", "type": "circle", "source": "s"})
+        assert [
+            name for name in maplibre_map.get_layers() if name.startswith("dup")
+        ] == ["dup", "dup_1", "dup_2"]
+
+    def test_add_geojson_layer_serialized(self, maplibre_map):
+        """Test passing serialized GeoJSON through without parsing it."""
+        import json
+        import pathlib
+        import tempfile
+
+        text = json.dumps(
+            {
+                "type": "FeatureCollection",
+                "features": [
+                    {
+                        "type": "Feature",
+                        "geometry": {"type": "Point", "coordinates": [1.5, 2.5]},
+                        "properties": {"name": "</script>"},
+                    }
+                ],
+            }
+        )
+        maplibre_map.add_geojson_layer("text", text, layer_type="circle")
+        maplibre_map.add_geojson_layer("bytes", text.encode(), layer_type="circle")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = pathlib.Path(tmpdir) / "points.geojson"
+            path.write_text(text)
+            maplibre_map.add_geojson_layer("path", path, layer_type="circle")
+
+        sources = maplibre_map.get_sources()
+        for name in ("text", "bytes", "path"):
+            assert sources[f"{name}_source"] == {
+                "type": "geojson",
+                "data": text,
+                "_raw": True,
+            }
+        # A URL is still passed as the data location
+        maplibre_map.add_geojson_layer("url", "https://example.com/a.geojson")
+        assert "_raw" not in maplibre_map.get_sources()["url_source"]
+
+        # The export embeds the document itself
+        html = maplibre_map.to_html()
+        assert '["text_source",{"type":"geojson","data":{"type":' in html
+        assert '</script>"' not in html
+
+        # Rounding coordinates needs the parsed document
+        maplibre_map.add_geojson_layer(
+            "rounded", text, layer_type="circle", precision=0
+        )
+        data = maplibre_map.get_sources()["rounded_source"]["data"]
+        assert data["features"][0]["geometry"]["coordinates"] == [2, 2]
+
+    def test_add_geojson_layer_serve_threshold(self, maplibre_map):
+        """Test that large GeoJSON documents are served only when asked."""
+        point = {"type": "Point", "coordinates": [1.5, 2.5]}
+        line = {"type": "LineString", "coordinates": [[0.5, 0.5]] * 30_000}
+        url = "http://127.0.0.1:1/data.geojson"
+        with patch("anymap.utils.serve_geojson", return_value=url) as serve:
+            maplibre_map.add_geojson_layer("small", point, serve_threshold=1000)
+            maplibre_map.add_geojson_layer("large", point, serve_threshold=10)
+            maplibre_map.add_geojson_layer(
+                "text", '{"type": "Point"}', serve_threshold=10
+            )
+            # Large documents are synced unless a threshold is given
+            maplibre_map.add_geojson_layer("default", line)
+
+        sources = maplibre_map.get_sources()
+        # The text serialized to check the size is sent as is
+        assert sources["small_source"] == {
+            "type": "geojson",
+            "data": '{"type":"Point","coordinates":[1.5,2.5]}',
+            "_raw": True,
+        }
+        assert sources["large_source"] == {"type": "geojson", "data": url}
+        assert sources["text_source"] == {"type": "geojson", "data": url}
+        assert sources["default_source"]["data"] is line
+        # The document is serialized once and served as text
+        assert [call.args[0] for call in serve.call_args_list] == [
+            '{"type":"Point","coordinates":[1.5,2.5]}',
+            '{"type": "Point"}',
+        ]
+
+    def test_remove_source_stops_serving_geojson(self, maplibre_map):
+        """Test that served GeoJSON is released with its source."""
+        from anymap import utils
+
+        point = {"type": "Point", "coordinates": [1.5, 2.5]}
+        payloads = utils._GEOJSON_PAYLOADS
+        maplibre_map.add_geojson_layer("served", point, serve_threshold=10)
+        first = maplibre_map.get_sources()["served_source"]["data"]
+        assert first.rsplit("/", 1)[-1] in payloads
+
+        # Adding the layer again replaces the served document
+        maplibre_map.add_geojson_layer("served", point, serve_threshold=10)
+        second = maplibre_map.get_sources()["served_source"]["data"]
+        assert first.rsplit("/", 1)[-1] not in payloads
+        assert second.rsplit("/", 1)[-1] in payloads
+
+        maplibre_map.remove_source("served_source")
+        assert second.rsplit("/", 1)[-1] not in payloads
+
+    def test_add_geojson_layer_geodataframe(self, maplibre_map):
+        """Test adding a GeoJSON layer from a GeoDataFrame."""
+        import geopandas as gpd
+        from shapely.geometry import Point
+
+        gdf = gpd.GeoDataFrame(
+            {"name": ["a", "b"]}, geometry=[Point(0, 0), Point(1, 1)]
+        )
+        maplibre_map.add_geojson_layer("points", gdf, layer_type="circle")
+
+        data = maplibre_map.get_sources()["points_source"]["data"]
+        assert data["type"] == "FeatureCollection"
+        assert len(data["features"]) == 2
+        assert data["features"][1]["properties"] == {"name": "b"}
+        assert data["features"][1]["geometry"] == {
+            "type": "Point",
+            "coordinates": [1.0, 1.0],
+        }
+
+    def test_add_geojson_layer_precision(self, maplibre_map):
+        """Test rounding GeoJSON coordinates before they are sent."""
+        import geopandas as gpd
+        from shapely.geometry import Point
+
+        geojson = {
+            "type": "FeatureCollection",
+            "features": [
+                {
+                    "type": "Feature",
+                    "properties": {},
+                    "geometry": {"type": "Point", "coordinates": [1.23456789, 2.0]},
+                }
+            ],
+        }
+        maplibre_map.add_geojson_layer(
+            "dict", geojson, layer_type="circle", precision=3
+        )
+        data = maplibre_map.get_sources()["dict_source"]["data"]
+        assert data["features"][0]["geometry"]["coordinates"] == [1.235, 2.0]
+        assert geojson["features"][0]["geometry"]["coordinates"] == [1.23456789, 2.0]
+
+        gdf = gpd.GeoDataFrame(geometry=[Point(1.23456789, 2.0)])
+        maplibre_map.add_geojson_layer("gdf", gdf, layer_type="circle", precision=3)
+        data = maplibre_map.get_sources()["gdf_source"]["data"]
+        assert data["features"][0]["geometry"]["coordinates"] == [1.235, 2.0]
+
+    def test_add_points_cluster(self, maplibre_map):
+        """Test adding points with and without clustering."""
+
+        def points(count):
+            feature = {
+                "type": "Feature",
+                "properties": {},
+                "geometry": {"type": "Point", "coordinates": [0, 0]},
+            }
+            return {"type": "FeatureCollection", "features": [feature] * count}
+
+        maplibre_map.add_points(points(3), name="few", fit_bounds=False)
+        assert "cluster" not in maplibre_map.get_sources()["few_source"]
+        assert maplibre_map._layers["few"]["type"] == "circle"
+
+        maplibre_map.add_points(points(3), name="many", cluster=True, cluster_radius=30)
+        source = maplibre_map.get_sources()["many_source"]
+        assert source["cluster"]
+        assert source["clusterRadius"] == 30
+        for layer_id in ("many_clusters", "many_cluster_count", "many"):
+            assert layer_id in maplibre_map._layers
+        assert maplibre_map._layers["many"]["filter"] == ["!", ["has", "point_count"]]
+        assert maplibre_map._js_calls[-1]["method"] == "fitBounds"
+
+    def test_add_geojson_keep_properties(self, maplibre_map):
+        """Test dropping feature properties that the layer does not use."""
+        feature = {
+            "type": "Feature",
+            "properties": {"name": "a", "pop": 5, "notes": "x" * 100},
+            "geometry": {"type": "Point", "coordinates": [0, 0]},
+        }
+        geojson = {"type": "FeatureCollection", "features": [feature]}
+        maplibre_map.add_geojson(
+            geojson,
+            name="pts",
+            paint={"circle-radius": ["get", "pop"]},
+            layout={"text-field": "{name}"},
+            fit_bounds=False,
+            keep_properties="auto",
+        )
+        data = maplibre_map.get_sources()["pts_source"]["data"]
+        assert data["features"][0]["properties"] == {"name": "a", "pop": 5}
+        assert "notes" in feature["properties"]
+
+        maplibre_map.add_geojson(
+            geojson, name="pts2", fit_bounds=False, keep_properties=["notes"]
+        )
+        data = maplibre_map.get_sources()["pts2_source"]["data"]
+        assert list(data["features"][0]["properties"]) == ["notes"]
+
+    def test_style_property_names_legacy_syntax(self):
+        """Test finding properties used by legacy filters and functions."""
+        from anymap import utils
+
+        names = utils.get_style_property_names
+        assert names(["==", "class", "park"]) == {"class"}
+        assert names(["all", ["in", "kind", "a", "b"], ["!has", "x"]]) == {
+            "kind",
+            "x",
+        }
+        assert names(["==", "$type", "Point"]) == set()
+        paint = {"circle-radius": {"property": "pop", "stops": [[0, 1], [10, 5]]}}
+        assert names(paint) == {"pop"}
+        # Expressions are not mistaken for legacy filters
+        assert names(["==", ["get", "class"], "park"]) == {"class"}
+        assert names(["in", "park", ["get", "tags"]]) == {"tags"}
+
+    def test_add_geojson_layer_simplify(self, maplibre_map):
+        """Test simplifying GeoJSON geometries before they are sent."""
+        import geopandas as gpd
+        from shapely.geometry import LineString
+
+        line = [[0.0, 0.0], [1.0, 0.001], [2.0, 0.0]]
+        geojson = {
+            "type": "FeatureCollection",
+            "features": [
+                {
+                    "type": "Feature",
+                    "properties": {"name": "line"},
+                    "geometry": {"type": "LineString", "coordinates": line},
+                }
+            ],
+        }
+        maplibre_map.add_geojson_layer(
+            "dict", geojson, layer_type="line", simplify_tolerance=0.01
+        )
+        feature = maplibre_map.get_sources()["dict_source"]["data"]["features"][0]
+        assert feature["geometry"]["coordinates"] == [[0.0, 0.0], [2.0, 0.0]]
+        assert feature["properties"] == {"name": "line"}
+        assert geojson["features"][0]["geometry"]["coordinates"] == line
+
+        gdf = gpd.GeoDataFrame(geometry=[LineString(line)])
+        maplibre_map.add_geojson_layer(
+            "gdf", gdf, layer_type="line", simplify_tolerance=0.01
+        )
+        feature = maplibre_map.get_sources()["gdf_source"]["data"]["features"][0]
+        assert feature["geometry"]["coordinates"] == [[0.0, 0.0], [2.0, 0.0]]
+
+    def test_add_geojson_layer_url_cannot_be_simplified(self, maplibre_map):
+        """Test that GeoJSON URLs reject coordinate processing options."""
+        url = "https://example.com/data.geojson"
+        with pytest.raises(ValueError, match="URL"):
+            maplibre_map.add_geojson_layer("url", url, simplify_tolerance=0.1)
+        with pytest.raises(ValueError, match="URL"):
+            maplibre_map.add_geojson_layer("url", url, precision=6)
+        assert "url_source" not in maplibre_map.get_sources()
+
+    def test_add_geoarrow_layer(self, maplibre_map):
+        """Test adding a GeoDataFrame layer as a GeoArrow buffer."""
+        try:
+            import pyarrow as pa
+        except ImportError:
+            pytest.skip("pyarrow is not installed")
+        import geopandas as gpd
+        from shapely.geometry import Point
+
+        gdf = gpd.GeoDataFrame(
+            {"name": ["a", "b"]}, geometry=[Point(0, 0), Point(1, 1)], crs=4326
+        )
+        maplibre_map.add_geoarrow_layer("points", gdf)
+
+        buffer = maplibre_map._geoarrow_data["points_source"]
+        table = pa.ipc.open_stream(buffer).read_all()
+        assert table.num_rows == 2
+        assert maplibre_map.get_layers()["points"]["type"] == "circle"
+
+        maplibre_map.remove_source("points_source")
+        assert "points_source" not in maplibre_map._geoarrow_data
+
+    @pytest.mark.slow
+    def test_import_defers_heavy_dependencies(self):
+        """Test that importing anymap does not import geopandas or ipyvuetify."""
+        import subprocess
+        import sys
+
+        code = (
+            "import sys, anymap; "
+            "print(','.join(m for m in ('geopandas', 'ipyvuetify', 'duckdb') "
+            "if m in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        assert result.stdout.strip() == ""
+
+    def test_default_controls_batched(self):
+        """Test that default controls are sent in a single addControls call."""
+        m = MapLibreMap(style="dark-matter")
+        methods = [call["method"] for call in m._js_calls]
+        # The built-in controls share one call; the layer control has its own
+        assert methods == ["addControls", "addControl"]
+        assert set(m._controls) == {
+            "navigation_top-right",
+            "fullscreen_top-right",
+            "scale_bottom-left",
+        } | {"globe_top-right", "layer_control_top-right"}
+        assert m.controls["navigation"] == "top-right"
+        with pytest.raises(TypeError):
+            MapLibreMap._DEFAULT_CONTROLS["navigation"] = "top-left"
+
+    def test_layer_controls_share_layer_states(self, maplibre_map):
+        """Test that unfiltered layer controls share one layer states dict."""
+        maplibre_map.add_layer_control("top-right")
+        maplibre_map.add_layer_control("top-left")
+        maplibre_map.add_layer_control("bottom-left", layers=["pts"])
+        maplibre_map.add_layer({"id": "pts", "type": "circle", "source": "src"})
+        maplibre_map._flush_layer_controls()
+
+        controls = maplibre_map._controls
+        top_right = controls["layer_control_top-right"]["options"]["layerStates"]
+        top_left = controls["layer_control_top-left"]["options"]["layerStates"]
+        filtered = controls["layer_control_bottom-left"]["options"]["layerStates"]
+        assert top_right is top_left
+        assert list(top_right) == ["Background", "pts"]
+        assert list(filtered) == ["pts"]
+
+    def test_load_draw_data_sends_payload_once(self, maplibre_map):
+        """Test that loaded draw data is only sent through the trait."""
+        data = {"type": "FeatureCollection", "features": [{"type": "Feature"}]}
+        maplibre_map.load_draw_data(data)
+
+        assert maplibre_map._draw_data == data
+        calls = maplibre_map._js_calls
+        assert len(calls) == 1
+        assert calls[0]["method"] == "loadDrawData"
+        assert calls[0]["args"] == ()
+
+    def test_to_html_streams_to_file(self, maplibre_map):
+        """Test that writing the export to a file matches the returned HTML."""
+        import os
+        import tempfile
+
+        for i in range(2):
+            maplibre_map.add_source(
+                f"src{i}",
+                {"type": "geojson", "data": {"type": "FeatureCollection"}},
+            )
+        html = maplibre_map.to_html(title="Streamed")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "map.html")
+            assert maplibre_map.to_html(filename, title="Streamed") is None
+            with open(filename, encoding="utf-8") as f:
+                assert f.read() == html
+
+    def test_to_html_reuses_source_json(self, maplibre_map):
+        """Test that unchanged sources are not re-encoded between exports."""
+        import json
+
+        source = {"type": "geojson", "data": {"type": "FeatureCollection"}}
+        maplibre_map.add_source("src", source)
+        maplibre_map.to_html()
+        cached = maplibre_map._source_json_cache["src"]
+        maplibre_map.to_html()
+        assert maplibre_map._source_json_cache["src"] is cached
+
+        maplibre_map.add_source("src", {"type": "geojson", "data": {}})
+        sources = json.loads(
+            "".join(maplibre_map._sources_json_parts(dict(maplibre_map._sources)))
+        )
+        assert sources == [["src", {"type": "geojson", "data": {}}]]
+
+    def test_remove_source_evicts_source_json(self, maplibre_map):
+        """Test that removing a source drops its cached export JSON."""
+        maplibre_map.add_source("src", {"type": "geojson", "data": {}})
+        maplibre_map.to_html()
+        assert "src" in maplibre_map._source_json_cache
+
+        maplibre_map.remove_source("src")
+        assert "src" not in maplibre_map._source_json_cache
+
+    def test_to_html_reuses_json_of_equal_source(self, maplibre_map):
+        """Test that re-adding an equal source reuses its rounded JSON."""
+        point = {"type": "Point", "coordinates": [-122.419412345, 37.774912345]}
+        maplibre_map.add_source("src", {"type": "geojson", "data": point})
+        maplibre_map.to_html()
+        source_json = maplibre_map._source_json_cache["src"][2]
+
+        maplibre_map.add_source("src", {"type": "geojson", "data": dict(point)})
+        with patch("anymap.utils.round_geojson_coordinates") as round_coordinates:
+            maplibre_map.to_html()
+        round_coordinates.assert_not_called()
+        assert maplibre_map._source_json_cache["src"][2] is source_json
+
+    def test_to_html_emits_ordered_pairs(self, maplibre_map):
+        """Test that exported sources, layers and controls keep their order."""
+        import json
+
+        for source_id in ("b", "1"):
+            maplibre_map.add_source(source_id, {"type": "geojson", "data": {}})
+            maplibre_map.add_layer(
+                {"id": source_id, "type": "circle", "source": source_id}
+            )
+        sources = json.loads(
+            "".join(maplibre_map._sources_json_parts(dict(maplibre_map._sources)))
+        )
+        state = json.loads(
+            maplibre_map._map_state_json(
+                {
+                    "_sources": dict(maplibre_map._sources),
+                    "_layers": dict(maplibre_map._layers),
+                    "_controls": {},
+                }
+            )
+        )
+        assert [pair[0] for pair in sources] == ["b", "1"]
+        assert "_sources" not in state
+        assert [pair[0] for pair in state["_layers"]] == ["b", "1"]
+        assert state["_controls"] == []
+
+    def test_to_html_rounds_coordinates(self, maplibre_map):
+        """Test that exported GeoJSON coordinates are rounded."""
+        point = {"type": "Point", "coordinates": [-122.419412345, 37.774912345]}
+        maplibre_map.add_source("src", {"type": "geojson", "data": point})
+
+        assert "[-122.419412,37.774912]" in maplibre_map.to_html()
+        assert "[-122.419412345,37.774912345]" in maplibre_map.to_html(precision=None)
+
+    def test_to_html_draw_styles_only_with_draw_control(self, maplibre_map):
+        """Test that draw styles are only embedded for maps that can draw."""
+        assert "window.MapLibreDrawStyles = null;" in maplibre_map.to_html()
+
+        maplibre_map.add_draw_control()
+        html = maplibre_map.to_html()
+        assert "window.MapLibreDrawStyles = null;" not in html
+        assert '"id": "gl-draw-point-inactive"' in html
+
+    def test_to_html_debug_logging(self, shared_maplibre_map):
+        """Test that exported pages only log events when debug is enabled."""
+        assert '"_debug":false' in shared_maplibre_map.to_html()
+        assert '"_debug":true' in shared_maplibre_map.to_html(debug=True)
+
+    def test_to_html_embeds_sources_as_json_block(self, maplibre_map):
+        """Test that sources are embedded as a JSON block safe for HTML."""
+        import json
+        import re
+
+        properties = {"name": "</script><b>"}
+        maplibre_map.add_source(
+            "src",
+            {
+                "type": "geojson",
+                "data": {"type": "Feature", "properties": properties},
+            },
+        )
+        html = maplibre_map.to_html()
+        block = re.search(
+            r'<script type="application/json" id="anymap-sources">(.*?)</script>',
+            html,
+            re.S,
+        ).group(1)
+        sources = json.loads(block)
+        assert sources[0][0] == "src"
+        assert sources[0][1]["data"]["properties"] == properties
+        assert html.count("</script><b>") == 0
+
+    def test_to_html_export_script(self, maplibre_map):
+        """Test that the restore script is embedded unless a URL is given."""
+        html = maplibre_map.to_html()
+        assert "function anymapRestoreLayers(map, mapState, pending)" in html
+        assert "anymapRestoreControls(map, mapState, LayerControl);" in html
+
+        url = "https://example.com/maplibre_export.js"
+        html = maplibre_map.to_html(script_url=url)
+        assert f'<script src="{url}"></script>' in html
+        assert "function anymapRestoreLayers" not in html
+
+    def test_to_html_lists_hidden_layers(self, maplibre_map):
+        """Test that the export lists hidden layers so they load lazily."""
+        maplibre_map.add_layer({"id": "shown", "type": "circle", "source": "src"})
+        maplibre_map.add_layer(
+            {"id": "hidden", "type": "circle", "source": "src"}, visible=False
+        )
+
+        html = maplibre_map.to_html()
+        assert '"_hidden_layers":["hidden"]' in html
+        assert "materializeLayer(layerId)" in html
+
+    def test_to_html_coalesces_geojson_sources(self):
+        """Test that exported GeoJSON sources with equal options are merged."""
+        from anymap.maplibre import _coalesce_geojson_sources
+
+        def collection(name):
+            feature = {"type": "Feature", "geometry": None, "properties": {"n": name}}
+            return {"type": "FeatureCollection", "features": [feature]}
+
+        sources = {
+            "a": {"type": "geojson", "data": collection("a")},
+            "b": {"type": "geojson", "data": collection("b")},
+            "c": {"type": "geojson", "data": collection("c"), "cluster": True},
+        }
+        layers = {
+            "la": {"id": "la", "type": "circle", "source": "a"},
+            "lb": {"id": "lb", "type": "circle", "source": "b"},
+            "lc": {"id": "lc", "type": "circle", "source": "c"},
+        }
+        new_sources, new_layers = _coalesce_geojson_sources(sources, layers)
+
+        assert list(new_sources) == ["a", "c"]
+        features = new_sources["a"]["data"]["features"]
+        assert [f["properties"]["__src"] for f in features] == ["a", "b"]
+        assert new_layers["lb"]["source"] == "a"
+        assert new_layers["lb"]["filter"] == ["==", ["get", "__src"], "b"]
+        assert new_layers["lc"] == layers["lc"]
+        # The inputs are left untouched
+        assert list(sources) == ["a", "b", "c"]
+        assert "__src" not in sources["b"]["data"]["features"][0]["properties"]
+
+    def test_to_html_coalesce_sources_opt_in(self, maplibre_map):
+        """Test that exported features are only tagged when merging is enabled."""
+        for name in ("a", "b"):
+            feature = {"type": "Feature", "geometry": None, "properties": {}}
+            maplibre_map.add_source(
+                name,
+                {
+                    "type": "geojson",
+                    "data": {"type": "FeatureCollection", "features": [feature]},
+                },
+            )
+            maplibre_map.add_layer({"id": name, "type": "circle", "source": name})
+
+        assert '"__src"' not in maplibre_map.to_html()
+        assert '"__src"' in maplibre_map.to_html(coalesce_sources=True)
+
+    def test_control_options_not_mutated(self, maplibre_map):
+        """Test that control methods leave the caller's options untouched."""
+        options = MappingProxyType({"showCompass": False})
+        maplibre_map.add_control("navigation", "top-left", options)
+        maplibre_map.add_layer_control("top-right", options=options)
+
+        assert dict(options) == {"showCompass": False}
+        assert maplibre_map._controls["navigation_top-left"]["options"] == {
+            "showCompass": False,
+            "position": "top-left",
+        }
+
+    def test_get_draw_data_callback(self, maplibre_map):
+        """Test that get_draw_data does not block and notifies the callback."""
+        import time
+
+        received = []
+        start = time.perf_counter()
+        empty = maplibre_map.get_draw_data(callback=received.append)
+        assert time.perf_counter() - start < 0.1
+        assert empty == {"type": "FeatureCollection", "features": []}
+        assert maplibre_map._js_calls[-1]["method"] == "getDrawData"
+        assert received == []
+
+        data = {"type": "FeatureCollection", "features": [{"type": "Feature"}]}
+        maplibre_map._draw_data = data
+        assert received == [data]
+        assert maplibre_map.get_draw_data(callback=received.append) == data
+        assert received == [data, data]
+
+    def test_add_pmtiles_batches_layers(self, maplibre_map):
+        """Test that PMTiles default layers are added with one call."""
+        maplibre_map.add_pmtiles("https://example.com/data.pmtiles")
+        methods = [call["method"] for call in maplibre_map._js_calls]
+        assert methods.count("addLayers") == 1
+        assert "addLayer" not in methods
+        for name in ("landuse", "roads", "buildings", "water"):
+            assert f"data_{name}" in maplibre_map.get_layers()
+            assert f"data_{name}" in maplibre_map.layer_dict
+
+    def test_layer_dict_synced_once_per_tick(self, maplibre_map):
+        """Test that adding layers in a running event loop syncs once."""
+        import asyncio
+
+        changes = []
+        maplibre_map.observe(changes.append, names="_layer_dict")
+
+        async def add_layers():
+            for i in range(5):
+                maplibre_map.add_layer({"id": f"l{i}", "type": "circle", "source": "s"})
+            await asyncio.sleep(0)
+
+        asyncio.run(add_layers())
+        assert len(changes) == 1
+
+    def _layer_manager(self, maplibre_map):
+        """Create a layer manager for the map, if ipyvuetify supports it."""
+        import ipyvuetify as v
+        from anymap.maplibre_widgets import LayerManagerWidget
+
+        if not hasattr(v, "ExpansionPanelHeader"):
+            pytest.skip("ipyvuetify without ExpansionPanelHeader")
+        return LayerManagerWidget(maplibre_map)
+
+    def test_layer_manager_reuses_rows(self, maplibre_map):
+        """Test that refreshing the layer manager only builds new rows."""
+        maplibre_map.add_layer({"id": "a", "type": "circle", "source": "s"})
+        manager = self._layer_manager(maplibre_map)
+        row = manager._row_cache["a"]
+
+        maplibre_map.add_layer({"id": "b", "type": "circle", "source": "s"})
+        maplibre_map.set_opacity("a", 0.5)
+        with patch.object(maplibre_map, "set_opacity") as set_opacity:
+            manager.refresh()
+        set_opacity.assert_not_called()
+
+        assert manager._row_cache["a"] is row
+        # Rows share their layout and style models
+        assert manager._row_cache["b"].layout is row.layout
+        assert (
+            manager.layer_items["b"]["slider"].style
+            is manager.layer_items["a"]["slider"].style
+        )
+        assert manager.layer_items["a"]["slider"].value == 0.5
+        assert len(manager.layers_box.children) == 3
+
+        maplibre_map.remove_layer("b")
+        manager.refresh()
+        assert "b" not in manager.layer_items
+        assert len(manager.layers_box.children) == 2
+
+    def test_layer_manager_refresh_single_layer(self, maplibre_map):
+        """Test that refreshing one layer only updates its row."""
+        for name in ("a", "b"):
+            maplibre_map.add_layer({"id": name, "type": "circle", "source": "s"})
+        manager = self._layer_manager(maplibre_map)
+        maplibre_map.layer_dict["a"]["opacity"] = 0.3
+
+        with patch.object(manager, "build_layer_controls") as build:
+            manager.refresh(layer_id="a")
+        build.assert_not_called()
+        assert manager.layer_items["a"]["slider"].value == 0.3
+
+    def test_layer_manager_build_error_resets_flag(self, maplibre_map):
+        """Test that a failing refresh does not leave the toggles disabled."""
+        maplibre_map.add_layer({"id": "a", "type": "circle", "source": "s"})
+        manager = self._layer_manager(maplibre_map)
+        maplibre_map.add_layer({"id": "b", "type": "circle", "source": "s"})
+
+        with patch.object(manager, "_build_layer_row", side_effect=RuntimeError):
+            with pytest.raises(RuntimeError):
+                manager.refresh()
+        assert not manager._building
+
+        maplibre_map.layer_dict["a"]["opacity"] = "invalid"
+        with pytest.raises(Exception):
+            manager.refresh(layer_id="a")
+        assert not manager._building
+
+    def test_layer_manager_toggle_all_batched(self, maplibre_map):
+        """Test that toggling all layers sends the changes in one update."""
+        for name in ("a", "b"):
+            maplibre_map.add_layer({"id": name, "type": "circle", "source": "s"})
+        manager = self._layer_manager(maplibre_map)
+
+        with patch.object(
+            maplibre_map, "batch_update", wraps=maplibre_map.batch_update
+        ) as batch_update:
+            manager.master_toggle.value = False
+        batch_update.assert_called_once()
+        assert not maplibre_map.layer_dict["a"]["visible"]
+        assert not manager.layer_items["b"]["checkbox"].value
+
+    def test_layer_manager_remove_layers(self, maplibre_map):
+        """Test removing several layers from the layer manager at once."""
+        for name in ("a", "b", "c"):
+            maplibre_map.add_layer({"id": name, "type": "circle", "source": "s"})
+        manager = self._layer_manager(maplibre_map)
+
+        manager.remove_layers(["a", "c"])
+        assert manager._row_order == ["Background", "b"]
+        assert [row.children[0].description for row in manager.layers_box.children] == [
+            "Background",
+            "b",
+        ]
+        assert "a" not in maplibre_map.layer_dict
+
+    def test_layer_manager_row_handlers_are_weak(self, maplibre_map):
+        """Test that row handlers do not keep the layer manager alive."""
+        import weakref
+
+        maplibre_map.add_layer({"id": "a", "type": "circle", "source": "s"})
+        manager = self._layer_manager(maplibre_map)
+        checkbox = manager.layer_items["a"]["checkbox"]
+        handlers = checkbox._trait_notifiers["value"]["change"]
+        assert all(isinstance(h.args[0], weakref.ref) for h in handlers if h.args)
+
+        manager.remove_layers(["a"])
+        assert not checkbox._trait_notifiers.get("value")
+
+    def test_custom_widget_batch_children(self):
+        """Test that batched widget changes update the content box once."""
+        import ipyvuetify as v
+        import ipywidgets as widgets
+        from anymap.maplibre_widgets import CustomWidget
+
+        if not hasattr(v, "ExpansionPanelHeader"):
+            pytest.skip("ipyvuetify without ExpansionPanelHeader")
+        first = widgets.Label("first")
+        panel = CustomWidget(first)
+        changes = []
+        panel.content_box.observe(changes.append, names="children")
+
+        labels = [widgets.Label(str(i)) for i in range(3)]
+        with panel.batch_children():
+            for label in labels:
+                panel.add_widget(label)
+            panel.remove_widget(first)
+        assert len(changes) == 1
+        assert panel.content_box.children == tuple(labels)
+
+    def _container(self, maplibre_map, headers=False):
+        """Create a sidebar container, if ipyvuetify supports panel headers."""
+        import ipyvuetify as v
+        from anymap.maplibre_widgets import Container
+
+        if headers and not hasattr(v, "ExpansionPanelHeader"):
+            pytest.skip("ipyvuetify without ExpansionPanelHeader")
+        return Container(host_map=maplibre_map)
+
+    def test_container_creates_settings_lazily(self, maplibre_map):
+        """Test that the sidebar settings panel is only built when opened."""
+        container = self._container(maplibre_map)
+        assert container.width_slider is None
+        assert container.settings_widget is None
+
+    def test_sidebar_children_follow_registered_widgets(self, maplibre_map):
+        """Test that sidebar children follow the registered widgets."""
+        import ipywidgets as widgets
+
+        container = self._container(maplibre_map)
+        first, second = widgets.Label("first"), widgets.Label("second")
+        container.add_to_sidebar(first, add_header=False, label="First")
+        container.add_to_sidebar(second, add_header=False, label="Second")
+        assert container.sidebar_content_box.children == (first, second)
+
+        container.remove_from_sidebar(name="First")
+        assert container.sidebar_content_box.children == (second,)
+        assert list(container.sidebar_widgets) == ["Second"]
+
+    def test_add_to_sidebar_keeps_replaced_content(self, maplibre_map):
+        """Test that adding a widget keeps content set with set_sidebar_content."""
+        import ipywidgets as widgets
+
+        container = self._container(maplibre_map)
+        a, b, user = widgets.Label("a"), widgets.Label("b"), widgets.Label("user")
+        container.add_to_sidebar(a, add_header=False, label="A")
+        container.set_sidebar_content([user])
+        container.add_to_sidebar(b, add_header=False, label="B")
+        assert container.sidebar_content_box.children == (user, b)
+
+    def test_remove_from_sidebar_lookup(self, maplibre_map):
+        """Test removing sidebar widgets by name and by identity."""
+        import ipywidgets as widgets
+
+        container = self._container(maplibre_map)
+        first, second = widgets.Label("first"), widgets.Label("second")
+        container.add_to_sidebar(first, add_header=False, label="First")
+        container.add_to_sidebar(second, add_header=False, label="Second")
+
+        # An unknown name leaves the sidebar untouched
+        container.remove_from_sidebar(name="Missing")
+        assert list(container.sidebar_widgets) == ["First", "Second"]
+
+        container.remove_from_sidebar(widget=second)
+        assert list(container.sidebar_widgets) == ["First"]
+        assert container.sidebar_content_box.children == (first,)
+
+    def test_add_to_sidebar_same_widget_is_noop(self, maplibre_map):
+        """Test that re-adding a sidebar widget keeps its wrapper."""
+        import ipywidgets as widgets
+
+        container = self._container(maplibre_map, headers=True)
+        label = widgets.Label("tools")
+        container.add_to_sidebar(label, label="Tools")
+        wrapper = container.sidebar_widgets["Tools"]
+        changes = []
+        container.sidebar_content_box.observe(changes.append, names="children")
+
+        container.add_to_sidebar(label, label="Tools")
+        container.toggle_width_slider()
+        container.toggle_width_slider()
+        assert container.sidebar_widgets["Tools"] is wrapper
+        assert len(changes) == 1
+
+    def test_add_to_sidebar_replaces_in_one_change(self, maplibre_map):
+        """Test that replacing a sidebar widget sends one children change."""
+        import ipywidgets as widgets
+
+        container = self._container(maplibre_map)
+        old, new = widgets.Label("old"), widgets.Label("new")
+        container.add_to_sidebar(old, add_header=False, label="Tools")
+        changes = []
+        container.sidebar_content_box.observe(changes.append, names="children")
+
+        container.add_to_sidebar(new, add_header=False, label="Tools")
+        assert len(changes) == 1
+        assert container.sidebar_content_box.children[-1] is new
+
+    def test_toggle_sidebar_keeps_children(self, maplibre_map):
+        """Test that toggling the sidebar only changes styles."""
+        container = self._container(maplibre_map)
+        children = container.sidebar.children
+
+        container.toggle_sidebar()
+        assert container.sidebar.children is children
+        assert container.sidebar_content_box.layout.display == "none"
+        assert "max-width: 48px" in container.sidebar.style_
+
+        container.toggle_sidebar()
+        assert container.sidebar.children is children
+        assert container.sidebar_content_box.layout.display is None
+
+    def test_update_sidebar_content_skips_unchanged_state(self, maplibre_map):
+        """Test that reapplying the same sidebar state sends nothing."""
+        container = self._container(maplibre_map)
+        changes = []
+        container.sidebar.observe(changes.append, names="style_")
+        container.settings_btn.observe(changes.append, names="style_")
+
+        container.set_sidebar_width(container.min_width, container.max_width)
+        assert changes == []
+        container.toggle_sidebar()
+        container.toggle_sidebar()
+        assert len(changes) == 4
+
+    def test_sidebar_batch_add(self, maplibre_map):
+        """Test that batched sidebar additions update the children once."""
+        import ipywidgets as widgets
+
+        container = self._container(maplibre_map)
+        changes = []
+        container.sidebar_content_box.observe(changes.append, names="children")
+        tools = [widgets.Label(str(i)) for i in range(3)]
+        with container.batch_add():
+            for i, tool in enumerate(tools):
+                container.add_to_sidebar(tool, add_header=False, label=f"Tool {i}")
+            container.remove_from_sidebar(name="Tool 1")
+        assert len(changes) == 1
+        assert container.sidebar_content_box.children[-2:] == (tools[0], tools[2])
+
+    def test_hidden_sidebar_defers_children(self, maplibre_map):
+        """Test that sidebar changes while hidden are applied when shown."""
+        import ipywidgets as widgets
+
+        container = self._container(maplibre_map)
+        container.toggle_sidebar()
+        children = container.sidebar_content_box.children
+        tools = widgets.Label("tools")
+        container.add_to_sidebar(tools, add_header=False, label="Tools")
+        assert "Tools" in container.sidebar_widgets
+        assert container.sidebar_content_box.children == children
+
+        container.toggle_sidebar()
+        assert container.sidebar_content_box.children[-1] is tools
+
+    def test_container_close(self, maplibre_map):
+        """Test that closing a container closes its sidebar widgets."""
+        import ipywidgets as widgets
+
+        container = self._container(maplibre_map)
+        tools = widgets.Label("tools")
+        container.add_to_sidebar(tools, add_header=False, label="Tools")
+        container.close()
+        container.close()
+
+        assert tools.comm is None
+        assert not container.sidebar_widgets
+        assert not container.toggle_btn._event_handlers_map
+
+    def test_layer_style_widget_specs(self, maplibre_map):
+        """Test that the style widgets follow the layer type specs."""
+        from types import SimpleNamespace
+        from anymap.maplibre_widgets import LayerStyleWidget
+
+        def style_widget(layer_type, paint):
+            layer = SimpleNamespace(id="l", paint=paint)
+            return LayerStyleWidget({"layer": layer, "type": layer_type}, maplibre_map)
+
+        widget = style_widget("line", {"line-width": 4})
+        assert [w.description for w in widget.style_widgets] == [
+            "Line Color",
+            "Line Width",
+            "Line Opacity",
+            "Line Blur",
+            "Line Style",
+        ]
+        assert widget.style_widgets[1].value == 4
+        assert widget.style_widgets[4].value == (1,)
+        dashed = style_widget("line", {"line-dasharray": [2, 4]})
+        assert dashed.style_widgets[4].value == (2, 4)
+        assert dashed.style_widgets[4].label == "Dashed"
+        assert len(style_widget("circle", {}).style_widgets) == 7
+        # All style widgets share the panel's layout model
+        assert all(w.layout is widget._shared_layout for w in widget.style_widgets)
+        assert widget.style_widgets[0].style is widget.style_widgets[4].style
+        assert "not supported" in style_widget("raster", {}).style_widgets[0].value
+
+    def test_layer_style_specs_name_paint_properties(self):
+        """Test that every style spec names a paint property of its layer type."""
+        from anymap.maplibre_widgets import _LAYER_STYLE_SPECS, _STYLE_WIDGET_FACTORIES
+
+        for layer_type, specs in _LAYER_STYLE_SPECS.items():
+            names = [spec[2] for spec in specs]
+            assert len(names) == len(set(names)), layer_type
+            for kind, _, name, *_ in specs:
+                assert kind in _STYLE_WIDGET_FACTORIES
+                assert name.startswith(f"{layer_type}-"), name
+
+    def test_layer_style_widget_property_names(self, maplibre_map):
+        """Test that style widgets apply and reset their paint properties."""
+        from anymap.maplibre_widgets import LayerStyleWidget
+
+        paint = {"line-width": 4, "line-color": "#3388ff"}
+        maplibre_map.add_layer(
+            {"id": "a", "type": "line", "source": "s", "paint": paint}
+        )
+        widget = LayerStyleWidget(maplibre_map.layer_dict["a"], maplibre_map)
+        widget.style_widgets[1].value = 8
+        widget.apply_btn.click()
+        properties = [
+            name
+            for call in maplibre_map._js_calls
+            if call["method"] == "setPaintProperties"
+            for name in call["args"][1]
+        ]
+        assert "line-dasharray" in properties
+        assert "line-style" not in properties
+
+        changes = []
+        widget.style_widgets[0].observe(changes.append, names="value")
+        widget.reset_btn.click()
+        assert widget.style_widgets[1].value == 4
+        # Widgets already showing the original value are not reassigned
+        assert changes == []
+
+        # Only properties that differ from the last applied style are sent
+        maplibre_map._js_calls = []
+        widget.apply_btn.click()
+        assert [call["args"][1] for call in maplibre_map._js_calls] == [
+            {"line-width": 4}
+        ]
+        widget.apply_btn.click()
+        assert len(maplibre_map._js_calls) == 1
+
+    def test_layer_style_widget_skips_invalid_values(self, maplibre_map):
+        """Test that invalid style values are reported without aborting."""
+        from types import SimpleNamespace
+        from anymap.maplibre_widgets import LayerStyleWidget
+
+        maplibre_map.add_layer({"id": "a", "type": "line", "source": "s"})
+        widget = LayerStyleWidget(maplibre_map.layer_dict["a"], maplibre_map)
+        widget._property_widgets["line-blur"] = SimpleNamespace(value=float("nan"))
+        widget._property_widgets["line-width"].value = 8
+        maplibre_map._js_calls = []
+
+        with patch("builtins.print") as mock_print:
+            widget.apply_btn.click()
+        mock_print.assert_called_once()
+        assert "line-blur" in mock_print.call_args[0][0]
+        properties = maplibre_map._js_calls[0]["args"][1]
+        assert "line-width" in properties
+        assert "line-blur" not in properties
+
+    def test_layer_style_widget_holds_map_weakly(self):
+        """Test that a style widget does not keep its map alive."""
+        import gc
+        from anymap.maplibre_widgets import LayerStyleWidget
+
+        m = MapLibreMap()
+        m.add_layer({"id": "a", "type": "line", "source": "s"})
+        widget = LayerStyleWidget(m.layer_dict["a"], m)
+        m.close()
+        del m
+        gc.collect()
+
+        assert widget.map is None
+        widget.style_widgets[1].value = 8
+        widget.apply_btn.click()
+
+    def test_layer_style_widget_close_releases_widgets(self, maplibre_map):
+        """Test that closing a style widget closes the widgets it owns."""
+        import ipywidgets as widgets
+        from anymap.maplibre_widgets import LayerStyleWidget
+
+        maplibre_map.add_layer({"id": "a", "type": "line", "source": "s"})
+        widget = LayerStyleWidget(maplibre_map.layer_dict["a"], maplibre_map)
+        slider = widget.style_widgets[1]
+        wrapper = widgets.VBox([widget])
+        container = Mock(sidebar_widgets={"Style a": wrapper})
+        with patch.object(maplibre_map, "container", container):
+            widget.close_btn.click()
+
+        container.remove_from_sidebar.assert_called_once_with(None, "Style a")
+        assert slider.comm is None
+        assert widget.apply_btn.comm is None
+        assert not widget.apply_btn._click_handlers.callbacks
+        # The panel and its sidebar wrapper are closed as well
+        assert widget.comm is None
+        assert wrapper.comm is None
+
+    def test_layer_style_widget_apply_batched(self, maplibre_map):
+        """Test that applying a style sends all paint properties at once."""
+        from anymap.maplibre_widgets import LayerStyleWidget
+
+        maplibre_map.add_layer(
+            {"id": "a", "type": "fill", "source": "s", "paint": {"fill-opacity": 0.2}}
+        )
+        widget = LayerStyleWidget(maplibre_map.layer_dict["a"], maplibre_map)
+        assert widget.layer_id == "a"
+        maplibre_map._js_calls = []
+        syncs = []
+        maplibre_map.observe(syncs.append, names="_js_calls")
+
+        widget.apply_btn.click()
+        assert len(syncs) == 1
+        # fill-opacity already has the widget's value, so it is not sent
+        assert len(maplibre_map._js_calls) == 1
+        assert maplibre_map._js_calls[0]["method"] == "setPaintProperties"
+        assert set(maplibre_map._js_calls[0]["args"][1]) == {
+            "fill-color",
+            "fill-outline-color",
+        }
+
+    def test_add_layer_skips_default_visibility_and_opacity(self, maplibre_map):
+        """Test that default visibility/opacity are not sent to JavaScript."""
+        maplibre_map.add_layer({"id": "pts", "type": "circle", "source": "src"})
+        methods = [call["method"] for call in maplibre_map._js_calls]
+        assert methods == ["addLayer"]
+
+        maplibre_map.add_layer(
+            {"id": "pts2", "type": "circle", "source": "src"},
+            opacity=0.5,
+            visible=False,
+        )
+        methods = [call["method"] for call in maplibre_map._js_calls]
+        assert methods == [
+            "addLayer",
+            "addLayer",
+            "setLayoutProperty",
+            "setPaintProperty",
+        ]
 
-    def test_add_marker(self):
+    def test_symbol_layer_opacity_single_call(self, maplibre_map):
+        """Test that symbol layer opacity sets icon and text opacity at once."""
+        maplibre_map.add_layer({"id": "labels", "type": "symbol", "source": "src"})
+        maplibre_map.set_opacity("labels", 0.4)
+
+        call = maplibre_map._js_calls[-1]
+        assert call["method"] == "setPaintProperties"
+        assert call["args"] == ("labels", {"icon-opacity": 0.4, "text-opacity": 0.4})
+
+    def test_set_visibility_and_opacity_skip_unchanged(self, maplibre_map):
+        """Test that unchanged visibility/opacity are not sent again."""
+        maplibre_map.add_layer({"id": "pts", "type": "circle", "source": "src"})
+        maplibre_map.set_visibility("pts", True)
+        maplibre_map.set_opacity("pts", 1.00001)
+        methods = [call["method"] for call in maplibre_map._js_calls]
+        assert methods == ["addLayer"]
+
+        maplibre_map.set_opacity("pts", 0.5)
+        maplibre_map.set_opacity("pts", 0.5)
+        methods = [call["method"] for call in maplibre_map._js_calls]
+        assert methods == ["addLayer", "setPaintProperty"]
+
+        # Changes made in the layer control are recorded, so setting the
+        # layer back from Python is not skipped
+        maplibre_map._js_events = [
+            {"type": "layer_visibility_changed", "layerId": "pts", "visible": False}
+        ]
+        assert not maplibre_map.layer_dict["pts"]["visible"]
+        maplibre_map.set_visibility("pts", True)
+        assert maplibre_map._js_calls[-1]["method"] == "setLayoutProperty"
+
+    def test_set_background_opacity_recorded(self, maplibre_map):
+        """Test that a Background opacity change is recorded in layer_dict."""
+        maplibre_map.set_opacity("Background", 0.5)
+        assert maplibre_map.layer_dict["Background"]["opacity"] == 0.5
+
+        maplibre_map.set_opacity("Background", 1.0)
+        assert maplibre_map.layer_dict["Background"]["opacity"] == 1.0
+        assert [
+            call["args"]
+            for call in maplibre_map._js_calls
+            if call["method"] == "setBackgroundOpacity"
+        ] == [(0.5,), (1.0,)]
+
+    def test_set_properties_recorded_for_unchanged_check(self, maplibre_map):
+        """Test that property setters keep visibility/opacity up to date."""
+        maplibre_map.add_layer({"id": "pts", "type": "circle", "source": "src"})
+        maplibre_map.set_layout_property("pts", "visibility", "none")
+        maplibre_map.set_visibility("pts", True)
+        assert maplibre_map._js_calls[-1]["args"] == ("pts", "visibility", "visible")
+
+        maplibre_map.set_paint_property("pts", "circle-opacity", 0.2)
+        maplibre_map.set_opacity("pts", 1.0)
+        assert maplibre_map._js_calls[-1]["args"] == ("pts", "circle-opacity", 1.0)
+
+        # An expression cannot be compared, so the next change is always sent
+        expression = ["get", "alpha"]
+        maplibre_map.set_paint_properties("pts", {"circle-opacity": expression})
+        assert "opacity" not in maplibre_map.layer_dict["pts"]
+        maplibre_map.set_opacity("pts", 1.0)
+        assert maplibre_map._js_calls[-1]["args"] == ("pts", "circle-opacity", 1.0)
+
+    def test_set_visibility_bulk(self, maplibre_map):
+        """Test hiding several layers with one JavaScript call."""
+        for name in ("a", "b", "c"):
+            maplibre_map.add_layer({"id": name, "type": "circle", "source": "s"})
+        maplibre_map.set_visibility("c", False)
+        maplibre_map._js_calls = []
+
+        maplibre_map.set_visibility_bulk(["a", "b", "c"], False)
+        calls = maplibre_map._js_calls
+        assert len(calls) == 1
+        assert calls[0]["method"] == "setLayersVisibility"
+        assert calls[0]["args"] == (["a", "b"], False)
+        assert not maplibre_map.layer_dict["b"]["visible"]
+
+        maplibre_map.set_visibility_bulk(["a", "b"], False)
+        assert len(maplibre_map._js_calls) == 1
+
+    def test_add_marker(self, maplibre_map):
         """Test adding a marker."""
         marker_options = {"color": "#ff0000", "opacity": 0.8, "scale": 1.0}
-        self.map.add_marker(
+        maplibre_map.add_marker(
             -74.0060,
             40.7128,
             popup="New York",
             options=marker_options,
         )
 
-        calls = self.map._js_calls
-        self.assertEqual(len(calls), 1)
-        self.assertEqual(calls[0]["method"], "addMarker")
-        self.assertEqual(calls[0]["args"][0]["coordinates"], [-74.0060, 40.7128])
-        self.assertEqual(calls[0]["args"][0]["popup"], "New York")
-        self.assertEqual(calls[0]["args"][0]["options"], marker_options)
+        calls = maplibre_map._js_calls
+        assert len(calls) == 1
+        assert calls[0]["method"] == "addMarker"
+        assert calls[0]["args"][0]["coordinates"] == [-74.0060, 40.7128]
+        assert calls[0]["args"][0]["popup"] == "New York"
+        assert calls[0]["args"][0]["options"] == marker_options
+
+    def test_add_layer_inline_source_not_copied(self, maplibre_map):
+        """Test that an inline layer source is kept as is."""
+        source = {
+            "type": "geojson",
+            "data": {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [0, 0]},
+                "properties": {"pop_est": 1},
+            },
+        }
+        maplibre_map.add_layer(
+            {
+                "id": "pts",
+                "type": "circle",
+                "source": source,
+                "paint": {"circle_radius": 3},
+            }
+        )
+
+        layer = maplibre_map.get_layers()["pts"]
+        assert layer["source"] is source
+        assert source["data"]["properties"] == {"pop_est": 1}
+        assert layer["paint"] == {"circle-radius": 3}
+
+    def test_get_layer_type(self, maplibre_map):
+        """Test looking up the type of a layer."""
+        maplibre_map.add_layer({"id": "pts", "type": "circle", "source": "src"})
+        assert maplibre_map.get_layer_type("pts") == "circle"
+        assert maplibre_map.get_layer_type("missing") is None
+
+    def test_add_markers(self, maplibre_map):
+        """Test adding several markers with one call."""
+        maplibre_map.add_markers(
+            [
+                {"lng": -74.0060, "lat": 40.7128, "popup": "New York"},
+                {"lng": -0.1276, "lat": 51.5072, "scale": 0.5},
+            ]
+        )
+        maplibre_map.add_markers([])
+
+        calls = maplibre_map._js_calls
+        assert [call["method"] for call in calls] == ["addMarkers"]
+        first, second = calls[0]["args"][0]
+        assert first["popup"] == "New York"
+        assert second["coordinates"] == [-0.1276, 51.5072]
+        assert second["options"] == {"scale": 0.5}
+        assert "case 'addMarkers':" in maplibre_map.to_html()
 
-    def test_fit_bounds(self):
+    def test_fit_bounds(self, maplibre_map):
         """Test fitting map to bounds."""
         bounds = [[40.0, -75.0], [41.0, -74.0]]
-        self.map.fit_bounds(bounds, padding=100)
+        maplibre_map.fit_bounds(bounds, padding=100)
 
-        calls = self.map._js_calls
-        self.assertEqual(len(calls), 1)
-        self.assertEqual(calls[0]["method"], "fitBounds")
-        self.assertEqual(calls[0]["args"][0], bounds)
-        self.assertEqual(calls[0]["args"][1]["padding"], 100)
+        calls = maplibre_map._js_calls
+        assert len(calls) == 1
+        assert calls[0]["method"] == "fitBounds"
+        assert calls[0]["args"][0] == bounds
+        assert calls[0]["args"][1]["padding"] == 100
 
-    def test_add_legend_control_derives_targets(self):
+    def test_add_legend_control_derives_targets(self, maplibre_map):
         """Legend control should build targets from layer metadata when none supplied."""
-        self.map._js_calls.clear()
+        maplibre_map._js_calls.clear()
 
         geojson_data = {
             "type": "FeatureCollection",
@@ -221,51 +1640,51 @@ class TestMapLibreMap(unittest.TestCase):
             ],
         }
         layer_id = "density_points"
-        self.map.add_geojson_layer(
+        maplibre_map.add_geojson_layer(
             layer_id=layer_id,
             geojson_data=geojson_data,
             layer_type="circle",
             paint={"circle-radius": 5},
         )
-        self.map.layer_dict[layer_id]["layer"].setdefault("metadata", {})[
+        maplibre_map.layer_dict[layer_id]["layer"].setdefault("metadata", {})[
             "name"
         ] = "Density"
-        self.map._layer_dict = dict(self.map.layer_dict)
-        self.map._js_calls.clear()
+        maplibre_map._layer_dict = dict(maplibre_map.layer_dict)
+        maplibre_map._js_calls.clear()
 
-        self.map.add_legend_control(position="bottom-left")
+        maplibre_map.add_legend_control(position="bottom-left")
 
-        self.assertTrue(self.map._js_calls)
-        method_call = self.map._js_calls[-1]
-        self.assertEqual(method_call["method"], "addControl")
-        self.assertEqual(method_call["args"][0], "legend")
+        assert maplibre_map._js_calls
+        method_call = maplibre_map._js_calls[-1]
+        assert method_call["method"] == "addControl"
+        assert method_call["args"][0] == "legend"
         control_options = method_call["args"][1]
-        self.assertNotIn("targets", control_options)
-        self.assertIn("label_overrides", control_options)
-        self.assertIn(layer_id, control_options["label_overrides"])
-        self.assertEqual(control_options["label_overrides"][layer_id], "Density")
-        self.assertNotIn("maxHeight", control_options)
-        self.assertNotIn("toggleIcon", control_options)
-
-    def test_add_legend_control_custom_targets(self):
+        assert "targets" not in control_options
+        assert "label_overrides" in control_options
+        assert layer_id in control_options["label_overrides"]
+        assert control_options["label_overrides"][layer_id] == "Density"
+        assert "maxHeight" not in control_options
+        assert "toggleIcon" not in control_options
+
+    def test_add_legend_control_custom_targets(self, maplibre_map):
         """Legend control should honour explicitly provided targets mapping."""
-        self.map._js_calls.clear()
+        maplibre_map._js_calls.clear()
 
         custom_targets = {"layer_a": "Custom Layer"}
         custom_labels = {"layer_a": "Nice Layer"}
-        self.map.add_legend_control(
+        maplibre_map.add_legend_control(
             targets=custom_targets,
             label_overrides=custom_labels,
             max_height=320,
             toggle_icon="📋",
         )
 
-        method_call = self.map._js_calls[-1]
+        method_call = maplibre_map._js_calls[-1]
         control_options = method_call["args"][1]
-        self.assertEqual(control_options["targets"], custom_targets)
-        self.assertEqual(control_options["label_overrides"], custom_labels)
-        self.assertEqual(control_options["maxHeight"], "320px")
-        self.assertEqual(control_options["toggleIcon"], "📋")
+        assert control_options["targets"] == custom_targets
+        assert control_options["label_overrides"] == custom_labels
+        assert control_options["maxHeight"] == "320px"
+        assert control_options["toggleIcon"] == "📋"
 
     def test_add_infobox_control(self):
         """Adding InfoBox control should record state and emit JS call."""
@@ -275,18 +1694,18 @@ class TestMapLibreMap(unittest.TestCase):
         )
 
         control_key = "infobox_top-left"
-        self.assertIn(control_key, m._controls)
+        assert control_key in m._controls
         control_config = m._controls[control_key]
-        self.assertEqual(control_config["type"], "infobox")
-        self.assertEqual(control_config["position"], "top-left")
-        self.assertIn("options", control_config)
-        self.assertEqual(control_config["options"].get("layerId"), "test-layer")
+        assert control_config["type"] == "infobox"
+        assert control_config["position"] == "top-left"
+        assert "options" in control_config
+        assert control_config["options"].get("layerId") == "test-layer"
 
         last_call = m._js_calls[-1]
-        self.assertEqual(last_call["method"], "addControl")
+        assert last_call["method"] == "addControl"
         control_type, payload = last_call["args"]
-        self.assertEqual(control_type, "infobox")
-        self.assertEqual(payload.get("position"), "top-left")
+        assert control_type == "infobox"
+        assert payload.get("position") == "top-left"
 
     def test_add_gradientbox_control(self):
         """Adding GradientBox control should record state and emit JS call."""
@@ -300,27 +1719,27 @@ class TestMapLibreMap(unittest.TestCase):
         )
 
         control_key = "gradientbox_top-right"
-        self.assertIn(control_key, m._controls)
+        assert control_key in m._controls
         cfg = m._controls[control_key]
-        self.assertEqual(cfg["type"], "gradientbox")
-        self.assertEqual(cfg["position"], "top-right")
-        self.assertEqual(cfg["options"].get("layerId"), "points")
-        self.assertEqual(cfg["options"].get("weight_property"), "value")
-        self.assertEqual(cfg["options"].get("min_value"), 0)
-        self.assertEqual(cfg["options"].get("max_value"), 100)
+        assert cfg["type"] == "gradientbox"
+        assert cfg["position"] == "top-right"
+        assert cfg["options"].get("layerId") == "points"
+        assert cfg["options"].get("weight_property") == "value"
+        assert cfg["options"].get("min_value") == 0
+        assert cfg["options"].get("max_value") == 100
 
         last_call = m._js_calls[-1]
-        self.assertEqual(last_call["method"], "addControl")
+        assert last_call["method"] == "addControl"
         ctype, payload = last_call["args"]
-        self.assertEqual(ctype, "gradientbox")
-        self.assertEqual(payload.get("position"), "top-right")
+        assert ctype == "gradientbox"
+        assert payload.get("position") == "top-right"
 
-    def test_geoman_data_defaults(self):
+    def test_geoman_data_defaults(self, shared_maplibre_map):
         """Geoman data should default to an empty collection."""
-        self.assertEqual(
-            self.map.geoman_data,
-            {"type": "FeatureCollection", "features": []},
-        )
+        assert shared_maplibre_map.geoman_data == {
+            "type": "FeatureCollection",
+            "features": [],
+        }
 
     def test_add_geoman_control_basic(self):
         """Adding the Geoman control should record state and emit a JS call."""
@@ -328,22 +1747,22 @@ class TestMapLibreMap(unittest.TestCase):
         map_widget.add_geoman_control(position="bottom-left")
 
         control_key = "geoman_bottom-left"
-        self.assertIn(control_key, map_widget._controls)
+        assert control_key in map_widget._controls
 
         control_config = map_widget._controls[control_key]
-        self.assertEqual(control_config["type"], "geoman")
-        self.assertEqual(control_config["position"], "bottom-left")
-        self.assertIn("geoman_options", control_config["options"])
+        assert control_config["type"] == "geoman"
+        assert control_config["position"] == "bottom-left"
+        assert "geoman_options" in control_config["options"]
         geoman_settings = control_config["options"]["geoman_options"].get(
             "settings", {}
         )
 
         last_call = map_widget._js_calls[-1]
-        self.assertEqual(last_call["method"], "addControl")
+        assert last_call["method"] == "addControl"
         control_type, payload = last_call["args"]
-        self.assertEqual(control_type, "geoman")
-        self.assertEqual(payload["position"], "bottom-left")
-        self.assertFalse(payload.get("collapsed"))
+        assert control_type == "geoman"
+        assert payload["position"] == "bottom-left"
+        assert not payload.get("collapsed")
 
     def test_add_geoman_control_custom_options(self):
         """Ensure Geoman configuration merges convenience helpers."""
@@ -357,17 +1776,14 @@ class TestMapLibreMap(unittest.TestCase):
         control_key = "geoman_top-right"
         options = map_widget._controls[control_key]["options"]["geoman_options"]
         settings = options.get("settings", {})
-        self.assertEqual(settings.get("controlsPosition"), "top-right")
+        assert settings.get("controlsPosition") == "top-right"
 
         controls_section = options.get("controls", {})
-        self.assertIn("draw", controls_section)
-        self.assertEqual(
-            controls_section["draw"].get("polygon", {}).get("active"),
-            True,
-        )
+        assert "draw" in controls_section
+        assert controls_section["draw"].get("polygon", {}).get("active") == True
 
         last_call = map_widget._js_calls[-1]
-        self.assertEqual(last_call["args"][0], "geoman")
+        assert last_call["args"][0] == "geoman"
 
     def test_set_and_clear_geoman_data(self):
         """Round-trip Geoman data through helper methods."""
@@ -380,28 +1796,24 @@ class TestMapLibreMap(unittest.TestCase):
         collection = {"type": "FeatureCollection", "features": [feature]}
 
         map_widget.set_geoman_data(collection)
-        self.assertEqual(map_widget.get_geoman_data()["features"], [feature])
+        assert map_widget.get_geoman_data()["features"] == [feature]
 
         map_widget.clear_geoman_data()
-        self.assertEqual(map_widget.get_geoman_data()["features"], [])
+        assert map_widget.get_geoman_data()["features"] == []
 
 
-class TestMultipleInstances(unittest.TestCase):
+class TestMultipleInstances:
     """Test cases for multiple map instances."""
 
-    def test_multiple_map_creation(self):
+    @pytest.mark.parametrize(
+        ("lat", "lon", "zoom"), [(40 + i, -74 + i, 10 + i) for i in range(5)]
+    )
+    def test_multiple_map_creation(self, lat, lon, zoom):
         """Test creating multiple map instances."""
-        maps = []
-        for i in range(5):
-            map_instance = MapLibreMap(center=[40 + i, -74 + i], zoom=10 + i)
-            maps.append(map_instance)
-
-        self.assertEqual(len(maps), 5)
+        map_instance = MapLibreMap(center=[lat, lon], zoom=zoom)
 
-        # Verify each map has unique properties
-        for i, map_instance in enumerate(maps):
-            self.assertEqual(map_instance.center, [40 + i, -74 + i])
-            self.assertEqual(map_instance.zoom, 10 + i)
+        assert map_instance.center == [lat, lon]
+        assert map_instance.zoom == zoom
 
     def test_independent_map_operations(self):
         """Test that map operations are independent."""
@@ -417,146 +1829,136 @@ class TestMultipleInstances(unittest.TestCase):
         map2.add_marker(50, -100, popup="Map 2")
 
         # Verify independence
-        self.assertEqual(map1.zoom, 15)
-        self.assertEqual(map2.zoom, 12)
+        assert map1.zoom == 15
+        assert map2.zoom == 12
 
         # Verify separate JS call lists
-        map1_calls = [call for call in map1._js_calls if call["method"] == "addMarker"]
-        map2_calls = [call for call in map2._js_calls if call["method"] == "addMarker"]
-
-        self.assertEqual(len(map1_calls), 1)
-        self.assertEqual(len(map2_calls), 1)
-        self.assertEqual(map1_calls[0]["args"][0]["popup"], "Map 1")
-        self.assertEqual(map2_calls[0]["args"][0]["popup"], "Map 2")
+        assert js_methods(map1)["addMarker"] == 1
+        assert js_methods(map2)["addMarker"] == 1
+        assert map1._js_calls[-1]["args"][0]["popup"] == "Map 1"
+        assert map2._js_calls[-1]["args"][0]["popup"] == "Map 2"
 
 
-class TestEnhancedMapFeatures(unittest.TestCase):
+class TestEnhancedMapFeatures:
     """Test cases for enhanced map features."""
 
-    def setUp(self):
-        """Set up test fixtures."""
-        self.map = MapLibreMap(center=[40.7128, -74.0060], zoom=12)
-
-    def test_get_layers(self):
+    def test_get_layers(self, nyc_map):
         """Test getting layers from map."""
         # Initially should be empty
-        self.assertEqual(self.map.get_layers(), {})
+        assert nyc_map.get_layers() == {}
 
         # Add a layer
         layer_config = {"id": "test", "type": "circle", "source": "test"}
-        self.map.add_layer(layer_config, layer_id="test")
+        nyc_map.add_layer(layer_config, layer_id="test")
 
-        layers = self.map.get_layers()
-        self.assertIn("test", layers)
-        self.assertEqual(layers["test"], layer_config)
+        layers = nyc_map.get_layers()
+        assert "test" in layers
+        assert layers["test"] == layer_config
 
-    def test_get_sources(self):
+    def test_get_sources(self, nyc_map):
         """Test getting sources from map."""
         # Initially should be empty
-        self.assertEqual(self.map.get_sources(), {})
+        assert nyc_map.get_sources() == {}
 
         # Add a source
         source_config = {"type": "geojson", "data": {}}
-        self.map.add_source("test", source_config)
+        nyc_map.add_source("test", source_config)
 
-        sources = self.map.get_sources()
-        self.assertIn("test", sources)
-        self.assertEqual(sources["test"], source_config)
+        sources = nyc_map.get_sources()
+        assert "test" in sources
+        assert sources["test"] == source_config
 
-    def test_clear_layers(self):
+    def test_clear_layers(self, nyc_map):
         """Test clearing all layers."""
         # Add some layers
-        self.map.add_layer({"id": "layer1", "type": "circle"}, layer_id="layer1")
-        self.map.add_layer({"id": "layer2", "type": "fill"}, layer_id="layer2")
+        nyc_map.add_layer({"id": "layer1", "type": "circle"}, layer_id="layer1")
+        nyc_map.add_layer({"id": "layer2", "type": "fill"}, layer_id="layer2")
 
-        self.assertEqual(len(self.map.get_layers()), 2)
+        assert len(nyc_map.get_layers()) == 2
 
         # Clear layers
-        self.map.clear_layers()
-        self.assertEqual(len(self.map.get_layers()), 0)
+        nyc_map.clear_layers()
+        assert len(nyc_map.get_layers()) == 0
 
-    def test_clear_sources(self):
+    def test_clear_sources(self, nyc_map):
         """Test clearing all sources."""
         # Add some sources
-        self.map.add_source("source1", {"type": "geojson", "data": {}})
-        self.map.add_source("source2", {"type": "geojson", "data": {}})
+        nyc_map.add_source("source1", {"type": "geojson", "data": {}})
+        nyc_map.add_source("source2", {"type": "geojson", "data": {}})
 
-        self.assertEqual(len(self.map.get_sources()), 2)
+        assert len(nyc_map.get_sources()) == 2
 
         # Clear sources
-        self.map.clear_sources()
-        self.assertEqual(len(self.map.get_sources()), 0)
+        nyc_map.clear_sources()
+        assert len(nyc_map.get_sources()) == 0
 
-    def test_clear_all(self):
+    def test_clear_all(self, nyc_map):
         """Test clearing all layers and sources."""
         # Add layers and sources
-        self.map.add_source("source1", {"type": "geojson", "data": {}})
-        self.map.add_layer(
+        nyc_map.add_source("source1", {"type": "geojson", "data": {}})
+        nyc_map.add_layer(
             {"id": "layer1", "type": "circle", "source": "source1"}, layer_id="layer1"
         )
 
-        self.assertEqual(len(self.map.get_layers()), 1)
-        self.assertEqual(len(self.map.get_sources()), 1)
+        assert len(nyc_map.get_layers()) == 1
+        assert len(nyc_map.get_sources()) == 1
 
         # Clear all
-        self.map.clear_all()
-        self.assertEqual(len(self.map.get_layers()), 0)
-        self.assertEqual(len(self.map.get_sources()), 0)
-
-    def test_add_tile_layer(self):
-        """Test adding a raster layer."""
-        self.map.add_tile_layer(
-            layer_id="raster_test",
-            source_url="https://example.com/tiles/{z}/{x}/{y}.png",
-        )
-
-        # Check that both source and layer were added
-        sources = self.map.get_sources()
-        layers = self.map.get_layers()
-
-        self.assertIn("raster_test_source", sources)
-        self.assertIn("raster_test", layers)
-        self.assertEqual(layers["raster_test"]["type"], "raster")
-
-    # def test_add_vector_layer(self):
-    #     """Test adding a vector layer."""
-    #     self.map.add_vector_layer(
-    #         layer_id="vector_test",
-    #         source_url="https://example.com/tiles.json",
-    #         source_layer="data_layer",
-    #         layer_type="fill",
-    #     )
-
-    #     # Check that both source and layer were added
-    #     sources = self.map.get_sources()
-    #     layers = self.map.get_layers()
-
-    #     self.assertIn("vector_test_source", sources)
-    #     self.assertIn("vector_test", layers)
-    #     self.assertEqual(layers["vector_test"]["type"], "fill")
-    #     self.assertEqual(layers["vector_test"]["source-layer"], "data_layer")
-
-    def test_add_image_layer(self):
-        """Test adding an image layer."""
-        coordinates = [[-80, 25], [-80, 26], [-79, 26], [-79, 25]]
-
-        self.map.add_image_layer(
-            layer_id="image_test",
-            image_url="https://example.com/image.png",
-            coordinates=coordinates,
-        )
-
-        # Check that both source and layer were added
-        sources = self.map.get_sources()
-        layers = self.map.get_layers()
-
-        self.assertIn("image_test_source", sources)
-        self.assertIn("image_test", layers)
-        self.assertEqual(sources["image_test_source"]["type"], "image")
-        self.assertEqual(sources["image_test_source"]["coordinates"], coordinates)
-
-
-class TestLayerPersistence(unittest.TestCase):
+        nyc_map.clear_all()
+        assert len(nyc_map.get_layers()) == 0
+        assert len(nyc_map.get_sources()) == 0
+
+    @pytest.mark.parametrize(
+        ("method", "kwargs", "source", "layer"),
+        [
+            (
+                "add_tile_layer",
+                {
+                    "layer_id": "raster_test",
+                    "source_url": "https://example.com/tiles/{z}/{x}/{y}.png",
+                },
+                {"type": "raster"},
+                {"type": "raster"},
+            ),
+            (
+                "add_vector_layer",
+                {
+                    "layer_id": "vector_test",
+                    "source_url": "https://example.com/tiles.json",
+                    "source_layer": "data_layer",
+                    "layer_type": "fill",
+                },
+                {"type": "vector", "url": "https://example.com/tiles.json"},
+                {"type": "fill", "source-layer": "data_layer"},
+            ),
+            (
+                "add_image_layer",
+                {
+                    "layer_id": "image_test",
+                    "image_url": "https://example.com/image.png",
+                    "coordinates": [[-80, 25], [-80, 26], [-79, 26], [-79, 25]],
+                },
+                {
+                    "type": "image",
+                    "coordinates": [[-80, 25], [-80, 26], [-79, 26], [-79, 25]],
+                },
+                {"type": "raster"},
+            ),
+        ],
+    )
+    def test_add_layer_with_source(self, nyc_map, method, kwargs, source, layer):
+        """Test that the add_*_layer helpers add both a source and a layer."""
+        getattr(nyc_map, method)(**kwargs)
+
+        layer_id = kwargs["layer_id"]
+        added_source = nyc_map.get_sources()[f"{layer_id}_source"]
+        added_layer = nyc_map.get_layers()[layer_id]
+        assert {key: added_source.get(key) for key in source} == source
+        assert {key: added_layer.get(key) for key in layer} == layer
+        assert added_layer["source"] == f"{layer_id}_source"
+
+
+class TestLayerPersistence:
     """Test cases for layer persistence across widget renders."""
 
     def test_layer_state_persistence(self):
@@ -571,12 +1973,12 @@ class TestLayerPersistence(unittest.TestCase):
         map_widget.add_layer(layer_config, layer_id="persistent")
 
         # Check internal state
-        self.assertIn("persistent", map_widget._layers)
-        self.assertIn("test", map_widget._sources)
+        assert "persistent" in map_widget._layers
+        assert "test" in map_widget._sources
 
         # Verify layer config is preserved
-        self.assertEqual(map_widget._layers["persistent"], layer_config)
-        self.assertEqual(map_widget._sources["test"], source_config)
+        assert map_widget._layers["persistent"] == layer_config
+        assert map_widget._sources["test"] == source_config
 
     def test_layer_removal_from_state(self):
         """Test that removing layers updates the state."""
@@ -588,48 +1990,40 @@ class TestLayerPersistence(unittest.TestCase):
             {"id": "temp", "type": "circle", "source": "test"}, layer_id="temp"
         )
 
-        self.assertIn("temp", map_widget._layers)
-        self.assertIn("test", map_widget._sources)
+        assert "temp" in map_widget._layers
+        assert "test" in map_widget._sources
 
         # Remove layer and source
         map_widget.remove_layer("temp")
         map_widget.remove_source("test")
 
-        self.assertNotIn("temp", map_widget._layers)
-        self.assertNotIn("test", map_widget._sources)
+        assert "temp" not in map_widget._layers
+        assert "test" not in map_widget._sources
 
 
-class TestMapboxMap(unittest.TestCase):
+class TestMapboxMap:
     """Test cases for the MapboxMap class."""
 
-    def setUp(self):
-        """Set up test fixtures."""
-        self.map = MapboxMap(
-            center=[-122.4194, 37.7749],
-            zoom=12,
-            style="mapbox://styles/mapbox/streets-v12",
-        )
-
-    def test_initialization(self):
+    def test_initialization(self, mapbox_map):
         """Test Mapbox map initialization."""
-        self.assertEqual(self.map.center, [-122.4194, 37.7749])
-        self.assertEqual(self.map.zoom, 12)
-        self.assertEqual(self.map.style, "mapbox://styles/mapbox/streets-v12")
-        self.assertEqual(self.map.bearing, 0.0)
-        self.assertEqual(self.map.pitch, 0.0)
-        self.assertTrue(self.map.antialias)
+        assert mapbox_map.center == [-122.4194, 37.7749]
+        assert mapbox_map.zoom == 12
+        assert mapbox_map.style == "mapbox://styles/mapbox/streets-v12"
+        assert mapbox_map.bearing == 0.0
+        assert mapbox_map.pitch == 0.0
+        assert mapbox_map.antialias
         # Token handling depends on environment
 
-    def test_access_token_handling(self):
+    def test_access_token_handling(self, mapbox_map):
         """Test access token management."""
         # Test setting access token
         test_token = "pk.test_token"
-        self.map.set_access_token(test_token)
-        self.assertEqual(self.map.access_token, test_token)
+        mapbox_map.set_access_token(test_token)
+        assert mapbox_map.access_token == test_token
 
         # Test creating map with custom token
         custom_map = MapboxMap(access_token="pk.custom_token")
-        self.assertEqual(custom_map.access_token, "pk.custom_token")
+        assert custom_map.access_token == "pk.custom_token"
 
     def test_default_access_token(self):
         """Test default access token retrieval."""
@@ -639,82 +2033,116 @@ class TestMapboxMap(unittest.TestCase):
             warnings.simplefilter("ignore")
             token = MapboxMap._get_default_access_token()
             # Token could be empty if no environment variable set
-            self.assertIsInstance(token, str)
+            assert isinstance(token, str)
 
-    def test_mapbox_specific_methods(self):
+    def test_mapbox_specific_methods(self, mapbox_map):
         """Test Mapbox-specific methods."""
         # Test adding controls
-        self.map.add_control("navigation", "top-left")
-        calls = self.map._js_calls
-        self.assertTrue(any(call["method"] == "addControl" for call in calls))
+        mapbox_map.add_control("navigation", "top-left")
+        assert mapbox_map._js_calls[-1]["method"] == "addControl"
 
         # Test terrain
         terrain_config = {"source": "mapbox-terrain", "exaggeration": 1.5}
-        self.map.set_terrain(terrain_config)
-        calls = self.map._js_calls
-        self.assertTrue(any(call["method"] == "setTerrain" for call in calls))
+        mapbox_map.set_terrain(terrain_config)
+        assert mapbox_map._js_calls[-1]["method"] == "setTerrain"
 
         # Test fog
         fog_config = {"color": "rgb(186, 210, 235)", "high-color": "rgb(36, 92, 223)"}
-        self.map.set_fog(fog_config)
-        calls = self.map._js_calls
-        self.assertTrue(any(call["method"] == "setFog" for call in calls))
+        mapbox_map.set_fog(fog_config)
+        assert mapbox_map._js_calls[-1]["method"] == "setFog"
 
-    def test_add_marker_with_options(self):
+    def test_add_marker_with_options(self, mapbox_map):
         """Markers should forward custom options to JS calls."""
         options = {"color": "#3366ff", "draggable": True}
-        self.map._js_calls.clear()
-        self.map.add_marker(lat=37.7749, lng=-122.4194, popup="SF", options=options)
+        mapbox_map._js_calls.clear()
+        mapbox_map.add_marker(lat=37.7749, lng=-122.4194, popup="SF", options=options)
 
-        calls = self.map._js_calls
-        self.assertEqual(len(calls), 1)
-        self.assertEqual(calls[0]["method"], "addMarker")
-        self.assertEqual(calls[0]["args"][0]["options"], options)
+        calls = mapbox_map._js_calls
+        assert len(calls) == 1
+        assert calls[0]["method"] == "addMarker"
+        assert calls[0]["args"][0]["options"] == options
 
-    def test_add_3d_buildings(self):
+    def test_add_3d_buildings(self, mapbox_map):
         """Test adding 3D buildings layer."""
-        self.map.add_3d_buildings()
+        mapbox_map.add_3d_buildings()
 
         # Check that the layer was added
-        layers = self.map.get_layers()
-        self.assertIn("3d-buildings", layers)
+        layers = mapbox_map.get_layers()
+        assert "3d-buildings" in layers
 
         layer_config = layers["3d-buildings"]
-        self.assertEqual(layer_config["type"], "fill-extrusion")
-        self.assertEqual(layer_config["source"], "composite")
-        self.assertEqual(layer_config["source-layer"], "building")
+        assert layer_config["type"] == "fill-extrusion"
+        assert layer_config["source"] == "composite"
+        assert layer_config["source-layer"] == "building"
 
-    def test_mapbox_styles(self):
+    def test_mapbox_styles(self, mapbox_map):
         """Test Mapbox style handling."""
         # Test setting standard Mapbox style
-        self.map.set_style("mapbox://styles/mapbox/satellite-v9")
-        self.assertEqual(self.map.style, "mapbox://styles/mapbox/satellite-v9")
+        mapbox_map.set_style("mapbox://styles/mapbox/satellite-v9")
+        assert mapbox_map.style == "mapbox://styles/mapbox/satellite-v9"
 
         # Test setting custom style object
         custom_style = {"version": 8, "sources": {}, "layers": []}
-        self.map.set_style(custom_style)
-
-        calls = self.map._js_calls
-        self.assertTrue(any(call["method"] == "setStyle" for call in calls))
+        mapbox_map.set_style(custom_style)
+        assert mapbox_map.style == custom_style
 
-    def test_inheritance_from_mapwidget(self):
+    def test_inheritance_from_mapwidget(self, mapbox_map):
         """Test that MapboxMap inherits all MapWidget functionality."""
         # Test basic methods work
-        self.map.set_center(40.7128, -74.0060)
-        self.assertEqual(self.map.center, [40.7128, -74.0060])
+        mapbox_map.set_center(40.7128, -74.0060)
+        assert mapbox_map.center == [40.7128, -74.0060]
 
         # Test layer management
         layer_config = {"id": "test", "type": "circle", "source": "test"}
-        self.map.add_layer("test", layer_config)
-        self.assertIn("test", self.map.get_layers())
+        mapbox_map.add_layer("test", layer_config)
+        assert "test" in mapbox_map.get_layers()
 
         # Test source management
         source_config = {"type": "geojson", "data": {}}
-        self.map.add_source("test", source_config)
-        self.assertIn("test", self.map.get_sources())
+        mapbox_map.add_source("test", source_config)
+        assert "test" in mapbox_map.get_sources()
+
+    def test_to_html(self, mapbox_map):
+        """Test that the HTML export template is filled in."""
+        html = mapbox_map.to_html(title="Mapbox Export")
+
+        assert "<title>Mapbox Export</title>" in html
+        assert "const mapState = {" in html
+        assert "map.on('load', function() {" in html
+        assert "${sourceId}" in html
+        assert "{{" not in html
+
+    def test_add_layer_with_source_in_one_sync(self, mapbox_map):
+        """Test that a source and its layer are sent together."""
+        syncs = []
+        mapbox_map.observe(syncs.append, names="_js_calls")
+        mapbox_map.add_tile_layer("tiles", "https://example.com/{z}/{x}/{y}.png")
+
+        assert len(syncs) == 1
+        assert [call["method"] for call in mapbox_map._js_calls] == [
+            "addSource",
+            "addLayer",
+        ]
+        assert "tiles_source" in mapbox_map.get_sources()
+
+    def test_to_html_serializes_numpy_values(self, mapbox_map):
+        """Test that numpy values in the map state are exported."""
+        import numpy as np
+
+        mapbox_map.add_source(
+            "points",
+            {
+                "type": "geojson",
+                "data": {
+                    "type": "Point",
+                    "coordinates": np.array([np.float64(-122.5), 37.5]),
+                },
+            },
+        )
+        assert "-122.5" in mapbox_map.to_html()
 
 
-class TestMapboxMapboxInteraction(unittest.TestCase):
+class TestMapboxMapboxInteraction:
     """Test interaction between MapLibre and Mapbox maps."""
 
     def test_independent_map_instances(self):
@@ -724,9 +2152,9 @@ class TestMapboxMapboxInteraction(unittest.TestCase):
         mapbox_map = MapboxMap(center=[40.7128, -74.0060], zoom=12)
 
         # Verify they have different configurations
-        self.assertNotEqual(maplibre_map.center, mapbox_map.center)
-        self.assertNotEqual(maplibre_map.zoom, mapbox_map.zoom)
-        self.assertNotEqual(maplibre_map.style, mapbox_map.style)
+        assert maplibre_map.center != mapbox_map.center
+        assert maplibre_map.zoom != mapbox_map.zoom
+        assert maplibre_map.style != mapbox_map.style
 
         # Add different layers to each
         maplibre_map.add_geojson_layer(
@@ -737,10 +2165,10 @@ class TestMapboxMapboxInteraction(unittest.TestCase):
         )
 
         # Verify layers are independent
-        self.assertIn("ml_layer", maplibre_map.get_layers())
-        self.assertNotIn("ml_layer", mapbox_map.get_layers())
-        self.assertIn("mb_layer", mapbox_map.get_layers())
-        self.assertNotIn("mb_layer", maplibre_map.get_layers())
+        assert "ml_layer" in maplibre_map.get_layers()
+        assert "ml_layer" not in mapbox_map.get_layers()
+        assert "mb_layer" in mapbox_map.get_layers()
+        assert "mb_layer" not in maplibre_map.get_layers()
 
     def test_different_javascript_modules(self):
         """Test that different map types use different JavaScript modules."""
@@ -752,48 +2180,40 @@ class TestMapboxMapboxInteraction(unittest.TestCase):
         mapbox_content = str(mapbox_map._esm)
 
         # Verify they contain different library imports
-        self.assertIn("maplibre-gl", maplibre_content)
-        self.assertIn("mapbox-gl", mapbox_content)
-        self.assertNotEqual(maplibre_content, mapbox_content)
+        assert "maplibre-gl" in maplibre_content
+        assert "mapbox-gl" in mapbox_content
+        assert maplibre_content != mapbox_content
 
         # Check they use different CSS
         maplibre_css = str(maplibre_map._css)
         mapbox_css = str(mapbox_map._css)
-        self.assertNotEqual(maplibre_css, mapbox_css)
+        assert maplibre_css != mapbox_css
 
 
-class TestCesiumMap(unittest.TestCase):
+class TestCesiumMap:
     """Test cases for the CesiumMap class."""
 
-    def setUp(self):
-        """Set up test fixtures."""
-        self.map = CesiumMap(
-            center=[-122.4194, 37.7749],
-            zoom=12,
-            camera_height=15000000,
-        )
-
-    def test_initialization(self):
+    def test_initialization(self, cesium_map):
         """Test Cesium map initialization."""
-        self.assertEqual(self.map.center, [-122.4194, 37.7749])
-        self.assertEqual(self.map.zoom, 12)
-        self.assertEqual(self.map.camera_height, 15000000)
-        self.assertEqual(self.map.heading, 0.0)
-        self.assertEqual(self.map.pitch, -90.0)
-        self.assertEqual(self.map.roll, 0.0)
-        self.assertTrue(self.map.base_layer_picker)
-        self.assertFalse(self.map.timeline)  # Default is False based on implementation
-
-    def test_access_token_handling(self):
+        assert cesium_map.center == [-122.4194, 37.7749]
+        assert cesium_map.zoom == 12
+        assert cesium_map.camera_height == 15000000
+        assert cesium_map.heading == 0.0
+        assert cesium_map.pitch == (-90.0)
+        assert cesium_map.roll == 0.0
+        assert cesium_map.base_layer_picker
+        assert not cesium_map.timeline  # Default is False based on implementation
+
+    def test_access_token_handling(self, cesium_map):
         """Test access token management."""
         # Test setting access token
         test_token = "ey.test"
-        self.map.set_access_token(test_token)
-        self.assertEqual(self.map.access_token, test_token)
+        cesium_map.set_access_token(test_token)
+        assert cesium_map.access_token == test_token
 
         # Test creating map with custom token
         custom_map = CesiumMap(access_token="custom_token")
-        self.assertEqual(custom_map.access_token, "custom_token")
+        assert custom_map.access_token == "custom_token"
 
     def test_default_access_token(self):
         """Test default access token retrieval."""
@@ -803,55 +2223,48 @@ class TestCesiumMap(unittest.TestCase):
             warnings.simplefilter("ignore")
             token = CesiumMap._get_default_access_token()
             # Token could be empty if no environment variable set
-            self.assertIsInstance(token, str)
+            assert isinstance(token, str)
 
-    def test_cesium_specific_methods(self):
+    def test_cesium_specific_methods(self, cesium_map):
         """Test Cesium-specific methods."""
         # Test fly to
-        self.map.fly_to(40.7128, -74.0060, height=20000000, duration=5.0)
-        calls = self.map._js_calls
-        self.assertTrue(any(call["method"] == "flyTo" for call in calls))
+        cesium_map.fly_to(40.7128, -74.0060, height=20000000, duration=5.0)
+        assert cesium_map._js_calls[-1]["method"] == "flyTo"
 
         # Test adding point
-        point_id = self.map.add_point(
+        point_id = cesium_map.add_point(
             40.7128, -74.0060, height=100000, name="Test Point"
         )
-        calls = self.map._js_calls
-        self.assertTrue(any(call["method"] == "addEntity" for call in calls))
-        self.assertIsInstance(point_id, str)
+        assert cesium_map._js_calls[-1]["method"] == "addEntity"
+        assert isinstance(point_id, str)
 
         # Test adding billboard
-        billboard_id = self.map.add_billboard(40.7128, -74.0060, image_url="test.png")
-        calls = self.map._js_calls
-        self.assertTrue(any(call["method"] == "addEntity" for call in calls))
+        billboard_id = cesium_map.add_billboard(40.7128, -74.0060, image_url="test.png")
+        assert cesium_map._js_calls[-1]["method"] == "addEntity"
 
         # Test adding polyline
         coordinates = [[40.0, -74.0, 0], [41.0, -75.0, 1000]]
-        polyline_id = self.map.add_polyline(coordinates, width=5, color="#ff0000")
-        calls = self.map._js_calls
-        self.assertTrue(any(call["method"] == "addEntity" for call in calls))
+        polyline_id = cesium_map.add_polyline(coordinates, width=5, color="#ff0000")
+        assert cesium_map._js_calls[-1]["method"] == "addEntity"
 
         # Test adding polygon
-        polygon_id = self.map.add_polygon(coordinates, color="#00ff00")
-        calls = self.map._js_calls
-        self.assertTrue(any(call["method"] == "addEntity" for call in calls))
+        polygon_id = cesium_map.add_polygon(coordinates, color="#00ff00")
+        assert cesium_map._js_calls[-1]["method"] == "addEntity"
 
-    def test_entity_management(self):
+    def test_entity_management(self, cesium_map):
         """Test entity management."""
         # Add an entity
-        entity_id = self.map.add_point(40.0, -74.0, name="Test Entity")
+        entity_id = cesium_map.add_point(40.0, -74.0, name="Test Entity")
 
         # Remove the entity
-        self.map.remove_entity(entity_id)
-        calls = self.map._js_calls
-        self.assertTrue(any(call["method"] == "removeEntity" for call in calls))
+        cesium_map.remove_entity(entity_id)
+        assert cesium_map._js_calls[-1]["method"] == "removeEntity"
 
         # Test zoom to entity
-        self.map.zoom_to_entity(entity_id)
-        calls = self.map._js_calls
-        self.assertTrue(any(call["method"] == "zoomToEntity" for call in calls))
+        cesium_map.zoom_to_entity(entity_id)
+        assert cesium_map._js_calls[-1]["method"] == "zoomToEntity"
 
-    def test_data_sources(self):
+    def test_data_sources(self, cesium_map):
         """Test data source management."""
         # Test GeoJSON data source
         geojson_data = {
@@ -865,101 +2278,89 @@ class TestCesiumMap(unittest.TestCase):
             ],
         }
 
-        self.map.add_geojson(geojson_data, options={"name": "Test GeoJSON"})
-        calls = self.map._js_calls
-        self.assertTrue(any(call["method"] == "addDataSource" for call in calls))
+        cesium_map.add_geojson(geojson_data, options={"name": "Test GeoJSON"})
+        assert cesium_map._js_calls[-1]["method"] == "addDataSource"
 
         # Test KML data source
-        self.map.add_kml("https://example.com/test.kml", options={"name": "Test KML"})
-        calls = self.map._js_calls
-        self.assertTrue(any(call["method"] == "addDataSource" for call in calls))
+        cesium_map.add_kml("https://example.com/test.kml", options={"name": "Test KML"})
+        assert cesium_map._js_calls[-1]["method"] == "addDataSource"
 
         # Test CZML data source
         czml_data = [{"id": "document", "version": "1.0"}]
-        self.map.add_czml(czml_data, options={"name": "Test CZML"})
-        calls = self.map._js_calls
-        self.assertTrue(any(call["method"] == "addDataSource" for call in calls))
+        cesium_map.add_czml(czml_data, options={"name": "Test CZML"})
+        assert cesium_map._js_calls[-1]["method"] == "addDataSource"
 
-    def test_terrain_management(self):
+    def test_terrain_management(self, cesium_map):
         """Test terrain management."""
         # Test Cesium World Terrain
-        self.map.set_cesium_world_terrain(request_water_mask=True)
-        calls = self.map._js_calls
-        self.assertTrue(any(call["method"] == "setTerrain" for call in calls))
+        cesium_map.set_cesium_world_terrain(request_water_mask=True)
+        assert cesium_map._js_calls[-1]["method"] == "setTerrain"
 
         # Test custom terrain
-        self.map.set_terrain({"url": "https://example.com/terrain"})
-        calls = self.map._js_calls
-        self.assertTrue(any(call["method"] == "setTerrain" for call in calls))
+        cesium_map.set_terrain({"url": "https://example.com/terrain"})
+        assert cesium_map._js_calls[-1]["method"] == "setTerrain"
 
         # Test disable terrain
-        self.map.set_terrain(None)
-        calls = self.map._js_calls
-        self.assertTrue(any(call["method"] == "setTerrain" for call in calls))
+        cesium_map.set_terrain(None)
+        assert cesium_map._js_calls[-1]["method"] == "setTerrain"
 
-    def test_imagery_management(self):
+    def test_imagery_management(self, cesium_map):
         """Test imagery management."""
         # Test Bing Maps imagery
-        self.map.set_imagery({"type": "bing", "key": "test_key", "mapStyle": "Aerial"})
-        calls = self.map._js_calls
-        self.assertTrue(any(call["method"] == "setImagery" for call in calls))
+        cesium_map.set_imagery(
+            {"type": "bing", "key": "test_key", "mapStyle": "Aerial"}
+        )
+        assert cesium_map._js_calls[-1]["method"] == "setImagery"
 
         # Test OpenStreetMap imagery
-        self.map.set_imagery({"type": "osm"})
-        calls = self.map._js_calls
-        self.assertTrue(any(call["method"] == "setImagery" for call in calls))
+        cesium_map.set_imagery({"type": "osm"})
+        assert cesium_map._js_calls[-1]["method"] == "setImagery"
 
-    def test_scene_management(self):
+    def test_scene_management(self, cesium_map):
         """Test scene management."""
         # Test scene modes
-        self.map.set_scene_mode_3d()
-        calls = self.map._js_calls
-        self.assertTrue(any(call["method"] == "setScene3D" for call in calls))
+        cesium_map.set_scene_mode_3d()
+        assert cesium_map._js_calls[-1]["method"] == "setScene3D"
 
-        self.map.set_scene_mode_2d()
-        calls = self.map._js_calls
-        self.assertTrue(any(call["method"] == "setScene2D" for call in calls))
+        cesium_map.set_scene_mode_2d()
+        assert cesium_map._js_calls[-1]["method"] == "setScene2D"
 
-        self.map.set_scene_mode_columbus()
-        calls = self.map._js_calls
-        self.assertTrue(any(call["method"] == "setSceneColumbusView" for call in calls))
+        cesium_map.set_scene_mode_columbus()
+        assert cesium_map._js_calls[-1]["method"] == "setSceneColumbusView"
 
         # Test lighting and fog
-        self.map.enable_lighting(True)
-        calls = self.map._js_calls
-        self.assertTrue(any(call["method"] == "enableLighting" for call in calls))
+        cesium_map.enable_lighting(True)
+        assert cesium_map._js_calls[-1]["method"] == "enableLighting"
 
-        self.map.enable_fog(True)
-        calls = self.map._js_calls
-        self.assertTrue(any(call["method"] == "enableFog" for call in calls))
+        cesium_map.enable_fog(True)
+        assert cesium_map._js_calls[-1]["method"] == "enableFog"
 
-    def test_camera_controls(self):
+    def test_camera_controls(self, cesium_map):
         """Test camera controls."""
         # Test home view
-        self.map.home()
-        calls = self.map._js_calls
-        self.assertTrue(any(call["method"] == "home" for call in calls))
+        cesium_map.home()
+        assert cesium_map._js_calls[-1]["method"] == "home"
 
         # Test setting camera position
-        self.map.set_camera_position(
+        cesium_map.set_camera_position(
             40.0, -74.0, 20000000, heading=45, pitch=-60, roll=10
         )
-        self.assertEqual(self.map.center, [40.0, -74.0])
-        self.assertEqual(self.map.camera_height, 20000000)
-        self.assertEqual(self.map.heading, 45)
-        self.assertEqual(self.map.pitch, -60)
-        self.assertEqual(self.map.roll, 10)
+        assert cesium_map.center == [40.0, -74.0]
+        assert cesium_map.camera_height == 20000000
+        assert cesium_map.heading == 45
+        assert cesium_map.pitch == (-60)
+        assert cesium_map.roll == 10
 
-    def test_inheritance_from_mapwidget(self):
+    def test_inheritance_from_mapwidget(self, cesium_map):
         """Test that CesiumMap inherits all MapWidget functionality."""
         # Test basic methods work
-        self.map.set_center(40.7128, -74.0060)
-        self.assertEqual(self.map.center, [40.7128, -74.0060])
+        cesium_map.set_center(40.7128, -74.0060)
+        assert cesium_map.center == [40.7128, -74.0060]
 
         # Test event handling
         callback = Mock()
-        self.map.on_map_event("click", callback)
-        self.assertIn("click", self.map._event_handlers)
+        cesium_map.on_map_event("click", callback)
+        assert "click" in cesium_map._event_handlers
 
     def test_cesium_widget_options(self):
         """Test Cesium widget configuration options."""
@@ -979,13 +2380,13 @@ class TestCesiumMap(unittest.TestCase):
             should_animate=False,
         )
 
-        self.assertFalse(custom_map.base_layer_picker)
-        self.assertFalse(custom_map.fullscreen_button)
-        self.assertFalse(custom_map.timeline)
-        self.assertFalse(custom_map.animation)
+        assert not custom_map.base_layer_picker
+        assert not custom_map.fullscreen_button
+        assert not custom_map.timeline
+        assert not custom_map.animation
 
 
-class TestCesiumMapIntegration(unittest.TestCase):
+class TestCesiumMapIntegration:
     """Test integration between all map types including Cesium."""
 
     def test_independent_map_instances(self):
@@ -998,9 +2399,9 @@ class TestCesiumMapIntegration(unittest.TestCase):
         )
 
         # Verify they have different configurations
-        self.assertNotEqual(maplibre_map.center, mapbox_map.center)
-        self.assertNotEqual(mapbox_map.center, cesium_map.center)
-        self.assertNotEqual(maplibre_map.zoom, cesium_map.zoom)
+        assert maplibre_map.center != mapbox_map.center
+        assert mapbox_map.center != cesium_map.center
+        assert maplibre_map.zoom != cesium_map.zoom
 
         # Add different features to each
         maplibre_map.add_geojson_layer(
@@ -1012,16 +2413,13 @@ class TestCesiumMapIntegration(unittest.TestCase):
         cesium_map.add_point(51.5074, -0.1278, name="London")
 
         # Verify features are independent
-        self.assertIn("ml_layer", maplibre_map.get_layers())
-        self.assertNotIn("ml_layer", mapbox_map.get_layers())
-        self.assertIn("mb_layer", mapbox_map.get_layers())
-        self.assertNotIn("mb_layer", maplibre_map.get_layers())
+        assert "ml_layer" in maplibre_map.get_layers()
+        assert "ml_layer" not in mapbox_map.get_layers()
+        assert "mb_layer" in mapbox_map.get_layers()
+        assert "mb_layer" not in maplibre_map.get_layers()
 
         # Cesium uses entities, not layers
-        cesium_calls = [
-            call for call in cesium_map._js_calls if call["method"] == "addEntity"
-        ]
-        self.assertEqual(len(cesium_calls), 1)
+        assert js_methods(cesium_map)["addEntity"] == 1
 
     def test_different_javascript_modules(self):
         """Test that different map types use different JavaScript modules."""
@@ -1035,24 +2433,24 @@ class TestCesiumMapIntegration(unittest.TestCase):
         cesium_content = str(cesium_map._esm)
 
         # Verify they contain different library imports
-        self.assertIn("maplibre-gl", maplibre_content)
-        self.assertIn("mapbox-gl", mapbox_content)
-        self.assertIn("cesium.com", cesium_content)
+        assert "maplibre-gl" in maplibre_content
+        assert "mapbox-gl" in mapbox_content
+        assert "cesium.com" in cesium_content
 
         # Verify all three are different
-        self.assertNotEqual(maplibre_content, mapbox_content)
-        self.assertNotEqual(mapbox_content, cesium_content)
-        self.assertNotEqual(maplibre_content, cesium_content)
+        assert maplibre_content != mapbox_content
+        assert mapbox_content != cesium_content
+        assert maplibre_content != cesium_content
 
         # Check they use different CSS
         maplibre_css = str(maplibre_map._css)
         mapbox_css = str(mapbox_map._css)
         cesium_css = str(cesium_map._css)
 
-        self.assertNotEqual(maplibre_css, mapbox_css)
-        self.assertNotEqual(mapbox_css, cesium_css)
-        self.assertNotEqual(maplibre_css, cesium_css)
+        assert maplibre_css != mapbox_css
+        assert mapbox_css != cesium_css
+        assert maplibre_css != cesium_css
 
 
 if __name__ == "__main__":
-    unittest.main()
+    pytest.main([__file__])
@@ -1,7 +1,6 @@
 """Tests for OpenLayers implementation."""
 
 import pytest
-import json
 from unittest.mock import patch, mock_open
 from anymap import OpenLayersMap
 